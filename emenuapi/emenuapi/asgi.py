@@ -11,6 +11,11 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'emenuapi.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'emenuapi.settings.prod')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# imported once the apps are loaded
+from menus.events import EventStreamApplication  # noqa: E402 isort:skip
+
+application = EventStreamApplication(django_application)
@@ -6,7 +6,7 @@ from celery import Celery
 from celery.schedules import crontab
 
 # set the default Django settings module for the 'celery' program.
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'emenuapi.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'emenuapi.settings.worker')
 
 app = Celery('emenuapi')
 
@@ -24,6 +24,18 @@ app.conf.beat_schedule = {
         'task': 'menus.tasks.report_dishes',
         'schedule': crontab(hour=10, minute=0),
     },
+    'purge-deleted': {
+        'task': 'menus.tasks.purge_deleted',
+        'schedule': crontab(minute='*/5'),
+    },
+    'sweep-media': {
+        'task': 'menus.tasks.sweep_media',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    'flush-views': {
+        'task': 'menus.tasks.flush_views',
+        'schedule': crontab(minute='*'),
+    },
 }
 
 
@@ -0,0 +1,293 @@
+"""
+Django settings shared by all the emenuapi processes.
+
+Use `dev` for local development and tests, `prod` for API servers and `worker` for Celery
+workers. Production profiles only install the apps and middleware the process uses.
+
+Generated by 'django-admin startproject' using Django 3.2.8.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/3.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/3.2/ref/settings/
+"""
+# flake8: noqa
+import os
+from decimal import Decimal
+from pathlib import Path
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+from typing import Any, Dict, List
+
+from ..settings_celery import *
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/3.2/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY')
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = os.environ.get('DJANGO_DEBUG') == 'True'
+
+ALLOWED_HOSTS: List[str] = [host for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',') if host]
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'rest_framework',
+    'corsheaders',
+    'django_filters',
+    'rest_framework.authtoken',
+    'menus',
+]
+
+MIDDLEWARE = [
+    'menus.public.PublicReadMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'menus.profiling.ProfilingMiddleware',
+    'menus.querylog.QueryBudgetMiddleware',
+]
+
+ROOT_URLCONF = 'emenuapi.urls'
+
+TEMPLATES: List[Dict[str, Any]] = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'emenuapi.wsgi.application'
+
+# Database
+# https://docs.djangoproject.com/en/3.2/ref/settings/#databases
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.postgresql_psycopg2",
+        "NAME": os.environ.get('POSTGRES_DB'),
+        "USER": os.environ.get('POSTGRES_USER'),
+        "PASSWORD": os.environ.get('POSTGRES_PASSWORD'),
+        "HOST": os.environ.get('POSTGRES_HOST'),
+        "PORT": os.environ.get('POSTGRES_PORT'),
+    }
+}
+
+# Caches
+# `shared` is seen by all the web and worker processes with `MEMCACHED_LOCATION` (`host:port`) set,
+# it's local to each process otherwise, which the features counting across processes refuse, see `menus.checks`
+
+MEMCACHED_LOCATION = os.environ.get('MEMCACHED_LOCATION')
+
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'shared': (
+        {'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache', 'LOCATION': MEMCACHED_LOCATION}
+        if MEMCACHED_LOCATION
+        else {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'shared'}
+    ),
+}
+
+# Password validation
+# https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
+    {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
+    {'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator'},
+    {'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator'},
+]
+
+# Internationalization
+# https://docs.djangoproject.com/en/3.2/topics/i18n/
+
+LANGUAGE_CODE = 'en-us'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/3.2/howto/static-files/
+
+STATIC_URL = '/static/'
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = BASE_DIR.parent.joinpath('media')
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': ['rest_framework.authentication.TokenAuthentication'],
+    'DEFAULT_FILTER_BACKENDS': ('django_filters.rest_framework.DjangoFilterBackend',),
+    'DEFAULT_THROTTLE_RATES': {
+        'menus': os.environ.get('MENU_THROTTLE_RATE', '300/min'),
+        'menus_expensive': os.environ.get('MENU_EXPENSIVE_THROTTLE_RATE', '60/min'),
+    },
+    # proxies in front of the app, clients are identified by the `X-Forwarded-For` address they added,
+    # or by `REMOTE_ADDR` with none, the header is set by the clients themselves then
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+}
+
+# throttling, budgets are per process unless the cache is shared
+MENU_THROTTLE_CACHE = 'shared'
+MENU_THROTTLE_MAX_DATE_RANGE_DAYS = 31
+
+# statement timeouts in milliseconds of anonymous reads, other requests and Celery tasks
+STATEMENT_TIMEOUTS = {
+    'public': int(os.environ.get('STATEMENT_TIMEOUT_PUBLIC', 2000)),
+    'authenticated': int(os.environ.get('STATEMENT_TIMEOUT_AUTHENTICATED', 10000)),
+    'task': int(os.environ.get('STATEMENT_TIMEOUT_TASK', 60000)),
+}
+
+# slow query log, a sample of slow reads is stored with its EXPLAIN (ANALYZE, BUFFERS)
+SLOW_QUERY_THRESHOLD = float(os.environ.get('SLOW_QUERY_THRESHOLD', 200))
+SLOW_QUERY_EXPLAIN_RATE = float(os.environ.get('SLOW_QUERY_EXPLAIN_RATE', 0.1))
+SLOW_QUERY_LOG_FILE = os.environ.get('SLOW_QUERY_LOG_FILE', BASE_DIR.parent.joinpath('logs', 'slow_queries.jsonl'))
+SLOW_QUERY_LOG_MAX_BYTES = 10 * 1024 * 1024
+SLOW_QUERY_LOG_BACKUP_COUNT = 5
+
+# profiling, on demand by staff and a sample of requests and tasks, see `menus.profiling`
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_TASK_SAMPLE_RATE = float(os.environ.get('PROFILE_TASK_SAMPLE_RATE', 0))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', BASE_DIR.parent.joinpath('logs', 'profiles'))
+PROFILE_MAX_ARTIFACTS = 200
+PROFILE_TOP_ALLOCATIONS = 20
+PROFILE_TRACEMALLOC_FRAMES = 1
+PROFILE_SPEEDSCOPE_MIN_WEIGHT = 0.001
+
+# Celery task metrics, shared by the web and worker processes through the cache
+TASK_METRICS = os.environ.get('TASK_METRICS') == 'True'
+TASK_METRICS_CACHE = 'shared'
+TASK_METRICS_TIME_BUCKETS = [0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300]
+TASK_METRICS_MEMORY_BUCKETS = [2**20, 8 * 2**20, 32 * 2**20, 128 * 2**20]
+
+# menu list and retrieve responses built by Postgres, see `menus.pgjson`
+MENU_JSON_FROM_DATABASE = os.environ.get('MENU_JSON_FROM_DATABASE') == 'True'
+
+# anonymous menu reads skipping the middleware and DRF layers they don't need, see `menus.public`
+PUBLIC_READ = os.environ.get('PUBLIC_READ') == 'True'
+PUBLIC_READ_URLCONF = 'menus.public_urls'
+# middleware of these reads that changes their responses or applies limits
+PUBLIC_READ_MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+    'menus.profiling.ProfilingMiddleware',
+    'menus.querylog.QueryBudgetMiddleware',
+]
+
+# single-flight of identical anonymous menu reads, see `menus.coalescing`, times are in seconds
+COALESCING = os.environ.get('COALESCING') == 'True'
+COALESCING_WAIT = float(os.environ.get('COALESCING_WAIT', 2))
+# cache sharing the requests in flight between processes, none shares them within a process only, which
+# needs threaded workers (`GUNICORN_THREADS`)
+COALESCING_CACHE = os.environ.get('COALESCING_CACHE') or None
+COALESCING_LOCK_TIMEOUT = 30
+COALESCING_POLL_INTERVAL = 0.02
+# counted in each process and pushed every `COALESCING_STATS_PUSH_INTERVAL` seconds, see `coalescing_stats`
+COALESCING_STATS_CACHE = 'shared'
+COALESCING_STATS_PUSH_INTERVAL = 5
+
+# in-process catalog snapshot answering anonymous menu reads, see `menus.catalog`
+CATALOG_SNAPSHOT = os.environ.get('CATALOG_SNAPSHOT') == 'True'
+CATALOG_SNAPSHOT_MAX_STALENESS = float(os.environ.get('CATALOG_SNAPSHOT_MAX_STALENESS', 5))
+CATALOG_SNAPSHOT_POLL_INTERVAL = 1
+CATALOG_SNAPSHOT_RELOAD_INTERVAL = 5 * 60
+CATALOG_SNAPSHOT_MAX_CHANGES = 500
+CATALOG_SNAPSHOT_RETRY_DELAY = 5
+
+# server-sent events of menu and dish changes, see `menus.events`, `EVENT_STREAM_RETRY` is in ms
+EVENT_STREAM = os.environ.get('EVENT_STREAM') == 'True'
+EVENT_STREAM_HISTORY = 1000
+EVENT_STREAM_CLIENT_BUFFER = 100
+EVENT_STREAM_HEARTBEAT = 15
+EVENT_STREAM_RETRY = 3000
+EVENT_STREAM_RETRY_DELAY = 5
+# dish events of dishes on more menus don't list them
+EVENT_STREAM_MAX_MENUS = 500
+
+# view counts of menus and dishes, see `menus.popularity`, buffered in each process for up to
+# `VIEW_COUNTS_PUSH_INTERVAL` seconds and in a cache shared with the workers until `menus.tasks.flush_views`,
+# which only visits the objects listed as viewed per `VIEW_COUNTS_DIRTY_INTERVAL` seconds
+VIEW_COUNTS = os.environ.get('VIEW_COUNTS') == 'True'
+VIEW_COUNTS_CACHE = 'shared'
+VIEW_COUNTS_PUSH_INTERVAL = float(os.environ.get('VIEW_COUNTS_PUSH_INTERVAL', 5))
+VIEW_COUNTS_DIRTY_INTERVAL = 60
+VIEW_COUNTS_DIRTY_TIMEOUT = 60 * 60
+VIEW_COUNTS_FLUSH_BATCH_SIZE = 1000
+# flushes don't overlap unless one takes longer
+VIEW_COUNTS_FLUSH_LOCK_TIMEOUT = 60 * 10
+
+# deletion, `deferred` marks rows as deleted and leaves the rest to `menus.tasks.purge_deleted`
+DELETE_MODE = os.environ.get('DELETE_MODE', 'deferred')
+PURGE_BATCH_SIZE = 500
+PURGE_BATCH_DELAY = 5
+MEDIA_PURGE_BATCH_SIZE = 100
+MEDIA_PURGE_DELAY = 0.5
+MEDIA_SWEEP_GRACE_PERIOD = 60 * 60
+MEDIA_SWEEP_MAX_FILES = 1000
+
+# dish photos, resumable uploads are assembled in `PHOTO_UPLOAD_DIR` before they're stored
+PHOTO_MAX_SIZE = 10 * 2**20
+PHOTO_CONTENT_TYPES = {'image/jpeg': ['.jpg', '.jpeg'], 'image/png': ['.png'], 'image/webp': ['.webp']}
+PHOTO_UPLOAD_DIR = os.environ.get('PHOTO_UPLOAD_DIR', BASE_DIR.parent.joinpath('uploads'))
+PHOTO_UPLOAD_PART_MAX_SIZE = 2**20
+PHOTO_UPLOAD_EXPIRY = 24 * 60 * 60
+
+# batch retrieve with `?ids=`
+BATCH_RETRIEVE_MAX_SIZE = 50
+
+# fragment cache of serialized dishes, hits and misses are counted in each process and pushed to
+# `FRAGMENT_CACHE_STATS_CACHE` every `FRAGMENT_CACHE_STATS_PUSH_INTERVAL` seconds, see `fragment_cache_stats`
+FRAGMENT_CACHE = 'default'
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+FRAGMENT_CACHE_STATS_CACHE = 'shared'
+FRAGMENT_CACHE_STATS_PUSH_INTERVAL = 5
+
+# faceted dish search, boundaries split the values into [min, max) buckets
+DISH_FACET_BUCKETS = {
+    'price': [Decimal('10'), Decimal('25'), Decimal('50')],
+    'time_to_prepare': [15, 30, 60],
+}
+DISH_SEARCH_PAGE_SIZE = 20
+DISH_SEARCH_MAX_PAGE_SIZE = 100
+
+# cursor pagination of `/api/menus/{menu_id}/dishes/`
+MENU_DISHES_PAGE_SIZE = 50
+MENU_DISHES_MAX_PAGE_SIZE = 200
+
+# cursor pagination of `/api/dishes/{dish_id}/menus/`
+DISH_MENUS_PAGE_SIZE = 50
+DISH_MENUS_MAX_PAGE_SIZE = 200
+
+# Schema
+SCHEMA_FILE = BASE_DIR.joinpath('schema.yml')
+SCHEMA_MAX_AGE = 60 * 5
+
+# cors
+CORS_URLS_REGEX = r'^/api/.*$'
+
+FROM_EMAIL = os.environ.get("FROM_EMAIL")
+EMAIL_BACKEND = os.environ.get("EMAIL_BACKEND")
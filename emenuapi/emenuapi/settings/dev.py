@@ -0,0 +1,59 @@
+# flake8: noqa
+from .base import *
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    *INSTALLED_APPS,
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'django_extensions',
+    'drf_spectacular',
+]
+
+# sessions, authentication, messages and CSRF protection of the admin, in the order of Django's default stack
+common = MIDDLEWARE.index('django.middleware.common.CommonMiddleware')
+MIDDLEWARE = [
+    *MIDDLEWARE[:common],
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    MIDDLEWARE[common],
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    *MIDDLEWARE[common + 1 :],
+]
+
+# public reads get the clickjacking header of the full stack too
+profiling = PUBLIC_READ_MIDDLEWARE.index('menus.profiling.ProfilingMiddleware')
+PUBLIC_READ_MIDDLEWARE = [
+    *PUBLIC_READ_MIDDLEWARE[:profiling],
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    *PUBLIC_READ_MIDDLEWARE[profiling:],
+]
+
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        'OPTIONS': {
+            **TEMPLATES[0]['OPTIONS'],
+            'context_processors': [
+                *TEMPLATES[0]['OPTIONS']['context_processors'],
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+# Schema
+REST_FRAMEWORK = {**REST_FRAMEWORK, 'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema'}
+
+SPECTACULAR_SETTINGS = {
+    'TITLE': 'eMenu API',
+    'DESCRIPTION': '',
+    'VERSION': '1.0.0',
+    'POSTPROCESSING_HOOKS': [],
+}
+
+SHELL_PLUS = "ipython"
@@ -0,0 +1,4 @@
+# flake8: noqa
+from .base import *
+
+DEBUG = False
@@ -0,0 +1,13 @@
+# flake8: noqa
+from .base import *
+
+DEBUG = False
+
+# Tasks only use the ORM, templates and email
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'menus',
+]
+
+MIDDLEWARE = []
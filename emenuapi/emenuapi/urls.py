@@ -13,15 +13,24 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
+from django.apps import apps
 from django.urls import include, path
-from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView
+from menus.schema import SchemaView
 from menus.views import ObtainAuthTokenAPIView
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('api/auth/', ObtainAuthTokenAPIView.as_view()),
     path('api/', include('menus.urls', namespace='menus')),
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+    path('api/schema/', SchemaView.as_view(), name='schema'),
 ]
+
+# admin and redoc views are only installed by the dev settings
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+
+    urlpatterns.append(path('admin/', admin.site.urls))
+
+if apps.is_installed('drf_spectacular'):
+    from drf_spectacular.views import SpectacularRedocView
+
+    urlpatterns.append(path('api/schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'))
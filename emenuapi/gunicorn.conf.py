@@ -0,0 +1,42 @@
+"""
+Gunicorn configuration of the production application server.
+
+The app is preloaded in the master process and frozen with `gc.freeze()` right before
+workers are forked, so the memory pages of the preloaded modules stay shared between
+workers (copy-on-write) instead of being touched by the garbage collector of each one.
+"""
+import gc
+import os
+
+
+def default_workers() -> int:
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover
+        cores = os.cpu_count() or 1
+    return cores * 2 + 1
+
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')  # nosec
+workers = int(os.environ.get('GUNICORN_WORKERS', default_workers()))
+# above 1 workers are threaded (`gthread`), needed by request coalescing within a process
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+preload_app = True
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+accesslog = '-'
+pidfile = os.environ.get('GUNICORN_PIDFILE', '/tmp/gunicorn.pid')  # nosec
+
+# Objects allocated while preloading the app are never collected in the master
+gc.disable()
+
+
+def when_ready(server) -> None:  # type: ignore
+    gc.freeze()
+
+
+def post_fork(server, worker) -> None:  # type: ignore
+    gc.enable()
@@ -6,7 +6,7 @@ import sys
 
 def main() -> None:
     """Run administrative tasks."""
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'emenuapi.settings')
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'emenuapi.settings.dev')
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
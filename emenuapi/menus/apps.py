@@ -4,3 +4,20 @@ from django.apps import AppConfig
 class MenusConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'menus'
+
+    def ready(self) -> None:
+        from celery.signals import before_task_publish, task_postrun, task_prerun
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import m2m_changed
+        from menus import checks, events, profiling, querylog, taskmetrics  # noqa: F401
+        from menus.models import Menu
+
+        connection_created.connect(querylog.install)
+        task_prerun.connect(querylog.task_prerun)
+        task_postrun.connect(querylog.task_postrun)
+        task_prerun.connect(profiling.task_prerun)
+        task_postrun.connect(profiling.task_postrun)
+        before_task_publish.connect(taskmetrics.before_task_publish)
+        task_prerun.connect(taskmetrics.task_prerun)
+        task_postrun.connect(taskmetrics.task_postrun)
+        m2m_changed.connect(events.publish_dishes_changed, sender=Menu.dishes.through)
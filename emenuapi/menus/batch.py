@@ -0,0 +1,51 @@
+from typing import Any, List, Optional
+
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+BATCH_PARAM = 'ids'
+
+
+def parse_ids(value: str, max_size: int) -> List[int]:
+    """
+    Parses comma separated ids, keeping the first occurrence of duplicates.
+    """
+    try:
+        ids = [int(item) for item in value.split(',') if item.strip()]
+    except ValueError:
+        raise ValidationError({BATCH_PARAM: ['Enter comma separated integers.']})
+
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise ValidationError({BATCH_PARAM: ['Enter at least one id.']})
+    if len(ids) > max_size:
+        raise ValidationError({BATCH_PARAM: [f'Ensure there are no more than {max_size} ids.']})
+    return ids
+
+
+class BatchRetrieveMixin:
+    """
+    Serves `?ids=1,2,3` on the list endpoint as a batch of `retrieve` actions.
+
+    Objects are serialized and their querysets planned like `retrieve`, so the number of
+    queries doesn't depend on the number of ids. Objects that don't exist or aren't visible
+    are left out, the rest is returned in the order of the ids.
+    """
+
+    def get_batch_ids(self, request: Request) -> Optional[List[int]]:
+        value = request.query_params.get(BATCH_PARAM)
+        if value is None:
+            return None
+        return parse_ids(value, settings.BATCH_RETRIEVE_MAX_SIZE)
+
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        ids = self.get_batch_ids(request)
+        if ids is None:
+            return super().list(request, *args, **kwargs)  # type: ignore
+
+        self.action = 'retrieve'
+        objects = self.get_queryset().in_bulk(ids)  # type: ignore
+        serializer = self.get_serializer([objects[pk] for pk in ids if pk in objects], many=True)  # type: ignore
+        return Response(serializer.data)
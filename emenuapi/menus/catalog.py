@@ -0,0 +1,373 @@
+import datetime
+import decimal
+import logging
+import select
+import threading
+import time
+from collections import OrderedDict
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, cast
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.http import Http404
+from django_filters.utils import translate_validation
+from menus.filters import POPULARITY, MenuFilter
+from menus.models import Dish, Menu
+from menus.notifications import listen
+from menus.pagination import DISHES_LIMIT_PARAM
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'menus_catalog'
+STALENESS_HEADER = 'X-Catalog-Staleness'
+
+MENU_FIELDS = ('id', 'name', 'description', 'created', 'updated')
+DISH_FIELDS = (
+    'id',
+    'name',
+    'description',
+    'price',
+    'time_to_prepare',
+    'is_vegetarian',
+    'image',
+    'created',
+    'updated',
+)
+
+
+class MenuRecord:
+    __slots__ = ('id', 'name', 'description', 'created', 'updated', 'dishes')
+
+    def __init__(
+        self,
+        id: int,
+        name: str,
+        description: str,
+        created: datetime.datetime,
+        updated: Optional[datetime.datetime],
+        dishes: Tuple[int, ...],
+    ) -> None:
+        self.id = id
+        self.name = name
+        self.description = description
+        self.created = created
+        self.updated = updated
+        self.dishes = dishes
+
+    @property
+    def num_dishes(self) -> int:
+        return len(self.dishes)
+
+
+class DishRecord:
+    __slots__ = DISH_FIELDS
+
+    def __init__(
+        self,
+        id: int,
+        name: str,
+        description: str,
+        price: decimal.Decimal,
+        time_to_prepare: int,
+        is_vegetarian: bool,
+        image: str,
+        created: datetime.datetime,
+        updated: Optional[datetime.datetime],
+    ) -> None:
+        self.id = id
+        self.name = name
+        self.description = description
+        self.price = price
+        self.time_to_prepare = time_to_prepare
+        self.is_vegetarian = is_vegetarian
+        self.image = image
+        self.created = created
+        self.updated = updated
+
+
+class CatalogState:
+    """
+    Public menus, i.e. menus with dishes, and their dishes. A state is never changed once
+    published, changes build a new state, so readers need no locking.
+    """
+
+    __slots__ = ('menus', 'dishes')
+
+    def __init__(self, menus: Dict[int, MenuRecord], dishes: Dict[int, DishRecord]) -> None:
+        self.menus = menus
+        self.dishes = dishes
+
+
+def load_dishes(pks: Optional[Iterable[int]] = None) -> Dict[int, DishRecord]:
+    queryset = Dish.objects.all() if pks is None else Dish.objects.filter(pk__in=list(pks))
+    return {row[0]: DishRecord(*row) for row in queryset.values_list(*DISH_FIELDS)}
+
+
+def load_menus(pks: Optional[Iterable[int]] = None) -> Dict[int, MenuRecord]:
+    menus = Menu.objects.all() if pks is None else Menu.objects.filter(pk__in=list(pks))
+    links = Menu.dishes.through.objects.filter(menu__deleted__isnull=True, dish__deleted__isnull=True)
+    if pks is not None:
+        links = links.filter(menu_id__in=list(pks))
+
+    dishes: Dict[int, List[int]] = {}
+    for menu_id, dish_id in links.order_by('pk').values_list('menu_id', 'dish_id'):
+        dishes.setdefault(menu_id, []).append(dish_id)
+    return {
+        pk: MenuRecord(pk, name, description, created, updated, tuple(dishes[pk]))
+        for pk, name, description, created, updated in menus.values_list(*MENU_FIELDS)
+        # menus without dishes aren't public
+        if pk in dishes
+    }
+
+
+def load_state() -> CatalogState:
+    menus = load_menus()
+    referenced = {pk for menu in menus.values() for pk in menu.dishes}
+    return CatalogState(menus, load_dishes(referenced))
+
+
+def apply_changes(state: CatalogState, menu_ids: Set[int], dish_ids: Set[int]) -> CatalogState:
+    """
+    Returns a new state with the given menus and dishes reloaded. Menus linked to changed
+    dishes are reloaded too, as a deleted dish may hide a menu.
+    """
+    dishes = dict(state.dishes)
+    if dish_ids:
+        for pk in dish_ids:
+            dishes.pop(pk, None)
+        dishes.update(load_dishes(dish_ids))
+        linked = Menu.dishes.through.objects.filter(dish_id__in=list(dish_ids)).values_list('menu_id', flat=True)
+        menu_ids = menu_ids | set(linked) | {pk for pk, menu in state.menus.items() if dish_ids & set(menu.dishes)}
+
+    menus = dict(state.menus)
+    for pk in menu_ids:
+        menus.pop(pk, None)
+    menus.update(load_menus(menu_ids))
+
+    missing = {pk for menu in menus.values() for pk in menu.dishes} - dishes.keys()
+    if missing:
+        dishes.update(load_dishes(missing))
+    return CatalogState(menus, dishes)
+
+
+def parse_notifications(payloads: Iterable[str]) -> Tuple[Set[int], Set[int]]:
+    menu_ids: Set[int] = set()
+    dish_ids: Set[int] = set()
+    for payload in payloads:
+        kind, _, pk = payload.partition(':')
+        (menu_ids if kind == 'menu' else dish_ids).add(int(pk))
+    return menu_ids, dish_ids
+
+
+class CatalogSnapshot:
+    """
+    Per-process catalog kept up to date by a background thread listening to the
+    `menus_catalog` Postgres notifications sent by triggers on menus, dishes and their links.
+
+    The thread applies notified changes every `CATALOG_SNAPSHOT_POLL_INTERVAL` seconds and
+    reloads everything on (re)connect, when more than `CATALOG_SNAPSHOT_MAX_CHANGES` objects
+    changed at once, and every `CATALOG_SNAPSHOT_RELOAD_INTERVAL` seconds as a safety net.
+    `synced_at` is when the state was last known to include all committed changes; a state
+    older than `CATALOG_SNAPSHOT_MAX_STALENESS` seconds isn't used.
+    """
+
+    def __init__(self) -> None:
+        self.state: Optional[CatalogState] = None
+        self.synced_at = 0.0
+        self.reloaded_at = 0.0
+        self.thread: Optional[threading.Thread] = None
+        self.stopping = threading.Event()
+        self.lock = threading.Lock()
+
+    def start(self) -> None:
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.stopping.clear()
+                self.thread = threading.Thread(target=self.run, name='catalog-snapshot', daemon=True)
+                self.thread.start()
+
+    def stop(self) -> None:
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def staleness(self) -> float:
+        return time.monotonic() - self.synced_at
+
+    def get_state(self) -> Optional[CatalogState]:
+        if self.state is None or self.staleness() > settings.CATALOG_SNAPSHOT_MAX_STALENESS:
+            return None
+        return self.state
+
+    def reload(self) -> None:
+        started = time.monotonic()
+        self.state = load_state()
+        self.synced_at = self.reloaded_at = started
+
+    def update(self, payloads: List[str], checkpoint: float) -> None:
+        """
+        Applies notified changes, all changes committed before `checkpoint` have been received.
+        """
+        if self.state is None or len(payloads) > settings.CATALOG_SNAPSHOT_MAX_CHANGES:
+            self.reload()
+        elif checkpoint - self.reloaded_at > settings.CATALOG_SNAPSHOT_RELOAD_INTERVAL:
+            self.reload()
+        else:
+            if payloads:
+                self.state = apply_changes(self.state, *parse_notifications(payloads))
+            self.synced_at = checkpoint
+
+    def run(self) -> None:
+        while not self.stopping.is_set():
+            try:
+                self.listen()
+            except Exception:  # noqa: B902
+                logger.exception('Catalog snapshot listener failed, reconnecting')
+                self.stopping.wait(settings.CATALOG_SNAPSHOT_RETRY_DELAY)
+            finally:
+                # connections of this thread only
+                connections.close_all()
+
+    def listen(self) -> None:
+        listener = listen(CHANNEL)
+        try:
+            # notifications sent during the reload are applied afterwards
+            self.reload()
+            while not self.stopping.is_set():
+                checkpoint = time.monotonic()
+                select.select([listener], [], [], settings.CATALOG_SNAPSHOT_POLL_INTERVAL)
+                listener.poll()
+                payloads = list(dict.fromkeys(notify.payload for notify in listener.notifies))
+                del listener.notifies[:]
+                self.update(payloads, checkpoint)
+        finally:
+            listener.close()
+
+
+snapshot = CatalogSnapshot()
+
+
+def get_state() -> Optional[CatalogState]:
+    snapshot.start()
+    return snapshot.get_state()
+
+
+def represent(record: Any, serializer: serializers.Serializer, state: CatalogState, request: Request) -> Dict[str, Any]:
+    """
+    Renders `record` with the fields of `serializer`, matching its output for the model instance.
+    """
+    data: Dict[str, Any] = OrderedDict()
+    for name, field in serializer.fields.items():
+        value = getattr(record, cast(str, field.source))
+        if isinstance(field, serializers.ListSerializer):
+            child = field.child
+            data[name] = [represent(state.dishes[pk], child, state, request) for pk in value]  # type: ignore
+        elif isinstance(field, serializers.ManyRelatedField):
+            data[name] = list(value)
+        elif value is None:
+            data[name] = None
+        elif isinstance(field, serializers.FileField):
+            data[name] = request.build_absolute_uri(default_storage.url(value)) if value else None
+        else:
+            data[name] = field.to_representation(value)
+    return data
+
+
+def search_menus(menus: List[MenuRecord], request: Request) -> List[MenuRecord]:
+    # same terms as `rest_framework.filters.SearchFilter`, matched like `icontains`
+    params = request.query_params.get(api_settings.SEARCH_PARAM, '')
+    for term in params.replace('\x00', '').replace(',', ' ').split():
+        term = term.upper()
+        menus = [menu for menu in menus if term in menu.name.upper()]
+    return menus
+
+
+def order_menus(menus: List[MenuRecord], request: Request, ordering_fields: List[str]) -> List[MenuRecord]:
+    menus = sorted(menus, key=lambda menu: menu.created, reverse=True)
+    params = request.query_params.get(api_settings.ORDERING_PARAM)
+    if not params:
+        return menus
+
+    ordering = [term.strip() for term in params.split(',') if term.strip().lstrip('-') in ordering_fields]
+    if not ordering:
+        return menus
+    for term in reversed(ordering):
+        menus.sort(key=attrgetter(term.lstrip('-')), reverse=term.startswith('-'))
+    return menus
+
+
+def filter_menus(menus: List[MenuRecord], request: Request) -> List[MenuRecord]:
+    filterset = MenuFilter(request.query_params, queryset=Menu.objects.none(), request=request)
+    if not filterset.is_valid():
+        raise translate_validation(filterset.errors)
+
+    for name in ('created', 'updated'):
+        value = filterset.form.cleaned_data.get(name)
+        if not value:
+            continue
+        menus = [menu for menu in menus if in_range(getattr(menu, name), value)]
+    return menus
+
+
+def in_range(value: Optional[datetime.datetime], bounds: slice) -> bool:
+    if value is None:
+        return False
+    if bounds.start is not None and value < bounds.start:
+        return False
+    return bounds.stop is None or value <= bounds.stop
+
+
+class CatalogSnapshotMixin:
+    """
+    Answers anonymous menu list and retrieve requests from the in-process catalog snapshot
+    when `CATALOG_SNAPSHOT` is on and the snapshot is fresh, falling back to the database
+    otherwise. The staleness bound of the snapshot is reported in `X-Catalog-Staleness`.
+    """
+
+    def get_catalog_state(self, request: Request) -> Optional[CatalogState]:
+        if not settings.CATALOG_SNAPSHOT or request.user.is_authenticated:
+            return None
+        return get_state()
+
+    def catalog_response(self, data: Any) -> Response:
+        response = Response(data)
+        response[STALENESS_HEADER] = f'{snapshot.staleness():.3f}'
+        return response
+
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        state = self.get_catalog_state(request)
+        ordering = {
+            term.strip().lstrip('-') for term in request.query_params.get(api_settings.ORDERING_PARAM, '').split(',')
+        }
+        # view counts aren't part of the snapshot, and names are compared with the collation of the database
+        if state is None or 'ids' in request.query_params or ordering & {POPULARITY, 'name'}:
+            return super().list(request, *args, **kwargs)  # type: ignore
+
+        menus = filter_menus(list(state.menus.values()), request)
+        menus = search_menus(menus, request)
+        menus = order_menus(menus, request, self.ordering_fields)  # type: ignore
+        serializer = self.get_serializer_class()()  # type: ignore
+        return self.catalog_response([represent(menu, serializer, state, request) for menu in menus])
+
+    def retrieve(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        state = self.get_catalog_state(request)
+        if state is None or DISHES_LIMIT_PARAM in request.query_params:
+            return super().retrieve(request, *args, **kwargs)  # type: ignore
+
+        try:
+            menus = [state.menus[int(self.kwargs[self.lookup_url_kwarg])]]  # type: ignore
+        except (KeyError, ValueError):
+            raise Http404
+        # filters apply to the lookup like in `get_object`
+        menus = search_menus(filter_menus(menus, request), request)
+        if not menus:
+            raise Http404
+        menu = menus[0]
+        serializer = self.get_serializer_class()()  # type: ignore
+        return self.catalog_response(represent(menu, serializer, state, request))
@@ -0,0 +1,38 @@
+from typing import Any, List
+
+from django.conf import settings
+from django.core import checks
+
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# setting turning a feature on, setting of a cache its processes share
+SHARED_CACHES = [
+    ('COALESCING', 'COALESCING_CACHE'),
+    ('COALESCING', 'COALESCING_STATS_CACHE'),
+    ('TASK_METRICS', 'TASK_METRICS_CACHE'),
+    ('VIEW_COUNTS', 'VIEW_COUNTS_CACHE'),
+]
+
+
+def is_process_local(alias: str) -> bool:
+    return settings.CACHES.get(alias, {}).get('BACKEND') in PROCESS_LOCAL_BACKENDS
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_caches(app_configs: Any = None, **kwargs: Any) -> List[checks.CheckMessage]:
+    errors: List[checks.CheckMessage] = []
+    for feature, cache_setting in SHARED_CACHES:
+        alias = getattr(settings, cache_setting)
+        if getattr(settings, feature) and alias and is_process_local(alias):
+            errors.append(
+                checks.Error(
+                    f'{feature} needs a cache shared by the web and worker processes, '
+                    f'the "{alias}" cache of {cache_setting} is local to each process.',
+                    hint='Set MEMCACHED_LOCATION.',
+                    id='menus.E001',
+                )
+            )
+    return errors
@@ -0,0 +1,73 @@
+from typing import Optional
+
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from menus.models import Dish, Menu
+from rest_framework.exceptions import ValidationError
+
+NAME_MAX_LENGTH = Menu._meta.get_field('name').max_length or 255
+# room left for the longest suffix of `clone_name`
+SUFFIX_MAX_LENGTH = 20
+
+DISH_COLUMNS = ('name', 'description', 'price', 'time_to_prepare', 'is_vegetarian', 'image')
+
+
+def name_suffix(number: int) -> str:
+    return ' (copy)' if number == 1 else f' (copy {number})'
+
+
+def clone_name(name: str) -> str:
+    """
+    Returns the first of `<name> (copy)`, `<name> (copy 2)`, ... no menu is named, with a single query.
+    Long names are cut to fit the suffix.
+    """
+    prefix = name[: NAME_MAX_LENGTH - SUFFIX_MAX_LENGTH]
+    taken = set(Menu.objects.filter(name__startswith=prefix).values_list('name', flat=True))
+    number = 1
+    while True:
+        suffix = name_suffix(number)
+        candidate = name[: NAME_MAX_LENGTH - len(suffix)] + suffix
+        if candidate not in taken:
+            return candidate
+        number += 1
+
+
+def clone_menu(menu: Menu, name: Optional[str] = None, copy_dishes: bool = False) -> int:
+    """
+    Copies `menu` and links the copy to its dishes, or with `copy_dishes` to copies of its dishes
+    referencing the same images, with a single `INSERT ... SELECT` statement. Without a `name` the
+    copy is named by `clone_name`. Returns the id of the copy.
+    """
+    if name is None:
+        name = clone_name(menu.name)
+
+    menus, dishes, links = Menu._meta.db_table, Dish._meta.db_table, Menu.dishes.through._meta.db_table
+    columns = ', '.join(DISH_COLUMNS)
+    if copy_dishes:
+        # copies are inserted in the order of the ids of the originals
+        dishes_query = (
+            f'INSERT INTO {dishes} ({columns}, created, views) '
+            f'SELECT {", ".join(f"d.{column}" for column in DISH_COLUMNS)}, %(now)s, 0 '
+            f'FROM {dishes} d JOIN {links} l ON l.dish_id = d.id '
+            f'WHERE l.menu_id = %(menu_id)s AND d.deleted IS NULL ORDER BY d.id RETURNING id'
+        )
+    else:
+        dishes_query = (
+            f'SELECT d.id FROM {dishes} d JOIN {links} l ON l.dish_id = d.id '
+            f'WHERE l.menu_id = %(menu_id)s AND d.deleted IS NULL'
+        )
+    sql = (
+        f'WITH menu AS ('
+        f'INSERT INTO {menus} (name, description, created, views) '
+        f'SELECT %(name)s, description, %(now)s, 0 FROM {menus} WHERE id = %(menu_id)s RETURNING id'
+        f'), dishes AS ({dishes_query}), '
+        f'links AS (INSERT INTO {links} (menu_id, dish_id) SELECT menu.id, dishes.id FROM menu, dishes) '
+        f'SELECT id FROM menu'
+    )
+    try:
+        with transaction.atomic(savepoint=False), connection.cursor() as cursor:
+            cursor.execute(sql, {'name': name, 'now': timezone.now(), 'menu_id': menu.pk})
+            return int(cursor.fetchone()[0])
+    except IntegrityError:
+        # the name is taken, possibly since it was checked
+        raise ValidationError({'name': ['menu with this name already exists.']})
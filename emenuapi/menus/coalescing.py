@@ -0,0 +1,215 @@
+import functools
+import hashlib
+import math
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.http import HttpResponse
+from django.http.response import HttpResponseBase
+from menus.counters import CounterBuffer, incr_many
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+LEADERS_KEY = 'coalescing:leaders'
+COALESCED_KEY = 'coalescing:coalesced'
+REMOTE_KEY = 'coalescing:coalesced_remote'
+FALLBACKS_KEY = 'coalescing:fallbacks'
+COUNTER_KEYS = (LEADERS_KEY, COALESCED_KEY, REMOTE_KEY, FALLBACKS_KEY)
+
+
+class SharedResponse:
+    """
+    What a follower needs to answer with the response of the leader: the data of a DRF response,
+    which is rendered for every request, or the content of a plain one.
+    """
+
+    __slots__ = ('data', 'content', 'status', 'headers')
+
+    def __init__(self, data: Any, content: Optional[bytes], status: int, headers: Dict[str, str]) -> None:
+        self.data = data
+        self.content = content
+        self.status = status
+        self.headers = headers
+
+    @classmethod
+    def from_response(cls, response: HttpResponseBase) -> Optional['SharedResponse']:
+        headers = dict(response.items())
+        if isinstance(response, Response):
+            return cls(response.data, None, response.status_code, headers)
+        if isinstance(response, HttpResponse):
+            return cls(None, response.content, response.status_code, headers)
+        return None
+
+    def to_response(self) -> HttpResponseBase:
+        response: HttpResponseBase
+        if self.content is None:
+            response = Response(self.data, status=self.status)
+        else:
+            response = HttpResponse(self.content, status=self.status)
+        for name, value in self.headers.items():
+            response[name] = value
+        return response
+
+
+class Flight:
+    __slots__ = ('done', 'result')
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Optional[SharedResponse] = None
+
+
+def get_stats_cache() -> BaseCache:
+    return caches[settings.COALESCING_STATS_CACHE]
+
+
+def get_lock_cache() -> Optional[BaseCache]:
+    return caches[settings.COALESCING_CACHE] if settings.COALESCING_CACHE else None
+
+
+def push_stats(counts: Dict[str, int]) -> None:
+    incr_many(get_stats_cache(), counts)
+
+
+# counted in each process, pushed to the stats cache every `COALESCING_STATS_PUSH_INTERVAL` seconds
+stats = CounterBuffer(push_stats, 'COALESCING_STATS_PUSH_INTERVAL')
+
+
+def record(key: str) -> None:
+    stats.add(key)
+
+
+def get_stats() -> Dict[str, int]:
+    # including the counts of this process not pushed yet
+    stats.push()
+    counts = get_stats_cache().get_many(list(COUNTER_KEYS))
+    return {key.partition(':')[2]: counts.get(key, 0) for key in COUNTER_KEYS}
+
+
+def reset_stats() -> None:
+    stats.push()
+    get_stats_cache().delete_many(list(COUNTER_KEYS))
+
+
+def request_key(request: Request) -> str:
+    # the absolute URL, as the responses include absolute media URLs
+    url = f'{request.method}:{request.build_absolute_uri()}'
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+def run_locked(key: str, func: Callable[[], HttpResponseBase]) -> HttpResponseBase:
+    """
+    Runs `func` unless another process runs it for `key` already, in which case its result is
+    awaited in the cache for up to `COALESCING_WAIT` seconds. The result is stored under the
+    token of the lock, so it's only shared with requests that arrived while it was computed.
+    """
+    cache = get_lock_cache()
+    if cache is None:
+        record(LEADERS_KEY)
+        return func()
+
+    lock_key = f'coalescing:lock:{key}'
+    token = uuid.uuid4().hex
+    if cache.add(lock_key, token, timeout=settings.COALESCING_LOCK_TIMEOUT):
+        record(LEADERS_KEY)
+        try:
+            response = func()
+            shared = SharedResponse.from_response(response)
+            if shared is not None:
+                cache.set(f'coalescing:result:{token}', shared, timeout=math.ceil(settings.COALESCING_WAIT))
+            return response
+        finally:
+            cache.delete(lock_key)
+
+    token = cache.get(lock_key)
+    deadline = time.monotonic() + settings.COALESCING_WAIT
+    while token is not None:
+        # the lock is checked first, a result stored before the lock was released is then found
+        running = cache.get(lock_key) == token
+        shared = cache.get(f'coalescing:result:{token}')
+        if shared is not None:
+            record(REMOTE_KEY)
+            return shared.to_response()
+        if not running or time.monotonic() >= deadline:
+            break
+        time.sleep(settings.COALESCING_POLL_INTERVAL)
+
+    record(FALLBACKS_KEY)
+    return func()
+
+
+class SingleFlight:
+    """
+    Runs identical requests of a process once at a time, requests arriving while one is in
+    flight wait for up to `COALESCING_WAIT` seconds and answer with its response. They run
+    on their own when the wait times out or the request in flight fails.
+    """
+
+    def __init__(self) -> None:
+        self.flights: Dict[str, Flight] = {}
+        self.lock = threading.Lock()
+
+    def join(self, key: str) -> Tuple[Flight, bool]:
+        with self.lock:
+            flight = self.flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self.flights[key] = Flight()
+            return flight, True
+
+    def run(self, key: str, func: Callable[[], HttpResponseBase]) -> HttpResponseBase:
+        flight, leader = self.join(key)
+        if not leader:
+            if flight.done.wait(settings.COALESCING_WAIT) and flight.result is not None:
+                record(COALESCED_KEY)
+                return flight.result.to_response()
+            record(FALLBACKS_KEY)
+            return func()
+
+        try:
+            response = run_locked(key, func)
+            flight.result = SharedResponse.from_response(response)
+            return response
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+
+
+single_flight = SingleFlight()
+
+
+def can_coalesce(request: Request) -> bool:
+    """
+    Tells whether another request may be in flight along with `request`: in the same process only
+    under a threaded WSGI server, e.g. gunicorn with `GUNICORN_THREADS` above 1, or in another one
+    with `COALESCING_CACHE`. Sync workers and ASGI, which runs sync views one at a time, have none.
+    """
+    return bool(settings.COALESCING_CACHE or request.META.get('wsgi.multithread'))
+
+
+class CoalescingMixin:
+    """
+    With `COALESCING` on, identical anonymous menu list and retrieve requests in flight at the
+    same time are run once and share the response, see `SingleFlight`. With `COALESCING_CACHE`
+    they're also shared between processes through a short lock in that cache.
+    """
+
+    def coalesce(self, request: Request, func: Callable[[], HttpResponseBase]) -> HttpResponseBase:
+        if not settings.COALESCING or request.method != 'GET' or request.user.is_authenticated:
+            return func()
+        if not can_coalesce(request):
+            return func()
+        return single_flight.run(request_key(request), func)
+
+    # typed like the views, the responses of `DatabaseJSONMixin` aren't DRF responses
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        return self.coalesce(request, functools.partial(super().list, request, *args, **kwargs))  # type: ignore
+
+    def retrieve(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        return self.coalesce(request, functools.partial(super().retrieve, request, *args, **kwargs))  # type: ignore
@@ -0,0 +1,59 @@
+import atexit
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.core.cache.backends.base import BaseCache
+
+
+def incr(cache: BaseCache, key: str, delta: int = 1, timeout: Optional[float] = None) -> int:
+    """
+    Increments the counter `key` of `cache`, creating it with `timeout` if it's missing, and returns
+    its new value. Costs one round trip when the counter exists, `incr` is atomic in shared caches.
+    """
+    try:
+        return int(cache.incr(key, delta))
+    except ValueError:
+        # `add` is a no-op when another process created the counter meanwhile
+        if cache.add(key, delta, timeout=timeout):
+            return delta
+        return int(cache.incr(key, delta))
+
+
+def incr_many(cache: BaseCache, counts: Dict[str, int], timeout: Optional[float] = None) -> None:
+    for key, delta in counts.items():
+        if delta:
+            incr(cache, key, delta, timeout)
+
+
+class CounterBuffer:
+    """
+    Counts kept in the memory of a process and handed to `push` at most every `interval_setting`
+    seconds by the `add` that finds them older, and when the process exits.
+    """
+
+    def __init__(self, push: Callable[[Dict[str, int]], None], interval_setting: str) -> None:
+        self.counts: Counter = Counter()
+        self.pushed_at = time.monotonic()
+        self.lock = threading.Lock()
+        self._push = push
+        self.interval_setting = interval_setting
+        atexit.register(self.push)
+
+    def add(self, key: str, count: int = 1) -> None:
+        with self.lock:
+            self.counts[key] += count
+            if time.monotonic() - self.pushed_at < getattr(settings, self.interval_setting):
+                return
+            counts, self.counts = self.counts, Counter()
+            self.pushed_at = time.monotonic()
+        self._push(counts)
+
+    def push(self) -> None:
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+            self.pushed_at = time.monotonic()
+        if counts:
+            self._push(counts)
@@ -0,0 +1,317 @@
+import asyncio
+import json
+import logging
+from collections import deque
+from typing import Any, Callable, Deque, Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple, Union, cast
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from menus.models import Dish, Menu
+from menus.notifications import listen
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'menus_events'
+PATH = '/api/events/'
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Any]
+Send = Callable[[Dict[str, Any]], Any]
+
+
+class EventBatch:
+    """
+    Events of one transaction, sent with a single query once it commits. An object changed
+    several times in the transaction is sent once, in its last state.
+    """
+
+    def __init__(self) -> None:
+        self.events: Dict[Tuple[str, int], Dict[str, Any]] = {}
+
+    def __call__(self) -> None:
+        if connection.vendor != 'postgresql' or not self.events:
+            return
+        through = Menu.dishes.through._meta.db_table
+        columns, params = [], []
+        for event in self.events.values():
+            if event['type'] == 'dish':
+                # the menus of the dish as committed, `null` when there are too many for the 8000 bytes
+                # a notification can carry
+                columns.append(
+                    f"pg_notify(%s, (%s::jsonb || jsonb_build_object('menus', (SELECT CASE WHEN count(*) > %s "
+                    f"THEN NULL ELSE COALESCE(jsonb_agg(menu_id ORDER BY menu_id), '[]') END "
+                    f"FROM {through} WHERE dish_id = %s)))::text)"
+                )
+                params.extend([CHANNEL, json.dumps(event), settings.EVENT_STREAM_MAX_MENUS, event['id']])
+            else:
+                columns.append('pg_notify(%s, %s)')
+                params.extend([CHANNEL, json.dumps(event)])
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT {", ".join(columns)}', params)
+
+
+def get_action(instance: Union[Menu, Dish], deleted: bool) -> Tuple[str, Any]:
+    if deleted or instance.deleted is not None:
+        return 'deleted', instance.deleted or timezone.now()
+    if instance.updated is None:
+        return 'created', instance.created
+    return 'updated', instance.updated
+
+
+def publish(instance: Union[Menu, Dish], deleted: bool = False) -> None:
+    """
+    Sends the change of `instance` to the event stream once the current transaction commits.
+    """
+    if not settings.EVENT_STREAM:
+        return
+    kind = 'menu' if isinstance(instance, Menu) else 'dish'
+    action, version = get_action(instance, deleted)
+    updated = serializers.DateTimeField().to_representation(instance.updated) if instance.updated else None
+    event = {
+        'event_id': f'{kind}-{instance.pk}-{int(version.timestamp() * 10**6)}-{action}',
+        'type': kind,
+        'id': instance.pk,
+        'action': action,
+        'updated': updated,
+    }
+    # join the batch of the current transaction, if it has one already
+    for _, callback in cast(Any, connection).run_on_commit:
+        if isinstance(callback, EventBatch):
+            callback.events[kind, instance.pk] = event
+            return
+    batch = EventBatch()
+    batch.events[kind, instance.pk] = event
+    transaction.on_commit(batch)
+
+
+def publish_dishes_changed(
+    sender: Any, instance: Union[Menu, Dish], action: str, pk_set: Optional[Set[int]], **kwargs: Any
+) -> None:
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    publish(instance)
+    if isinstance(instance, Dish) and pk_set:
+        # menus changed from the dish side, `menu.updated` stays as it was
+        for menu in Menu.objects.filter(pk__in=pk_set):
+            publish(menu)
+
+
+class Event(NamedTuple):
+    id: str
+    type: str
+    object_id: int
+    # `None` when a dish is on too many menus to list them
+    menus: Optional[FrozenSet[int]]
+    data: str
+
+    @classmethod
+    def from_payload(cls, payload: str) -> 'Event':
+        data = json.loads(payload)
+        event_id = data.pop('event_id')
+        menus = data.get('menus', ())
+        return cls(event_id, data['type'], data['id'], None if menus is None else frozenset(menus), json.dumps(data))
+
+    def encode(self) -> bytes:
+        return f'id: {self.id}\nevent: {self.type}\ndata: {self.data}\n\n'.encode()
+
+
+# sent when events may have been missed, clients reload what they show
+RESET = b'event: reset\ndata: {}\n\n'
+HEARTBEAT = b': heartbeat\n\n'
+
+
+class Subscription:
+    def __init__(self, menus: FrozenSet[int], dishes: FrozenSet[int]) -> None:
+        self.menus = menus
+        self.dishes = dishes
+        self.queue: 'asyncio.Queue[bytes]' = asyncio.Queue(maxsize=settings.EVENT_STREAM_CLIENT_BUFFER)
+        # a client that doesn't keep up is disconnected, it resumes from its last event id
+        self.overflowed = False
+
+    def matches(self, event: Event) -> bool:
+        if not self.menus and not self.dishes:
+            return True
+        if event.type == 'menu':
+            return event.object_id in self.menus
+        if event.object_id in self.dishes:
+            return True
+        if event.menus is None:
+            # the dish may be on any of the subscribed menus
+            return bool(self.menus)
+        return not self.menus.isdisjoint(event.menus)
+
+    def put(self, message: bytes) -> None:
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class EventBroker:
+    """
+    Per-process listener of the `menus_events` Postgres notifications, fanned out to the
+    subscribed clients, so a process holds one database connection however many clients it serves.
+
+    The last `EVENT_STREAM_HISTORY` events are kept for clients resuming with `Last-Event-ID`.
+    Postgres delivers notifications to all listeners in commit order, so a client can resume
+    from any process that has been listening long enough.
+    """
+
+    def __init__(self) -> None:
+        self.subscriptions: Set[Subscription] = set()
+        self.history: Deque[Event] = deque(maxlen=settings.EVENT_STREAM_HISTORY)
+        self.task: Optional['asyncio.Future[None]'] = None
+
+    def start(self) -> None:
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(self.run())
+
+    async def run(self) -> None:
+        loop = asyncio.get_event_loop()
+        connected = False
+        while True:
+            try:
+                listener = await loop.run_in_executor(None, listen, CHANNEL)
+            except Exception:  # noqa: B902
+                logger.exception('Event stream listener failed to connect')
+                await asyncio.sleep(settings.EVENT_STREAM_RETRY_DELAY)
+                continue
+            if connected:
+                # notifications sent while reconnecting are lost
+                self.reset()
+            connected = True
+            readable = asyncio.Event()
+            loop.add_reader(listener.fileno(), readable.set)
+            try:
+                while True:
+                    await readable.wait()
+                    readable.clear()
+                    listener.poll()
+                    for notify in listener.notifies:
+                        self.dispatch(notify.payload)
+                    del listener.notifies[:]
+            except Exception:  # noqa: B902
+                logger.exception('Event stream listener failed, reconnecting')
+            finally:
+                loop.remove_reader(listener.fileno())
+                listener.close()
+            await asyncio.sleep(settings.EVENT_STREAM_RETRY_DELAY)
+
+    def dispatch(self, payload: str) -> None:
+        event = Event.from_payload(payload)
+        self.history.append(event)
+        message = event.encode()
+        for subscription in self.subscriptions:
+            if subscription.matches(event):
+                subscription.put(message)
+
+    def reset(self) -> None:
+        self.history.clear()
+        for subscription in self.subscriptions:
+            subscription.put(RESET)
+
+    def subscribe(self, subscription: Subscription, last_event_id: Optional[str]) -> None:
+        self.start()
+        self.subscriptions.add(subscription)
+        if not last_event_id:
+            return
+        missed: List[Event] = []
+        for event in reversed(self.history):
+            if event.id == last_event_id:
+                break
+            missed.append(event)
+        else:
+            subscription.put(RESET)
+            return
+        for event in reversed(missed):
+            if subscription.matches(event):
+                subscription.put(event.encode())
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self.subscriptions.discard(subscription)
+
+
+broker = EventBroker()
+
+
+def parse_ids(values: List[str]) -> FrozenSet[int]:
+    return frozenset(int(pk) for value in values for pk in value.split(',') if pk.strip().isdigit())
+
+
+class EventStreamApplication:
+    """
+    Serves the server-sent events stream at `PATH` next to the Django `application`,
+    which can't stream responses asynchronously.
+    """
+
+    def __init__(self, application: Callable) -> None:
+        self.application = application
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] == 'http' and scope['path'] == PATH and settings.EVENT_STREAM:
+            await self.stream(scope, receive, send)
+        else:
+            await self.application(scope, receive, send)
+
+    async def stream(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['method'] != 'GET':
+            await send({'type': 'http.response.start', 'status': 405, 'headers': [(b'allow', b'GET')]})
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        query = parse_qs(scope['query_string'].decode('latin-1'))
+        headers = dict(scope['headers'])
+        # `lastEventId` is sent by EventSource polyfills that can't set headers
+        last_event_id = headers.get(b'last-event-id', b'').decode('latin-1') or query.get('lastEventId', [''])[0]
+        subscription = Subscription(parse_ids(query.get('menus', [])), parse_ids(query.get('dishes', [])))
+
+        await send(
+            {
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [
+                    (b'content-type', b'text/event-stream; charset=utf-8'),
+                    (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no'),
+                ],
+            }
+        )
+        await send(
+            {
+                'type': 'http.response.body',
+                'body': f'retry: {settings.EVENT_STREAM_RETRY}\n\n'.encode(),
+                'more_body': True,
+            }
+        )
+        broker.subscribe(subscription, last_event_id)
+        disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+        try:
+            while not disconnected.done() and not subscription.overflowed:
+                message = asyncio.ensure_future(subscription.queue.get())
+                waiting: Set['asyncio.Future[Any]'] = {message, disconnected}
+                done, _ = await asyncio.wait(
+                    waiting,
+                    timeout=settings.EVENT_STREAM_HEARTBEAT,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if message in done:
+                    body = message.result()
+                elif disconnected in done:
+                    message.cancel()
+                    break
+                else:
+                    message.cancel()
+                    body = HEARTBEAT
+                await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+            if not disconnected.done():
+                await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            broker.unsubscribe(subscription)
+            disconnected.cancel()
+
+
+async def wait_for_disconnect(receive: Receive) -> None:
+    while (await receive())['type'] != 'http.disconnect':
+        pass
@@ -0,0 +1,87 @@
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union, cast
+
+from django.conf import settings
+from django.db import models
+from django.db.models import Count, Q
+from menus.serializers import DishSerializer
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+
+Bucket = Tuple[Optional[Any], Optional[Any]]
+
+
+def get_buckets(boundaries: Sequence[Any]) -> List[Bucket]:
+    """
+    Splits the value range at `boundaries` into `[min, max)` buckets, open on both ends.
+    """
+    edges = [None, *sorted(boundaries), None]
+    return list(zip(edges, edges[1:]))
+
+
+def bucket_filter(field: str, bucket: Bucket) -> Q:
+    lower, upper = bucket
+    q = Q()
+    if lower is not None:
+        q &= Q(**{f'{field}__gte': lower})
+    if upper is not None:
+        q &= Q(**{f'{field}__lt': upper})
+    return q
+
+
+def count_facets(queryset: models.QuerySet) -> Tuple[int, Dict[str, Any]]:
+    """
+    Counts the dishes of `queryset` per vegetarian flag and per bucket of `DISH_FACET_BUCKETS`.
+
+    Every count is a `COUNT(*) FILTER (WHERE ...)` aggregate, so the total and all the facets
+    are computed in a single pass over the filtered dishes.
+    """
+    boundaries = cast(Dict[str, Sequence[Any]], settings.DISH_FACET_BUCKETS)
+    buckets = {field: get_buckets(field_boundaries) for field, field_boundaries in boundaries.items()}
+    aggregates = {
+        'total': Count('pk'),
+        'vegetarian': Count('pk', filter=Q(is_vegetarian=True)),
+        'non_vegetarian': Count('pk', filter=Q(is_vegetarian=False)),
+    }
+    for field, field_buckets in buckets.items():
+        for index, bucket in enumerate(field_buckets):
+            aggregates[f'{field}_{index}'] = Count('pk', filter=bucket_filter(field, bucket))
+
+    counts = queryset.order_by().aggregate(**aggregates)
+
+    # boundaries are rendered the same way as the values of the dishes
+    fields = DishSerializer().fields
+    facets: Dict[str, Any] = {
+        'is_vegetarian': OrderedDict([('true', counts['vegetarian']), ('false', counts['non_vegetarian'])]),
+    }
+    for field, field_buckets in buckets.items():
+        facets[field] = [
+            OrderedDict(
+                [
+                    ('min', None if lower is None else fields[field].to_representation(lower)),
+                    ('max', None if upper is None else fields[field].to_representation(upper)),
+                    ('count', counts[f'{field}_{index}']),
+                ]
+            )
+            for index, (lower, upper) in enumerate(field_buckets)
+        ]
+    return counts['total'], facets
+
+
+class FacetedPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination adding facet counts of the whole filtered queryset to the page.
+    The total count comes from the facet query, so a page costs two queries.
+    """
+
+    default_limit = settings.DISH_SEARCH_PAGE_SIZE
+    max_limit = settings.DISH_SEARCH_MAX_PAGE_SIZE
+
+    def get_count(self, queryset: Union[models.QuerySet, Sequence[Any]]) -> int:
+        count, self.facets = count_facets(cast(models.QuerySet, queryset))
+        return count
+
+    def get_paginated_response(self, data: Any) -> Response:
+        response = super().get_paginated_response(data)
+        response.data['facets'] = self.facets
+        return response
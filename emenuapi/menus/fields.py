@@ -0,0 +1,64 @@
+from typing import Any, Dict, List, Optional, cast
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import models
+from rest_framework.exceptions import ErrorDetail, ValidationError
+from rest_framework.fields import Field
+from rest_framework.relations import MANY_RELATION_KWARGS, ManyRelatedField, PrimaryKeyRelatedField
+
+
+class BulkManyRelatedField(ManyRelatedField):
+    def to_internal_value(self, data: Any) -> List[models.Model]:
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        return cast(BulkPrimaryKeyRelatedField, self.child_relation).to_internal_value_many(data)
+
+
+class BulkPrimaryKeyRelatedField(PrimaryKeyRelatedField):
+    """
+    Primary key related field which, used with `many=True`, resolves all submitted
+    primary keys with a single `pk__in` query instead of one query per item.
+    """
+
+    @classmethod
+    def many_init(cls, *args: Any, **kwargs: Any) -> BulkManyRelatedField:
+        list_kwargs: Dict[str, Any] = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+    def to_internal_value_many(self, data: List[Any]) -> List[models.Model]:
+        queryset = self.get_queryset()
+        pk_model_field = queryset.model._meta.pk
+        pk_field = cast(Optional[Field], self.pk_field)
+        errors: Dict[int, ErrorDetail] = {}
+        values: Dict[int, Any] = {}
+        pks: Dict[int, Any] = {}
+
+        for index, item in enumerate(data):
+            value = pk_field.to_internal_value(item) if pk_field is not None else item
+            values[index] = value
+            try:
+                if isinstance(value, bool):
+                    raise TypeError
+                pks[index] = pk_model_field.to_python(value)
+            except (TypeError, ValueError, DjangoValidationError):
+                errors[index] = self._error('incorrect_type', data_type=type(value).__name__)
+
+        objects = queryset.in_bulk(set(pks.values())) if pks else {}
+
+        for index, pk in pks.items():
+            if pk not in objects:
+                errors[index] = self._error('does_not_exist', pk_value=values[index])
+
+        if errors:
+            raise ValidationError([errors[index] for index in sorted(errors)])
+
+        return [objects[pk] for pk in pks.values()]
+
+    def _error(self, key: str, **kwargs: Any) -> ErrorDetail:
+        return ErrorDetail(self.error_messages[key].format(**kwargs), code=key)
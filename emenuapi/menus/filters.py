@@ -1,6 +1,53 @@
+from typing import Any, List, Sequence
+
+from django.db import models
+from django.db.models import Q
 from django_filters import rest_framework as filters
+from menus.models import Dish
+from rest_framework.filters import OrderingFilter
+from rest_framework.request import Request
+
+POPULARITY = 'popularity'
 
 
 class MenuFilter(filters.FilterSet):
     created = filters.IsoDateTimeFromToRangeFilter()
     updated = filters.IsoDateTimeFromToRangeFilter()
+
+
+class DishSearchFilter(filters.FilterSet):
+    search = filters.CharFilter(method='filter_search', help_text='Filter results by name or description')
+    is_vegetarian = filters.BooleanFilter()
+    price = filters.RangeFilter()
+    time_to_prepare = filters.RangeFilter()
+
+    class Meta:
+        model = Dish
+        fields = ('search', 'is_vegetarian', 'price', 'time_to_prepare')
+
+    def filter_search(self, queryset: models.QuerySet[Dish], name: str, value: str) -> models.QuerySet[Dish]:
+        for term in value.split():
+            queryset = queryset.filter(Q(name__icontains=term) | Q(description__icontains=term))
+        return queryset
+
+
+class PopularityOrderingFilter(OrderingFilter):
+    """
+    `OrderingFilter` with `popularity`, the most viewed objects first, see `menus.popularity`.
+    """
+
+    def get_ordering(self, request: Request, queryset: models.QuerySet, view: Any) -> Sequence[str]:
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+
+        result: List[str] = []
+        for term in ordering:
+            if term.lstrip('-') != POPULARITY:
+                result.append(term)
+            elif term.startswith('-'):
+                result.extend(['views', 'id'])
+            else:
+                # ties are broken like `*_popularity_idx` is ordered
+                result.extend(['-views', '-id'])
+        return result
@@ -0,0 +1,129 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple, cast
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.db import models
+from menus.counters import CounterBuffer, incr_many
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+# bump when the representation of the cached serializers changes
+FRAGMENT_VERSION = 1
+
+HITS_KEY = 'fragments:hits'
+MISSES_KEY = 'fragments:misses'
+
+
+def get_cache() -> BaseCache:
+    return caches[settings.FRAGMENT_CACHE]
+
+
+def fragment_key(instance: models.Model) -> str:
+    modified = getattr(instance, 'updated', None) or getattr(instance, 'created')
+    return f'fragment:{FRAGMENT_VERSION}:{instance._meta.label_lower}:{instance.pk}:{modified.timestamp()}'
+
+
+def get_fragments(instances: List[models.Model], serializer: serializers.Serializer) -> List[Dict[str, Any]]:
+    """
+    Returns representations of `instances` from cached fragments, serializing only the misses.
+
+    Fragments are keyed by the primary key and the last modification time of an instance, so
+    a changed instance gets a new key and stale fragments simply expire. Instances may be
+    loaded with only the key fields; misses with deferred fields are reloaded in one query.
+    Fragments are serialized without the request, URLs are made absolute when assembled.
+    """
+    if not instances:
+        return []
+
+    cache = get_cache()
+    keys = [fragment_key(instance) for instance in instances]
+    fragments = cache.get_many(keys)
+
+    misses = [instance for instance, key in zip(instances, keys) if key not in fragments]
+    if misses:
+        loaded = _load(misses, serializer)
+        context = {key: value for key, value in serializer.context.items() if key != 'request'}
+        fragment_serializer = serializer.__class__(context=context)
+        new_fragments = {
+            fragment_key(instance): dict(fragment_serializer.to_representation(loaded.get(instance.pk, instance)))
+            for instance in misses
+        }
+        cache.set_many(new_fragments, timeout=settings.FRAGMENT_CACHE_TIMEOUT)
+        fragments.update(new_fragments)
+
+    record(hits=len(instances) - len(misses), misses=len(misses))
+
+    request = cast(Optional[Request], serializer.context.get('request'))
+    url_fields = _url_fields(serializer) if request is not None else []
+    representations = []
+    for key in keys:
+        representation = dict(fragments[key])
+        for field in url_fields:
+            if representation.get(field):
+                representation[field] = cast(Request, request).build_absolute_uri(representation[field])
+        representations.append(representation)
+    return representations
+
+
+def _load(instances: List[models.Model], serializer: serializers.Serializer) -> Dict[Any, models.Model]:
+    sources = {field.source for field in serializer.fields.values()}
+    deferred = [instance.pk for instance in instances if instance.get_deferred_fields() & sources]
+    if not deferred:
+        return {}
+    return instances[0].__class__._default_manager.in_bulk(deferred)
+
+
+def _url_fields(serializer: serializers.Serializer) -> List[str]:
+    return [
+        name
+        for name, field in serializer.fields.items()
+        if isinstance(field, serializers.FileField) and getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL)
+    ]
+
+
+def get_stats_cache() -> BaseCache:
+    return caches[settings.FRAGMENT_CACHE_STATS_CACHE]
+
+
+def push_stats(counts: Dict[str, int]) -> None:
+    incr_many(get_stats_cache(), counts)
+
+
+# counted in each process, pushed to the stats cache every `FRAGMENT_CACHE_STATS_PUSH_INTERVAL` seconds
+stats = CounterBuffer(push_stats, 'FRAGMENT_CACHE_STATS_PUSH_INTERVAL')
+
+
+def record(hits: int, misses: int) -> None:
+    stats.add(HITS_KEY, hits)
+    stats.add(MISSES_KEY, misses)
+
+
+def get_stats() -> Tuple[int, int, float]:
+    # including the counts of this process not pushed yet
+    stats.push()
+    counts = get_stats_cache().get_many([HITS_KEY, MISSES_KEY])
+    hits, misses = counts.get(HITS_KEY, 0), counts.get(MISSES_KEY, 0)
+    total = hits + misses
+    return hits, misses, hits / total if total else 0.0
+
+
+def reset_stats() -> None:
+    stats.push()
+    get_stats_cache().delete_many([HITS_KEY, MISSES_KEY])
+
+
+class FragmentCacheListSerializer(serializers.ListSerializer):
+    """
+    Serializes many instances from the fragment cache, see `get_fragments`.
+
+    `load_fields` are the only columns needed to look fragments up, querysets of this
+    serializer are planned with them.
+    """
+
+    load_fields = ('pk', 'created', 'updated')
+
+    def to_representation(self, data: Iterable[models.Model]) -> List[Dict[str, Any]]:
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        return get_fragments(list(iterable), cast(serializers.Serializer, self.child))
@@ -0,0 +1,33 @@
+import random
+from typing import List
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from menus.factories import DishFactory, MenuFactory
+from menus.models import Dish, Menu
+
+
+def ensure_user(username: str, password: str) -> User:
+    user, _ = User.objects.get_or_create(username=username, defaults={'is_active': True})
+    user.set_password(password)
+    user.save(update_fields=['password'])
+    return user
+
+
+@transaction.atomic()
+def seed_data(menus: int, dishes_per_menu: int, seed: int = 0) -> List[Menu]:
+    rng = random.Random(seed)
+    dishes = Dish.objects.bulk_create(DishFactory.build_batch(max(menus * dishes_per_menu // 2, dishes_per_menu)))
+    created: List[Menu] = Menu.objects.bulk_create(MenuFactory.build_batch(menus))
+
+    through = Menu.dishes.through
+    through.objects.bulk_create(
+        [
+            through(menu_id=menu.pk, dish_id=dish.pk)
+            for menu in created
+            # every tenth menu stays empty, i.e. hidden from anonymous users
+            if menu.pk % 10
+            for dish in rng.sample(dishes, k=min(dishes_per_menu, len(dishes)))
+        ]
+    )
+    return created
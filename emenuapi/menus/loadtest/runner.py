@@ -0,0 +1,178 @@
+import json
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import requests
+from menus.loadtest.scenarios import Scenario
+
+REQUEST_TIMEOUT = 30
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass
+class LoadTestConfig:
+    base_url: str
+    concurrency: int = 10
+    duration: float = 30
+    max_requests: Optional[int] = None
+    seed: int = 0
+    username: str = ''
+    password: str = ''
+
+
+@dataclass
+class LoadTestContext:
+    username: str
+    password: str
+    token: str = ''
+    menu_ids: List[int] = field(default_factory=list)
+    search_terms: List[str] = field(default_factory=list)
+
+
+class Recorder:
+    def __init__(self, max_requests: Optional[int] = None) -> None:
+        self.max_requests = max_requests
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, latency: float, ok: bool) -> None:
+        with self._lock:
+            self.count += 1
+            self.latencies[endpoint].append(latency)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    @property
+    def exhausted(self) -> bool:
+        return self.max_requests is not None and self.count >= self.max_requests
+
+
+class LoadTestClient:
+    def __init__(self, base_url: str, recorder: Recorder, context: LoadTestContext) -> None:
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.context = context
+        self.session = requests.Session()
+
+    def request(
+        self, method: str, path: str, endpoint: str, authenticated: bool = False, **kwargs: Any
+    ) -> Optional[requests.Response]:
+        headers = {'Authorization': f'Token {self.context.token}'} if authenticated else {}
+        start = time.perf_counter()
+        try:
+            response = self.session.request(
+                method, f'{self.base_url}{path}', headers=headers, timeout=REQUEST_TIMEOUT, **kwargs
+            )
+        except requests.RequestException:
+            self.recorder.record(endpoint, time.perf_counter() - start, ok=False)
+            return None
+
+        self.recorder.record(endpoint, time.perf_counter() - start, ok=response.status_code < 400)
+        return response
+
+
+def percentile(values: Sequence[float], percent: float) -> float:
+    # nearest-rank percentile of already sorted values
+    if not values:
+        return 0.0
+    rank = max(math.ceil(percent / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def prepare_context(config: LoadTestConfig) -> LoadTestContext:
+    context = LoadTestContext(username=config.username, password=config.password)
+    session = requests.Session()
+    base_url = config.base_url.rstrip('/')
+
+    response = session.post(
+        f'{base_url}/api/auth/',
+        data={'username': config.username, 'password': config.password},
+        timeout=REQUEST_TIMEOUT,
+    )
+    response.raise_for_status()
+    context.token = response.json()['token']
+
+    response = session.get(f'{base_url}/api/menus/', timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    menus = response.json()
+    context.menu_ids = [menu['id'] for menu in menus]
+    context.search_terms = sorted({menu['name'][:3] for menu in menus})
+
+    return context
+
+
+def run_load_test(config: LoadTestConfig, scenarios: Sequence[Scenario]) -> Dict[str, Any]:
+    context = prepare_context(config)
+    recorder = Recorder(config.max_requests)
+    weights = [scenario.weight for scenario in scenarios]
+
+    start = time.perf_counter()
+    deadline = start + config.duration
+
+    def worker(index: int) -> None:
+        rng = random.Random(config.seed + index)
+        client = LoadTestClient(config.base_url, recorder, context)
+        while time.perf_counter() < deadline and not recorder.exhausted:
+            scenario = rng.choices(scenarios, weights=weights)[0]
+            scenario.run(client, rng)
+
+    with ThreadPoolExecutor(max_workers=config.concurrency) as executor:
+        for future in [executor.submit(worker, index) for index in range(config.concurrency)]:
+            future.result()
+
+    return build_report(config, recorder, time.perf_counter() - start)
+
+
+def build_report(config: LoadTestConfig, recorder: Recorder, elapsed: float) -> Dict[str, Any]:
+    endpoints = {}
+    for endpoint, latencies in sorted(recorder.latencies.items()):
+        endpoints[endpoint] = _summarize(sorted(latencies), recorder.errors[endpoint], elapsed)
+
+    all_latencies = sorted(latency for latencies in recorder.latencies.values() for latency in latencies)
+    return {
+        'config': {
+            'concurrency': config.concurrency,
+            'duration': config.duration,
+            'max_requests': config.max_requests,
+            'seed': config.seed,
+        },
+        'elapsed': round(elapsed, 3),
+        'endpoints': endpoints,
+        'total': _summarize(all_latencies, sum(recorder.errors.values()), elapsed),
+    }
+
+
+def _summarize(latencies: Sequence[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    summary = {
+        'requests': len(latencies),
+        'errors': errors,
+        'error_rate': round(errors / len(latencies), 4) if latencies else 0.0,
+        'throughput': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+    }
+    for percent in PERCENTILES:
+        summary[f'p{percent}_ms'] = round(percentile(latencies, percent) * 1000, 1)
+    return summary
+
+
+def dump_report(report: Dict[str, Any]) -> str:
+    # stable key order and rounding keep reports from different commits diffable
+    return json.dumps(report, indent=2, sort_keys=True) + '\n'
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    header = f"{'endpoint':<40} {'requests':>9} {'errors':>7} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    rows = [header, '-' * len(header)]
+    for endpoint, summary in [*report['endpoints'].items(), ('TOTAL', report['total'])]:
+        rows.append(
+            f"{endpoint:<40} {summary['requests']:>9} {summary['errors']:>7} {summary['throughput']:>8} "
+            f"{summary['p50_ms']:>8} {summary['p95_ms']:>8} {summary['p99_ms']:>8}"
+        )
+    return '\n'.join(rows)
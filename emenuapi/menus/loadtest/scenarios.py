@@ -0,0 +1,117 @@
+import datetime
+import io
+import random
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Dict, NamedTuple, Optional, Tuple
+
+from PIL import Image
+
+if TYPE_CHECKING:  # pragma: no cover
+    from menus.loadtest.runner import LoadTestClient
+
+ORDERINGS = ('name', '-name', 'num_dishes', '-num_dishes')
+
+
+class Scenario(NamedTuple):
+    name: str
+    weight: int
+    run: Callable[["LoadTestClient", random.Random], None]
+
+
+def browse_menus(client: "LoadTestClient", rng: random.Random) -> None:
+    params: Dict[str, str] = {}
+    if client.context.search_terms and rng.random() < 0.3:
+        params['search'] = rng.choice(client.context.search_terms)
+    if rng.random() < 0.5:
+        params['ordering'] = rng.choice(ORDERINGS)
+    if rng.random() < 0.3:
+        after, before = _date_range(rng)
+        params['created_after'], params['created_before'] = after, before
+    if rng.random() < 0.1:
+        after, before = _date_range(rng)
+        params['updated_after'], params['updated_before'] = after, before
+
+    client.request('GET', '/api/menus/', 'GET /api/menus/', params=params)
+
+
+def retrieve_menu(client: "LoadTestClient", rng: random.Random) -> None:
+    if not client.context.menu_ids:
+        return browse_menus(client, rng)
+
+    menu_id = rng.choice(client.context.menu_ids)
+    client.request('GET', f'/api/menus/{menu_id}/', 'GET /api/menus/{id}/')
+
+
+def dish_crud(client: "LoadTestClient", rng: random.Random) -> None:
+    dish_id = _create_dish(client, rng)
+    if dish_id is None:
+        return
+
+    client.request('GET', f'/api/dishes/{dish_id}/', 'GET /api/dishes/{id}/', authenticated=True)
+    client.request('GET', '/api/dishes/', 'GET /api/dishes/', authenticated=True)
+    client.request('PUT', f'/api/dishes/{dish_id}/', 'PUT /api/dishes/{id}/', authenticated=True, data=_dish_data(rng))
+    client.request('DELETE', f'/api/dishes/{dish_id}/', 'DELETE /api/dishes/{id}/', authenticated=True)
+
+
+def upload_photo(client: "LoadTestClient", rng: random.Random) -> None:
+    dish_id = _create_dish(client, rng)
+    if dish_id is None:
+        return
+
+    client.request(
+        'POST',
+        f'/api/dishes/{dish_id}/photo/',
+        'POST /api/dishes/{id}/photo/',
+        authenticated=True,
+        files={'file': ('photo.png', _photo(), 'image/png')},
+    )
+    client.request('DELETE', f'/api/dishes/{dish_id}/', 'DELETE /api/dishes/{id}/', authenticated=True)
+
+
+def obtain_token(client: "LoadTestClient", rng: random.Random) -> None:
+    client.request(
+        'POST',
+        '/api/auth/',
+        'POST /api/auth/',
+        data={'username': client.context.username, 'password': client.context.password},
+    )
+
+
+def _create_dish(client: "LoadTestClient", rng: random.Random) -> Optional[int]:
+    response = client.request('POST', '/api/dishes/', 'POST /api/dishes/', authenticated=True, data=_dish_data(rng))
+    if response is None or response.status_code != 201:
+        return None
+    return int(response.json()['id'])
+
+
+def _dish_data(rng: random.Random) -> Dict[str, object]:
+    return {
+        'name': f'Load test dish {rng.randrange(10 ** 6)}',
+        'description': 'Created by the load test',
+        'price': f'{rng.uniform(1, 100):.2f}',
+        'time_to_prepare': rng.randint(5, 120),
+        'is_vegetarian': rng.choice((True, False)),
+    }
+
+
+def _date_range(rng: random.Random) -> Tuple[str, str]:
+    after = datetime.datetime(2021, 1, 1) + datetime.timedelta(days=rng.randrange(365 * 5))
+    before = after + datetime.timedelta(days=rng.choice((1, 7, 30, 365)))
+    return after.isoformat(), before.isoformat()
+
+
+@lru_cache(maxsize=None)
+def _photo() -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), color=(200, 80, 40)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+# Roughly 90% of the traffic are anonymous menu reads, the rest is authenticated dish management.
+DEFAULT_SCENARIOS = (
+    Scenario('browse_menus', 60, browse_menus),
+    Scenario('retrieve_menu', 30, retrieve_menu),
+    Scenario('dish_crud', 5, dish_crud),
+    Scenario('upload_photo', 2, upload_photo),
+    Scenario('obtain_token', 3, obtain_token),
+)
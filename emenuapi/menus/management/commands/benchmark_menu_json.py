@@ -0,0 +1,64 @@
+import statistics
+import time
+from typing import Any, List
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from menus.factories import DishFactory
+from menus.models import Dish, Menu
+from rest_framework.test import APIClient
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares menu detail responses rendered by the serializers and built by Postgres for menus with given '
+        'numbers of dishes. The data is created in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--dishes', type=int, nargs='+', default=[10, 100, 1000], help='Numbers of dishes')
+        parser.add_argument('--runs', type=int, default=10, help='Runs per case')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        for dishes in options['dishes']:
+            with transaction.atomic():
+                menu = self.seed(dishes)
+                url = reverse('menus:menu-detail', kwargs=dict(menu_id=menu.pk))
+                for database_json in (False, True):
+                    with override_settings(
+                        MENU_JSON_FROM_DATABASE=database_json,
+                        CATALOG_SNAPSHOT=False,
+                        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                    ):
+                        self.benchmark(url, dishes, database_json, options['runs'])
+                transaction.set_rollback(True)
+
+    def benchmark(self, url: str, dishes: int, database_json: bool, runs: int) -> None:
+        client = APIClient()
+        timings: List[float] = []
+        for _ in range(runs):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.status_code
+
+        # the first run fills the fragment cache of the serializers
+        self.stdout.write(
+            f'dishes={dishes:<6} mode={"database" if database_json else "serializer":<10} '
+            f'bytes={len(response.content):<9} '
+            f'queries={len(queries):<3} '
+            f'first={timings[0]:.1f}ms '
+            f'median={statistics.median(timings):.1f}ms '
+            f'min={min(timings):.1f}ms '
+            f'max={max(timings):.1f}ms'
+        )
+
+    def seed(self, dishes: int) -> Menu:
+        menu: Menu = Menu.objects.create(name='Benchmark menu', description='Benchmark menu')
+        created = Dish.objects.bulk_create(DishFactory.build_batch(dishes, image='menus/dish/photo.png'))
+        menu.set_dishes(created, is_new=True)
+        return menu
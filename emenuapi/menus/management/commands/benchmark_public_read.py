@@ -0,0 +1,71 @@
+import statistics
+import time
+from typing import Any, Dict, List
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+from django.test.utils import override_settings
+from django.urls import reverse
+from menus.factories import DishFactory
+from menus.models import Dish, Menu
+from rest_framework.test import APIClient
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares anonymous menu list and detail requests handled by the full middleware and DRF stack and by '
+        'the public read handler. The data is created in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--dishes', type=int, default=10, help='Number of dishes of the menu')
+        parser.add_argument('--runs', type=int, default=200, help='Runs per case')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        with transaction.atomic(), override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            # throttling would stop the runs
+            REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}},
+        ):
+            menu = self.seed(options['dishes'])
+            # a client loads the middleware of the settings it was first used with
+            clients = {}
+            for public_read in (False, True):
+                with override_settings(PUBLIC_READ=public_read):
+                    clients[public_read] = APIClient()
+                    clients[public_read].get('/')
+
+            urls = {
+                'list': reverse('menus:menu-list'),
+                'detail': reverse('menus:menu-detail', kwargs=dict(menu_id=menu.pk)),
+            }
+            for name, url in urls.items():
+                self.benchmark(name, url, clients, options['runs'])
+            transaction.set_rollback(True)
+
+    def benchmark(self, name: str, url: str, clients: Dict[bool, APIClient], runs: int) -> None:
+        timings: Dict[bool, List[float]] = {False: [], True: []}
+        # the modes take turns, so both see the same state of the database and caches
+        for _ in range(runs):
+            for public_read, client in clients.items():
+                start = time.perf_counter()
+                response = client.get(url)
+                timings[public_read].append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200, response.status_code
+
+        for public_read, values in timings.items():
+            self.stdout.write(
+                f'endpoint={name:<7} mode={"public" if public_read else "full":<7} '
+                f'median={statistics.median(values):.3f}ms '
+                f'min={min(values):.3f}ms '
+                f'max={max(values):.3f}ms'
+            )
+        saved = statistics.median(timings[False]) - statistics.median(timings[True])
+        self.stdout.write(f'endpoint={name:<7} saved={saved:.3f}ms per request')
+
+    def seed(self, dishes: int) -> Menu:
+        menu: Menu = Menu.objects.create(name='Benchmark menu', description='Benchmark menu')
+        created = Dish.objects.bulk_create(DishFactory.build_batch(dishes, image='menus/dish/photo.png'))
+        menu.set_dishes(created, is_new=True)
+        return menu
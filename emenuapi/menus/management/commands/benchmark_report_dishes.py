@@ -0,0 +1,73 @@
+import datetime
+import statistics
+import time
+import tracemalloc
+from typing import Any, List
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from menus.factories import DishFactory
+from menus.models import Dish
+from menus.tasks import report_dishes
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures `report_dishes` for given numbers of recipients and reported dishes against the locmem email '
+        'backend. The data is created in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--recipients', type=int, nargs='+', default=[10, 100, 1000], help='Numbers of recipients')
+        parser.add_argument('--dishes', type=int, nargs='+', default=[10, 100], help='Numbers of reported dishes')
+        parser.add_argument('--runs', type=int, default=3, help='Runs per case')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        with override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend', FROM_EMAIL='benchmark@example.com'
+        ):
+            for recipients in options['recipients']:
+                for dishes in options['dishes']:
+                    self.benchmark(recipients, dishes, options['runs'])
+
+    def benchmark(self, recipients: int, dishes: int, runs: int) -> None:
+        with transaction.atomic():
+            self.seed(recipients, dishes)
+
+            timings: List[float] = []
+            for _ in range(runs):
+                mail.outbox = []
+                tracemalloc.start()
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    # `apply` runs the task in process, with the task signals
+                    report_dishes.apply()
+                    timings.append((time.perf_counter() - start) * 1000)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+            self.stdout.write(
+                f'recipients={recipients:<6} dishes={dishes:<6} emails={len(mail.outbox):<6} '
+                f'queries={len(queries):<3} '
+                f'mean={statistics.mean(timings):.1f}ms '
+                f'min={min(timings):.1f}ms '
+                f'max={max(timings):.1f}ms '
+                f'peak_memory={peak / 2**20:.1f}MiB'
+            )
+            transaction.set_rollback(True)
+
+    def seed(self, recipients: int, dishes: int) -> None:
+        User.objects.bulk_create(
+            [
+                User(username=f'benchmark-{index}', email=f'benchmark-{index}@example.com', is_active=True)
+                for index in range(recipients)
+            ]
+        )
+        created = Dish.objects.bulk_create(DishFactory.build_batch(dishes))
+        # `created` is set on insert, the report covers yesterday
+        yesterday = timezone.now() - datetime.timedelta(days=1)
+        Dish.objects.filter(pk__in=[dish.pk for dish in created]).update(created=yesterday)
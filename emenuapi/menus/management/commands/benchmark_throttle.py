@@ -0,0 +1,45 @@
+import statistics
+import time
+from typing import Any, Dict, List
+
+from django.core.management.base import BaseCommand, CommandParser
+from menus.throttling import MenuReadThrottle
+from menus.views import MenuModelViewSet
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+
+class Command(BaseCommand):
+    help = 'Measures the overhead of the menu read throttle check against the configured cache'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--checks', type=int, default=10000, help='Number of throttle checks per request type')
+        parser.add_argument('--clients', type=int, default=1000, help='Number of distinct client IPs')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        factory = APIRequestFactory()
+        view = MenuModelViewSet(action='list')
+        cases: Dict[str, Dict[str, str]] = {'plain': {}, 'expensive': {'ordering': '-num_dishes'}}
+        for label, params in cases.items():
+            timings = self.measure(factory, view, params, options['checks'], options['clients'])
+            self.stdout.write(
+                f'{label:<10} checks={len(timings)} '
+                f'mean={statistics.mean(timings):.1f}us '
+                f'p50={statistics.median(timings):.1f}us '
+                f'p99={statistics.quantiles(timings, n=100)[98]:.1f}us'
+            )
+
+    def measure(
+        self, factory: APIRequestFactory, view: MenuModelViewSet, params: Dict[str, str], checks: int, clients: int
+    ) -> List[float]:
+        requests = [
+            Request(factory.get('/api/menus/', params, REMOTE_ADDR=f'10.0.{index // 256 % 256}.{index % 256}'))
+            for index in range(clients)
+        ]
+        timings = []
+        for index in range(checks):
+            request = requests[index % clients]
+            start = time.perf_counter()
+            MenuReadThrottle().allow_request(request, view)
+            timings.append((time.perf_counter() - start) * 10**6)
+        return timings
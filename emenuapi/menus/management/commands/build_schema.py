@@ -0,0 +1,34 @@
+import difflib
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from menus.schema import generate_schema
+
+
+class Command(BaseCommand):
+    help = 'Generates the OpenAPI schema served by the API or checks that the committed one is up to date'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--check', action='store_true', help='Fail when the schema file differs from the code')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        schema = generate_schema()
+        path = settings.SCHEMA_FILE
+
+        if not options['check']:
+            path.write_bytes(schema)
+            self.stdout.write(f'Schema written to {path}')
+            return
+
+        current = path.read_bytes() if path.exists() else b''
+        if current != schema:
+            diff = difflib.unified_diff(
+                current.decode().splitlines(keepends=True),
+                schema.decode().splitlines(keepends=True),
+                fromfile=str(path),
+                tofile='generated',
+            )
+            raise CommandError(f"Schema is out of date, run `manage.py build_schema`:\n{''.join(diff)}")
+
+        self.stdout.write('Schema is up to date')
@@ -0,0 +1,90 @@
+import os
+import subprocess  # nosec
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+
+class Target(NamedTuple):
+    settings_module: str
+    code: str
+
+
+TARGETS = {
+    # URLconf is loaded too, as every worker does on its first request
+    'wsgi': Target(
+        'emenuapi.settings.prod',
+        'import emenuapi.wsgi; from django.urls import get_resolver; get_resolver().url_patterns',
+    ),
+    'asgi': Target(
+        'emenuapi.settings.prod',
+        'import emenuapi.asgi; from django.urls import get_resolver; get_resolver().url_patterns',
+    ),
+    'worker': Target(
+        'emenuapi.settings.worker',
+        'from emenuapi.celery import app; import django; django.setup(); app.loader.import_default_modules()',
+    ),
+}
+
+PRINT_RSS = '; import resource; print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)'
+
+
+class Command(BaseCommand):
+    help = 'Measures import time and RSS of the API and worker processes and fails when they are over budget'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--target', action='append', choices=list(TARGETS), help='Process to measure')
+        parser.add_argument('--import-budget', type=float, default=1500, help='Max import time in milliseconds')
+        parser.add_argument('--rss-budget', type=float, default=100, help='Max resident set size in megabytes')
+        parser.add_argument('--repeat', type=int, default=3, help='Number of runs, the best one is reported')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        failures = []
+        for name in options['target'] or list(TARGETS):
+            runs = [measure(TARGETS[name]) for _ in range(options['repeat'])]
+            import_ms = min(run['import_ms'] for run in runs)
+            rss_mb = min(run['rss_mb'] for run in runs)
+            self.stdout.write(f'{name:<8} import={import_ms:.0f}ms rss={rss_mb:.1f}MB')
+
+            if import_ms > options['import_budget']:
+                failures.append(f"{name} import time {import_ms:.0f}ms exceeds {options['import_budget']:.0f}ms")
+            if rss_mb > options['rss_budget']:
+                failures.append(f"{name} RSS {rss_mb:.1f}MB exceeds {options['rss_budget']:.1f}MB")
+
+        if failures:
+            raise CommandError('\n'.join(failures))
+
+
+def measure(target: Target) -> Dict[str, float]:
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': target.settings_module}
+    result = subprocess.run(  # nosec
+        [sys.executable, '-X', 'importtime', '-c', target.code + PRINT_RSS],
+        cwd=Path(settings.BASE_DIR),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode:
+        raise CommandError(result.stderr)
+
+    return {
+        'import_ms': total_import_time(result.stderr.splitlines()) / 1000,
+        'rss_mb': int(result.stdout.split()[-1]) / 1024,
+    }
+
+
+def total_import_time(lines: List[str]) -> int:
+    """
+    Sums cumulative times (in microseconds) of the top level imports of `-X importtime` output.
+    """
+    total = 0
+    for line in lines:
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line.split(':', 1)[1].split('|')
+        if cumulative.strip().isdigit() and not name.startswith('  '):
+            total += int(cumulative)
+    return total
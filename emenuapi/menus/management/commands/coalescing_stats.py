@@ -0,0 +1,17 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from menus.coalescing import get_stats, reset_stats
+
+
+class Command(BaseCommand):
+    help = 'Shows how many anonymous menu reads ran and how many shared the response of an identical one'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after showing them')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        self.stdout.write(' '.join(f'{name}={value}' for name, value in get_stats().items()))
+        if options['reset']:
+            reset_stats()
+            self.stdout.write('Counters reset')
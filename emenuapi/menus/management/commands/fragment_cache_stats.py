@@ -0,0 +1,18 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from menus.fragments import get_stats, reset_stats
+
+
+class Command(BaseCommand):
+    help = 'Shows the hit ratio of the fragment cache of serialized dishes'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after showing them')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        hits, misses, ratio = get_stats()
+        self.stdout.write(f'hits={hits} misses={misses} hit_ratio={ratio:.2%}')
+        if options['reset']:
+            reset_stats()
+            self.stdout.write('Counters reset')
@@ -0,0 +1,46 @@
+from pathlib import Path
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from menus.factories import USER_PASSWORD
+from menus.loadtest.data import ensure_user, seed_data
+from menus.loadtest.runner import LoadTestConfig, dump_report, format_report, run_load_test
+from menus.loadtest.scenarios import DEFAULT_SCENARIOS
+
+
+class Command(BaseCommand):
+    help = 'Runs a mixed-workload load test against a running API server'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the API server')
+        parser.add_argument('--concurrency', type=int, default=10, help='Number of concurrent clients')
+        parser.add_argument('--duration', type=float, default=30, help='Duration of the test in seconds')
+        parser.add_argument('--requests', type=int, default=None, help='Stop after this many requests')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed of the clients and generated data')
+        parser.add_argument('--menus', type=int, default=0, help='Create this many menus before the test')
+        parser.add_argument('--dishes-per-menu', type=int, default=10, help='Number of dishes in created menus')
+        parser.add_argument('--username', default='loadtest', help='User the authenticated scenarios log in as')
+        parser.add_argument('--password', default=USER_PASSWORD, help='Password of the user')
+        parser.add_argument('--output', type=Path, default=None, help='Write the JSON report to this file')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        ensure_user(options['username'], options['password'])
+        if options['menus']:
+            seed_data(options['menus'], options['dishes_per_menu'], options['seed'])
+            self.stdout.write(f"Created {options['menus']} menus with {options['dishes_per_menu']} dishes each")
+
+        config = LoadTestConfig(
+            base_url=options['url'],
+            concurrency=options['concurrency'],
+            duration=options['duration'],
+            max_requests=options['requests'],
+            seed=options['seed'],
+            username=options['username'],
+            password=options['password'],
+        )
+        report = run_load_test(config, DEFAULT_SCENARIOS)
+
+        self.stdout.write(format_report(report))
+        if options['output']:
+            options['output'].write_text(dump_report(report))
+            self.stdout.write(f"Report written to {options['output']}")
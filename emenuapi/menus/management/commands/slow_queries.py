@@ -0,0 +1,29 @@
+import json
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from menus.querylog import read_store, summarize
+
+
+class Command(BaseCommand):
+    help = 'Lists the slowest queries of the slow query log grouped by fingerprint'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--top', type=int, default=10, help='Number of fingerprints to show')
+        parser.add_argument('--plans', action='store_true', help='Show the latest captured plan of each fingerprint')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        groups = summarize(read_store())[: options['top']]
+        if not groups:
+            self.stdout.write('No slow queries recorded')
+            return
+
+        for group in groups:
+            label = max(group['labels'], key=group['labels'].get)
+            self.stdout.write(
+                f"count={group['count']} total={group['total_ms']:.0f}ms mean={group['mean_ms']:.0f}ms "
+                f"max={group['max_ms']:.0f}ms top_label={label or '-'}"
+            )
+            self.stdout.write(f"  {group['fingerprint']}")
+            if options['plans'] and group['plan'] is not None:
+                self.stdout.write(json.dumps(group['plan'], indent=2))
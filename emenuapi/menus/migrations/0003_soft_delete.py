@@ -0,0 +1,46 @@
+# Generated by Django 3.2.9 on 2026-10-19 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menus', '0002_dish_dish_price_positive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dish',
+            name='deleted',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='menu',
+            name='deleted',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='menu',
+            name='name',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='dish',
+            index=models.Index(
+                condition=models.Q(('deleted__isnull', False)), fields=['deleted'], name='dish_deleted_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='menu',
+            index=models.Index(
+                condition=models.Q(('deleted__isnull', False)), fields=['deleted'], name='menu_deleted_idx'
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name='menu',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(('deleted__isnull', True)), fields=('name',), name='menu_name_unique'
+            ),
+        ),
+    ]
@@ -0,0 +1,44 @@
+from django.db import migrations
+
+# Notifies `menus_catalog` listeners of changed menus and dishes, see `menus.catalog`.
+# The payload is `<kind>:<id>`, identical payloads are sent once per transaction.
+CREATE_TRIGGERS = """
+CREATE FUNCTION menus_notify_catalog() RETURNS trigger AS $$
+DECLARE
+    changed RECORD;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        changed := OLD;
+    ELSE
+        changed := NEW;
+    END IF;
+    PERFORM pg_notify('menus_catalog', TG_ARGV[0] || ':' || (to_jsonb(changed) ->> TG_ARGV[1]));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER menus_menu_notify_catalog AFTER INSERT OR UPDATE OR DELETE ON menus_menu
+    FOR EACH ROW EXECUTE PROCEDURE menus_notify_catalog('menu', 'id');
+CREATE TRIGGER menus_dish_notify_catalog AFTER INSERT OR UPDATE OR DELETE ON menus_dish
+    FOR EACH ROW EXECUTE PROCEDURE menus_notify_catalog('dish', 'id');
+CREATE TRIGGER menus_menu_dishes_notify_catalog AFTER INSERT OR UPDATE OR DELETE ON menus_menu_dishes
+    FOR EACH ROW EXECUTE PROCEDURE menus_notify_catalog('menu', 'menu_id');
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER menus_menu_dishes_notify_catalog ON menus_menu_dishes;
+DROP TRIGGER menus_dish_notify_catalog ON menus_dish;
+DROP TRIGGER menus_menu_notify_catalog ON menus_menu;
+DROP FUNCTION menus_notify_catalog();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menus', '0003_soft_delete'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 3.2.9 on 2026-10-19 16:39
+
+from django.db import migrations, models
+
+# flushed view counts don't notify `menus_catalog` listeners, see `0004_catalog_notify`
+VIEWS_CHANGED = "(to_jsonb(OLD) - 'views') IS DISTINCT FROM (to_jsonb(NEW) - 'views')"
+
+REPLACE_TRIGGERS = f"""
+DROP TRIGGER menus_menu_notify_catalog ON menus_menu;
+DROP TRIGGER menus_dish_notify_catalog ON menus_dish;
+CREATE TRIGGER menus_menu_notify_catalog AFTER INSERT OR DELETE ON menus_menu
+    FOR EACH ROW EXECUTE PROCEDURE menus_notify_catalog('menu', 'id');
+CREATE TRIGGER menus_menu_update_notify_catalog AFTER UPDATE ON menus_menu
+    FOR EACH ROW WHEN ({VIEWS_CHANGED}) EXECUTE PROCEDURE menus_notify_catalog('menu', 'id');
+CREATE TRIGGER menus_dish_notify_catalog AFTER INSERT OR DELETE ON menus_dish
+    FOR EACH ROW EXECUTE PROCEDURE menus_notify_catalog('dish', 'id');
+CREATE TRIGGER menus_dish_update_notify_catalog AFTER UPDATE ON menus_dish
+    FOR EACH ROW WHEN ({VIEWS_CHANGED}) EXECUTE PROCEDURE menus_notify_catalog('dish', 'id');
+"""
+
+RESTORE_TRIGGERS = """
+DROP TRIGGER menus_dish_update_notify_catalog ON menus_dish;
+DROP TRIGGER menus_dish_notify_catalog ON menus_dish;
+DROP TRIGGER menus_menu_update_notify_catalog ON menus_menu;
+DROP TRIGGER menus_menu_notify_catalog ON menus_menu;
+CREATE TRIGGER menus_menu_notify_catalog AFTER INSERT OR UPDATE OR DELETE ON menus_menu
+    FOR EACH ROW EXECUTE PROCEDURE menus_notify_catalog('menu', 'id');
+CREATE TRIGGER menus_dish_notify_catalog AFTER INSERT OR UPDATE OR DELETE ON menus_dish
+    FOR EACH ROW EXECUTE PROCEDURE menus_notify_catalog('dish', 'id');
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menus', '0004_catalog_notify'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dish',
+            name='views',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='menu',
+            name='views',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='dish',
+            index=models.Index(fields=['-views', '-id'], name='dish_popularity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menu',
+            index=models.Index(fields=['-views', '-id'], name='menu_popularity_idx'),
+        ),
+        migrations.RunSQL(REPLACE_TRIGGERS, RESTORE_TRIGGERS),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations
+
+# The unique `(menu_id, dish_id)` index of the links serves the dishes of a menu, this one the menus of a dish.
+# Both columns are in the index, so lookups of the links are index-only scans. It replaces the `dish_id` index
+# Django creates for the foreign key. Indexes are built and dropped concurrently, so writes to the links aren't
+# blocked meanwhile, which can't be done in a transaction.
+CREATE_INDEX = 'CREATE INDEX CONCURRENTLY menus_menu_dishes_dish_menu_idx ON menus_menu_dishes (dish_id, menu_id);'
+
+DROP_INDEX = 'DROP INDEX CONCURRENTLY menus_menu_dishes_dish_menu_idx;'
+
+CREATE_DISH_INDEX = 'CREATE INDEX CONCURRENTLY menus_menu_dishes_dish_id_029bcc6b ON menus_menu_dishes (dish_id);'
+
+DROP_DISH_INDEX = 'DROP INDEX CONCURRENTLY menus_menu_dishes_dish_id_029bcc6b;'
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('menus', '0005_view_counts'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_INDEX, DROP_INDEX),
+        migrations.RunSQL(DROP_DISH_INDEX, CREATE_DISH_INDEX),
+    ]
@@ -1,31 +1,103 @@
 from __future__ import annotations
 
 from decimal import Decimal
-from typing import cast
+from typing import Iterable, Set, cast
 
-from django.db import models
-from django.db.models import Count
+from django.db import models, transaction
+from django.db.models import Count, Q
+from django.db.models.signals import m2m_changed
+from django.utils import timezone
+
+# soft deleted dishes keep their links to menus until they are purged
+NUM_DISHES = Count('dishes', filter=Q(dishes__deleted__isnull=True))
+
+
+class SoftDeleteManager(models.Manager):
+    def get_queryset(self) -> models.QuerySet:
+        return super().get_queryset().filter(deleted__isnull=True)
+
+
+class SoftDeleteModel(models.Model):
+    deleted = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def soft_delete(self) -> None:
+        # rows are purged, along with their M2M links and media, by `menus.tasks.purge_deleted`
+        self.deleted = timezone.now()
+        self.save(update_fields=['deleted'])
 
 
 class MenuQuerySet(models.QuerySet):
     def with_num_dishes(self) -> models.QuerySet["Menu"]:
-        return cast(models.QuerySet["Menu"], super().prefetch_related('dishes').annotate(num_dishes=Count('dishes')))
+        return cast(models.QuerySet["Menu"], super().prefetch_related('dishes').annotate(num_dishes=NUM_DISHES))
+
+    def annotate_num_dishes(self) -> models.QuerySet["Menu"]:
+        return cast(models.QuerySet["Menu"], super().annotate(num_dishes=NUM_DISHES))
 
 
-class Menu(models.Model):
-    name = models.CharField(max_length=255, unique=True)
+class Menu(SoftDeleteModel):
+    name = models.CharField(max_length=255)
     description = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(null=True, blank=True)
     dishes = models.ManyToManyField('menus.Dish', blank=True)
+    # flushed from the counters of `menus.popularity`
+    views = models.PositiveBigIntegerField(default=0, editable=False)
 
-    objects = MenuQuerySet.as_manager()
+    objects = SoftDeleteManager.from_queryset(MenuQuerySet)()
+    all_objects = MenuQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['name'], condition=Q(deleted__isnull=True), name='menu_name_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['deleted'], condition=Q(deleted__isnull=False), name='menu_deleted_idx'),
+            models.Index(fields=['-views', '-id'], name='menu_popularity_idx'),
+        ]
 
     def __str__(self) -> str:
         return f'Menu: {self.name}'
 
+    def set_dishes(self, dishes: Iterable["Dish"], is_new: bool = False) -> None:
+        # Equivalent of `self.dishes.set()` costing a single read of the current membership
+        # (skipped for new menus) and at most one bulk delete and one bulk insert.
+        through = Menu.dishes.through
+        wanted = {dish.pk for dish in dishes}
+
+        with transaction.atomic(savepoint=False):
+            current = set() if is_new else set(through.objects.filter(menu=self).values_list('dish_id', flat=True))
+
+            removed = current - wanted
+            if removed:
+                self._send_dishes_changed('pre_remove', removed)
+                through.objects.filter(menu=self, dish_id__in=removed).delete()
+                self._send_dishes_changed('post_remove', removed)
+
+            added = wanted - current
+            if added:
+                self._send_dishes_changed('pre_add', added)
+                through.objects.bulk_create([through(menu=self, dish_id=dish_id) for dish_id in added])
+                self._send_dishes_changed('post_add', added)
 
-class Dish(models.Model):
+        if removed or added:
+            getattr(self, '_prefetched_objects_cache', {}).pop('dishes', None)
+
+    def _send_dishes_changed(self, action: str, pk_set: Set[int]) -> None:
+        m2m_changed.send(
+            sender=Menu.dishes.through,
+            instance=self,
+            action=action,
+            reverse=False,
+            model=Dish,
+            pk_set=pk_set,
+            using=self._state.db,
+        )
+
+
+class Dish(SoftDeleteModel):
     name = models.CharField(max_length=255)
     description = models.TextField()
     price = models.DecimalField(max_digits=6, decimal_places=2)
@@ -34,12 +106,21 @@ class Dish(models.Model):
     image = models.ImageField(upload_to='menus/dish', blank=True)
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(null=True, blank=True)
+    # flushed from the counters of `menus.popularity`
+    views = models.PositiveBigIntegerField(default=0, editable=False)
+
+    objects = SoftDeleteManager()
+    all_objects = models.Manager()
 
     class Meta:
         verbose_name_plural = 'Dishes'
         constraints = [
             models.CheckConstraint(check=models.Q(price__gt=Decimal('0')), name='dish_price_positive'),
         ]
+        indexes = [
+            models.Index(fields=['deleted'], condition=Q(deleted__isnull=False), name='dish_deleted_idx'),
+            models.Index(fields=['-views', '-id'], name='dish_popularity_idx'),
+        ]
 
     def __str__(self) -> str:
         return f'Dish: {self.name}'
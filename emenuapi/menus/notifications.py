@@ -0,0 +1,20 @@
+from typing import Any, cast
+
+from django.db import connections
+
+
+def listen(channel: str) -> Any:
+    """
+    Returns a new autocommit connection to the default database listening to the Postgres
+    notifications of `channel`. It isn't managed by Django, the caller closes it.
+    """
+    database = cast(Any, connections['default'])
+    listener = database.get_new_connection(database.get_connection_params())
+    try:
+        listener.autocommit = True
+        with listener.cursor() as cursor:
+            cursor.execute(f'LISTEN {channel}')
+    except BaseException:
+        listener.close()
+        raise
+    return listener
@@ -0,0 +1,101 @@
+from typing import Any, List, Optional, Tuple, cast
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import models
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import Cursor, CursorPagination
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+DISHES_LIMIT_PARAM = 'dishes_limit'
+DISH_ORDERING_FIELDS = ('name', 'price', 'time_to_prepare', 'created')
+DEFAULT_ORDERING = '-created'
+
+
+class MenuDishesPagination(CursorPagination):
+    """
+    Cursor pagination of the dishes of a menu, ordered by one of `DISH_ORDERING_FIELDS` given
+    in `?ordering=`. Ties are broken by the id, so the order of the pages is deterministic.
+    """
+
+    page_size = settings.MENU_DISHES_PAGE_SIZE
+    page_size_query_param = 'limit'
+    max_page_size = settings.MENU_DISHES_MAX_PAGE_SIZE
+    ordering = DEFAULT_ORDERING
+    # set by `paginate_first`, overrides the page size of the request
+    first_page_size: Optional[int] = None
+
+    def get_page_size(self, request: Request) -> Optional[int]:
+        if self.first_page_size is not None:
+            return self.first_page_size
+        return super().get_page_size(request)
+
+    def get_ordering(self, request: Request, queryset: models.QuerySet, view: Any) -> Tuple[str, ...]:
+        # unknown fields are ignored, like `OrderingFilter` does
+        value = request.query_params.get(api_settings.ORDERING_PARAM) or DEFAULT_ORDERING
+        if value.lstrip('-') not in DISH_ORDERING_FIELDS:
+            value = DEFAULT_ORDERING
+        return value, '-pk' if value.startswith('-') else 'pk'
+
+    def encode_cursor(self, cursor: Cursor) -> str:
+        # positions are tagged with their ordering, a link whose `ordering` was changed is rejected
+        if cursor.position is not None:
+            position: Any = f'{self.ordering[0]}:{cursor.position}'
+            cursor = cursor._replace(position=position)
+        return super().encode_cursor(cursor)
+
+    def decode_cursor(self, request: Request) -> Optional[Cursor]:
+        cursor = super().decode_cursor(request)
+        if cursor is None or cursor.position is None:
+            return cursor
+        ordering, _, position = str(cursor.position).partition(':')
+        if ordering != self.ordering[0]:
+            raise NotFound(self.invalid_cursor_message)
+        return cursor._replace(position=cast(Any, position))
+
+    def paginate_queryset(self, queryset: models.QuerySet, request: Request, view: Any = None) -> Optional[List[Any]]:
+        try:
+            return super().paginate_queryset(queryset, request, view)
+        except (DjangoValidationError, ValueError):
+            # a position that isn't a value of the ordering field
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_first(self, queryset: models.QuerySet, request: Request, page_size: int, url: str) -> List[Any]:
+        """
+        Returns the first page of `page_size` objects, linking the next one at `url`.
+        """
+        self.first_page_size = page_size
+        page = list(self.paginate_queryset(queryset, request) or [])
+        self.base_url = replace_query_param(url, 'limit', page_size)
+        if api_settings.ORDERING_PARAM in request.query_params:
+            self.base_url = replace_query_param(self.base_url, api_settings.ORDERING_PARAM, self.ordering[0])
+        return page
+
+
+class DishMenusPagination(CursorPagination):
+    """
+    Cursor pagination of the menus of a dish, ordered by their ids like the `(dish_id, menu_id)`
+    index of the links.
+    """
+
+    page_size = settings.DISH_MENUS_PAGE_SIZE
+    page_size_query_param = 'limit'
+    max_page_size = settings.DISH_MENUS_MAX_PAGE_SIZE
+    ordering = 'id'
+
+
+def get_dishes_limit(request: Request) -> Optional[int]:
+    value = request.query_params.get(DISHES_LIMIT_PARAM)
+    if value is None:
+        return None
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = 0
+    if not 0 < limit <= settings.MENU_DISHES_MAX_PAGE_SIZE:
+        raise ValidationError(
+            {DISHES_LIMIT_PARAM: [f'Ensure this value is between 1 and {settings.MENU_DISHES_MAX_PAGE_SIZE}.']}
+        )
+    return limit
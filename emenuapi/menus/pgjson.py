@@ -0,0 +1,169 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import connection, models
+from django.db.models import F, Window
+from django.db.models.expressions import OrderBy
+from django.db.models.functions import RowNumber
+from django.http import Http404, HttpResponse
+from django.http.response import HttpResponseBase
+from menus.models import Dish, Menu
+from menus.pagination import DISHES_LIMIT_PARAM
+from rest_framework.request import Request
+
+# characters `filepath_to_uri` leaves as they are, other media names are rendered by the serializers
+URI_SAFE_NAME = r"^[A-Za-z0-9_.~!*()'/-]*$"
+
+
+def isoformat(column: str) -> str:
+    # `DateTimeField.to_representation` in UTC, with microseconds only when there are any
+    value = f"({column} AT TIME ZONE 'UTC')"
+    return (
+        f"to_char({value}, 'YYYY-MM-DD\"T\"HH24:MI:SS') || "
+        f"CASE WHEN to_char({value}, 'US') = '000000' THEN '' ELSE '.' || to_char({value}, 'US') END || 'Z'"
+    )
+
+
+def build_object(columns: Dict[str, str]) -> str:
+    return 'json_build_object({})'.format(', '.join(f"'{name}', {value}" for name, value in columns.items()))
+
+
+def menu_dishes(menu_alias: str) -> str:
+    # dishes of the menu that aren't deleted, like the prefetch of `Menu.dishes`
+    through = Menu.dishes.through._meta.db_table
+    return (
+        f'FROM {Dish._meta.db_table} d JOIN {through} t ON t.dish_id = d.id '
+        f'WHERE t.menu_id = {menu_alias}.id AND d.deleted IS NULL'
+    )
+
+
+def dishes_of(menu_alias: str, value: str) -> str:
+    return f"(SELECT COALESCE(json_agg({value} ORDER BY d.id), '[]'::json) {menu_dishes(menu_alias)})"
+
+
+# columns of `DishSerializer`, `%s` is the absolute media URL
+DISH_DOCUMENT = build_object(
+    {
+        'id': 'd.id',
+        'name': 'd.name',
+        'description': 'd.description',
+        'price': 'd.price::text',
+        'time_to_prepare': 'd.time_to_prepare',
+        'is_vegetarian': 'd.is_vegetarian',
+        'image': "CASE WHEN d.image = '' THEN NULL ELSE %s || d.image END",
+        'created': isoformat('d.created'),
+        'updated': isoformat('d.updated'),
+    }
+)
+
+# columns of `MenuDetailsSerializer`
+MENU_DETAILS_DOCUMENT = build_object(
+    {
+        'id': 'm.id',
+        'name': 'm.name',
+        'description': 'm.description',
+        'dishes': dishes_of('m', DISH_DOCUMENT),
+        'created': isoformat('m.created'),
+        'updated': isoformat('m.updated'),
+    }
+)
+
+# columns of `MenuSerializer`
+MENU_DOCUMENT = build_object(
+    {
+        'id': 'm.id',
+        'name': 'm.name',
+        'description': 'm.description',
+        'dishes': dishes_of('m', 'd.id'),
+        'created': isoformat('m.created'),
+        'updated': isoformat('m.updated'),
+    }
+)
+
+
+def get_media_url(request: Request) -> Optional[str]:
+    # URLs of other storages can't be built in the database
+    if not isinstance(default_storage, FileSystemStorage):
+        return None
+    return request.build_absolute_uri(default_storage.url(''))
+
+
+def render_menu_details(queryset: models.QuerySet[Menu], media_url: str) -> Tuple[Optional[str], bool]:
+    """
+    Renders the first menu of `queryset` like `MenuDetailsSerializer`, in a single query.
+
+    Also tells whether any of its dishes has a media name that has to be quoted in the URL,
+    in which case the document can't be used.
+    """
+    sql, params = queryset.values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT {MENU_DETAILS_DOCUMENT}::text, EXISTS(SELECT 1 {menu_dishes("m")} AND d.image !~ %s) '
+            f'FROM {Menu._meta.db_table} m WHERE m.id IN ({sql}) LIMIT 1',
+            [media_url, URI_SAFE_NAME, *params],
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return None, False
+    return row[0], row[1]
+
+
+def render_menu_list(queryset: models.QuerySet[Menu]) -> str:
+    """
+    Renders the menus of `queryset` like a list of `MenuSerializer`, in the order of the queryset.
+    """
+    ordering: List[Any] = [
+        OrderBy(F(field.lstrip('-')), descending=field.startswith('-'))
+        for field in queryset.query.order_by
+        if isinstance(field, str)
+    ]
+    positions = queryset.annotate(position=Window(RowNumber(), order_by=ordering or [F('pk').asc()]))
+    sql, params = positions.values('pk', 'position').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT COALESCE(json_agg({MENU_DOCUMENT} ORDER BY ids.position), '[]'::json)::text "
+            f'FROM ({sql}) ids JOIN {Menu._meta.db_table} m ON m.id = ids.id',
+            params,
+        )
+        return str(cursor.fetchone()[0])
+
+
+def json_response(document: str) -> HttpResponse:
+    return HttpResponse(document.encode(), content_type='application/json')
+
+
+class DatabaseJSONMixin:
+    """
+    With `MENU_JSON_FROM_DATABASE` on, menu list and retrieve responses are built by Postgres
+    with `json_build_object`/`json_agg` and returned as they are, instead of loading the rows
+    and rendering them with the serializers. The documents are equal to the serialized ones,
+    dishes are ordered by their ids.
+    """
+
+    def use_database_json(self) -> bool:
+        return bool(settings.MENU_JSON_FROM_DATABASE) and connection.vendor == 'postgresql'
+
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> HttpResponseBase:
+        if not self.use_database_json():
+            return super().list(request, *args, **kwargs)  # type: ignore
+        queryset = self.filter_queryset(self.get_queryset())  # type: ignore
+        return json_response(render_menu_list(queryset))
+
+    def retrieve(self, request: Request, *args: Any, **kwargs: Any) -> HttpResponseBase:
+        media_url = get_media_url(request)
+        if not self.use_database_json() or media_url is None or DISHES_LIMIT_PARAM in request.query_params:
+            return super().retrieve(request, *args, **kwargs)  # type: ignore
+
+        queryset = self.filter_queryset(self.get_queryset())  # type: ignore
+        try:
+            queryset = queryset.filter(pk=self.kwargs[self.lookup_url_kwarg])  # type: ignore
+            document, quoted_names = render_menu_details(queryset, media_url)
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+        if document is None:
+            raise Http404
+        if quoted_names:
+            return super().retrieve(request, *args, **kwargs)  # type: ignore
+        return json_response(document)
@@ -0,0 +1,70 @@
+from typing import List, Tuple, Type, cast
+
+from django.db import models
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+READ_ACTIONS = ('list', 'retrieve')
+NO_SERIALIZER_ACTIONS = ('destroy',)
+
+
+def plan_queryset(
+    queryset: models.QuerySet, serializer_class: Type[serializers.Serializer], action: str
+) -> models.QuerySet:
+    """
+    Restricts `queryset` to the columns and relations read by `serializer_class`.
+
+    List serializers with `load_fields` restrict their instances to those fields instead.
+    Related objects are prefetched only for read actions. Write actions clear the prefetch
+    cache before rendering the response, and `destroy` doesn't render the instance at all.
+    """
+    if action in NO_SERIALIZER_ACTIONS:
+        return queryset.only('pk')
+
+    load_fields = getattr(serializer_class(many=True), 'load_fields', None)
+    if action == 'list' and load_fields:
+        return queryset.only(*load_fields)
+
+    fields, prefetches = _plan_serializer(queryset.model, serializer_class())
+    queryset = queryset.only(*fields)
+    if action in READ_ACTIONS:
+        queryset = queryset.prefetch_related(*prefetches)
+    return queryset
+
+
+def _plan_serializer(model: Type[models.Model], serializer: serializers.Serializer) -> Tuple[List[str], List[Prefetch]]:
+    model_fields = {field.name: field for field in model._meta.get_fields()}
+    fields: List[str] = []
+    prefetches: List[Prefetch] = []
+
+    for field in serializer.fields.values():
+        source = cast(str, field.source)
+        model_field = model_fields.get(source)
+        if model_field is None:
+            # Annotations, properties and `source='*'` fields are left to the caller.
+            continue
+
+        if model_field.many_to_many or model_field.one_to_many:
+            related_model = cast(Type[models.Model], model_field.related_model)
+            load_fields = getattr(field, 'load_fields', None)
+            if load_fields:
+                # the list serializer loads whatever else it needs by itself
+                related_queryset = related_model._default_manager.only(*load_fields)
+            elif isinstance(field, serializers.ListSerializer):
+                child = cast(serializers.Serializer, field.child)
+                related_fields, related_prefetches = _plan_serializer(related_model, child)
+                related_queryset = related_model._default_manager.only(*related_fields).prefetch_related(
+                    *related_prefetches
+                )
+            else:
+                related_queryset = related_model._default_manager.only('pk')
+            prefetches.append(Prefetch(source, queryset=related_queryset))
+        elif model_field.concrete:
+            fields.append(source)
+
+    return fields, prefetches
+
+
+class QuerySetPlannerMixin:
+    def plan_queryset(self, queryset: models.QuerySet) -> models.QuerySet:
+        return plan_queryset(queryset, self.get_serializer_class(), self.action)  # type: ignore
@@ -0,0 +1,131 @@
+import math
+import time
+import uuid
+from collections import defaultdict
+from itertools import chain
+from typing import Dict, List, Optional, Set, Tuple, Type
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.db import connection, models
+from menus.counters import CounterBuffer, incr, incr_many
+from menus.models import Dish, Menu
+
+DIRTY_KEY = 'views:dirty'
+FLUSHED_KEY = 'views:dirty:flushed'
+FLUSH_LOCK_KEY = 'views:flush:lock'
+
+MODELS: Dict[str, Type[models.Model]] = {str(model._meta.model_name): model for model in (Menu, Dish)}
+
+
+def get_cache() -> BaseCache:
+    return caches[settings.VIEW_COUNTS_CACHE]
+
+
+def view_key(model: Type[models.Model], pk: int) -> str:
+    return f'views:{model._meta.model_name}:{pk}'
+
+
+def dirty_interval(timestamp: float) -> int:
+    return int(timestamp // settings.VIEW_COUNTS_DIRTY_INTERVAL)
+
+
+def push_counts(counts: Dict[str, int]) -> None:
+    """
+    Adds `counts` to the counters of the cache and lists their keys for the flush, under a
+    number taken from the counter of the current `VIEW_COUNTS_DIRTY_INTERVAL`.
+    """
+    cache = get_cache()
+    incr_many(cache, counts)
+    interval_key = f'{DIRTY_KEY}:{dirty_interval(time.time())}'
+    number = incr(cache, interval_key, timeout=settings.VIEW_COUNTS_DIRTY_TIMEOUT)
+    cache.set(f'{interval_key}:{number}', list(counts), timeout=settings.VIEW_COUNTS_DIRTY_TIMEOUT)
+
+
+# views counted in each process, pushed to the counters of the cache every `VIEW_COUNTS_PUSH_INTERVAL` seconds
+buffer = CounterBuffer(push_counts, 'VIEW_COUNTS_PUSH_INTERVAL')
+
+
+def record_view(model: Type[models.Model], pk: int) -> None:
+    if settings.VIEW_COUNTS:
+        buffer.add(view_key(model, pk))
+
+
+def pop_dirty_keys(cache: BaseCache) -> Set[str]:
+    """
+    Returns the keys of the counters pushed in the intervals not flushed yet and forgets them.
+    The interval before the current one is left for the next flush, as its pushes may still be
+    listing their keys. Intervals older than `VIEW_COUNTS_DIRTY_TIMEOUT` have expired.
+    """
+    current = dirty_interval(time.time())
+    first = current - math.ceil(settings.VIEW_COUNTS_DIRTY_TIMEOUT / settings.VIEW_COUNTS_DIRTY_INTERVAL)
+    flushed = cache.get(FLUSHED_KEY)
+    if flushed is not None:
+        first = max(first, flushed + 1)
+    intervals = range(first, current - 1)
+    if not intervals:
+        return set()
+
+    numbers = cache.get_many([f'{DIRTY_KEY}:{interval}' for interval in intervals])
+    list_keys = [f'{key}:{number}' for key, count in numbers.items() for number in range(1, count + 1)]
+    keys = set(chain.from_iterable(cache.get_many(list_keys).values())) if list_keys else set()
+    cache.set(FLUSHED_KEY, intervals[-1], timeout=None)
+    if numbers:
+        cache.delete_many([*numbers, *list_keys])
+    return keys
+
+
+def add_views(model: Type[models.Model], counts: List[Tuple[int, int]]) -> None:
+    table = model._meta.db_table
+    values = ', '.join(['(%s::bigint, %s::bigint)'] * len(counts))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {table} SET views = {table}.views + v.count '
+            f'FROM (VALUES {values}) AS v(id, count) WHERE {table}.id = v.id',
+            [value for row in counts for value in row],
+        )
+
+
+def flush_view_counts(batch_size: int) -> Optional[int]:
+    """
+    Moves the view counts of the cache to the `views` columns of menus and dishes, in batches of
+    `batch_size` objects that cost one `get_many` and at most one `UPDATE`. Only the objects viewed
+    since the last flush are visited, see `pop_dirty_keys`. Returns the number of views, or `None`
+    when another flush is running, it would add the same counts again.
+
+    Counters are decremented by the flushed counts before the update, views counted meanwhile
+    stay for the next flush. The counts of a batch are lost if its update fails.
+    """
+    cache = get_cache()
+    token = uuid.uuid4().hex
+    if not cache.add(FLUSH_LOCK_KEY, token, timeout=settings.VIEW_COUNTS_FLUSH_LOCK_TIMEOUT):
+        return None
+    try:
+        return flush_dirty_counts(cache, batch_size)
+    finally:
+        # a flush outliving its lock leaves the lock of the next one
+        if cache.get(FLUSH_LOCK_KEY) == token:
+            cache.delete(FLUSH_LOCK_KEY)
+
+
+def flush_dirty_counts(cache: BaseCache, batch_size: int) -> int:
+    pks: Dict[Type[models.Model], List[int]] = defaultdict(list)
+    for key in pop_dirty_keys(cache):
+        _, model_name, value = key.split(':')
+        pks[MODELS[model_name]].append(int(value))
+
+    flushed = 0
+    for model, model_pks in pks.items():
+        remaining = sorted(model_pks)
+        while remaining:
+            chunk, remaining = remaining[:batch_size], remaining[batch_size:]
+            keys = {view_key(model, pk): pk for pk in chunk}
+            counts = [(keys[key], count) for key, count in cache.get_many(list(keys)).items() if count]
+            if not counts:
+                continue
+            for pk, count in counts:
+                cache.decr(view_key(model, pk), count)
+            add_views(model, counts)
+            flushed += sum(count for _, count in counts)
+    return flushed
@@ -0,0 +1,107 @@
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Any, Dict, Optional, Sequence, cast
+
+from django.conf import settings
+from django.db import DataError, IntegrityError, models, transaction
+from django.db.models import Count, ExpressionWrapper, F, Max, Min, Q, Value
+from django.db.models.functions import Cast, Ceil, Floor, Round
+from django.utils import timezone
+from menus.events import publish
+from menus.facets import bucket_filter, get_buckets
+from menus.models import Dish
+from rest_framework.exceptions import ValidationError
+
+ROUNDING = {'nearest': Round, 'up': Ceil, 'down': Floor}
+
+PRICE_FIELD = Dish._meta.get_field('price')
+# the largest price `Dish.price` holds
+MAX_PRICE = Decimal(f'{"9" * (PRICE_FIELD.max_digits - PRICE_FIELD.decimal_places)}.{"9" * PRICE_FIELD.decimal_places}')
+
+
+def adjusted_price(
+    percentage: Optional[Decimal], amount: Optional[Decimal], round_to: Decimal, rounding: str
+) -> models.Expression:
+    """
+    Expression of the price changed by `percentage` or `amount`, rounded to a multiple of `round_to`.
+    """
+    decimal: models.DecimalField = models.DecimalField()
+    if percentage is not None:
+        price = F('price') * Value(1 + percentage / 100, output_field=decimal)
+    else:
+        price = F('price') + Value(amount, output_field=decimal)
+    step = Value(round_to, output_field=decimal)
+    return ExpressionWrapper(ROUNDING[rounding](price / step) * step, output_field=decimal)
+
+
+def check_prices(queryset: models.QuerySet[Dish], new_price: models.Expression) -> Dict[str, Any]:
+    """
+    Summarizes the prices the dishes of `queryset` would get, with their distribution over the
+    `DISH_FACET_BUCKETS` price buckets, and rejects prices breaking the `dish_price_positive`
+    constraint or not fitting the price column, in a single aggregate query.
+    """
+    buckets = get_buckets(cast(Dict[str, Sequence[Any]], settings.DISH_FACET_BUCKETS)['price'])
+    aggregates = {
+        'count': Count('pk'),
+        'changed': Count('pk', filter=~Q(price=F('new_price'))),
+        'not_positive': Count('pk', filter=Q(new_price__lte=0)),
+        'too_large': Count('pk', filter=Q(new_price__gt=MAX_PRICE)),
+        'min': Min('new_price'),
+        'max': Max('new_price'),
+    }
+    for index, bucket in enumerate(buckets):
+        aggregates[f'price_{index}'] = Count('pk', filter=bucket_filter('new_price', bucket))
+
+    result = queryset.order_by().annotate(new_price=new_price).aggregate(**aggregates)
+
+    if result['not_positive']:
+        raise ValidationError(
+            {'price': [f'Adjustment makes the price of {result["not_positive"]} dishes not positive.']}
+        )
+    if result['too_large']:
+        raise ValidationError(
+            {'price': [f'Adjustment makes the price of {result["too_large"]} dishes exceed {MAX_PRICE}.']}
+        )
+
+    return {
+        'count': result['count'],
+        'changed': result['changed'],
+        'min': result['min'],
+        'max': result['max'],
+        'price': [
+            OrderedDict([('min', lower), ('max', upper), ('count', result[f'price_{index}'])])
+            for index, (lower, upper) in enumerate(buckets)
+        ],
+    }
+
+
+def adjust_prices(
+    queryset: models.QuerySet[Dish],
+    percentage: Optional[Decimal] = None,
+    amount: Optional[Decimal] = None,
+    round_to: Decimal = Decimal('0.01'),
+    rounding: str = 'nearest',
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """
+    Changes the prices of the dishes of `queryset` with a single `UPDATE`, stamping `updated`
+    of the dishes whose price changed. With `dry_run` only the summary of `check_prices` is returned.
+    """
+    new_price = adjusted_price(percentage, amount, round_to, rounding)
+    try:
+        with transaction.atomic():
+            summary = check_prices(queryset, new_price)
+            if dry_run:
+                return {**summary, 'dry_run': True}
+
+            updated = timezone.now()
+            changed = queryset.filter(~Q(price=new_price)).update(
+                price=Cast(new_price, output_field=PRICE_FIELD), updated=updated
+            )
+            if settings.EVENT_STREAM:
+                for dish in Dish.objects.filter(updated=updated).only('pk', 'created', 'updated', 'deleted'):
+                    publish(dish)
+    except (IntegrityError, DataError):
+        # prices changed by someone else since they were checked
+        raise ValidationError({'price': ['Adjustment makes some prices invalid.']})
+    return {**summary, 'changed': changed, 'dry_run': False}
@@ -0,0 +1,296 @@
+import cProfile
+import json
+import pstats
+import random
+import re
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse
+from django.utils import timezone
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import IsAdminUser
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = 'profile'
+PROFILE_ID = re.compile(r'^[\w-]+$')
+FORMATS = {'pstats': '.pstats', 'speedscope': '.speedscope.json'}
+
+FunctionKey = Tuple[str, int, str]
+
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+
+
+class Profiler:
+    """
+    Captures CPU call stacks with `cProfile` and allocations with `tracemalloc`.
+
+    `cProfile` only sees the current thread. `tracemalloc` is process wide, so allocations
+    of other threads are included and tracing stays on while any profiler is running.
+    """
+
+    def __init__(self, label: str, kind: str, trigger: str) -> None:
+        self.label = label
+        self.kind = kind
+        self.trigger = trigger
+        self.profile = cProfile.Profile()
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        self.started = timezone.now()
+        self.start_time = 0.0
+
+    def start(self) -> None:
+        global _tracemalloc_users
+        with _tracemalloc_lock:
+            if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start(settings.PROFILE_TRACEMALLOC_FRAMES)
+            _tracemalloc_users += 1
+        self.snapshot = tracemalloc.take_snapshot()
+        self.start_time = time.perf_counter()
+        self.profile.enable()
+
+    def stop(self) -> Dict[str, Any]:
+        global _tracemalloc_users
+        self.profile.disable()
+        duration = (time.perf_counter() - self.start_time) * 1000
+        allocations = top_allocations(cast_snapshot(self.snapshot), tracemalloc.take_snapshot())
+        with _tracemalloc_lock:
+            _tracemalloc_users -= 1
+            if _tracemalloc_users == 0:
+                tracemalloc.stop()
+
+        return save_profile(self, duration, allocations)
+
+
+def cast_snapshot(snapshot: Optional[tracemalloc.Snapshot]) -> tracemalloc.Snapshot:
+    if snapshot is None:
+        raise RuntimeError('Profiler was not started')
+    return snapshot
+
+
+def top_allocations(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot) -> List[Dict[str, Any]]:
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), 'lineno')
+    return [
+        {
+            'location': f'{stat.traceback[0].filename}:{stat.traceback[0].lineno}',
+            'size_diff': stat.size_diff,
+            'count_diff': stat.count_diff,
+        }
+        for stat in diff[: settings.PROFILE_TOP_ALLOCATIONS]
+    ]
+
+
+def to_speedscope(stats: pstats.Stats, name: str) -> Dict[str, Any]:
+    """
+    Converts `stats` into a speedscope profile of weighted stacks.
+
+    `cProfile` only keeps caller/callee totals, so the time of a function is split among the
+    paths reaching it in proportion to the time spent on each path. Recursion is cut at the
+    first repeated frame and paths under `PROFILE_SPEEDSCOPE_MIN_WEIGHT` of the total are dropped.
+    """
+    raw: Dict[FunctionKey, Any] = stats.stats  # type: ignore
+    callees: Dict[FunctionKey, Dict[FunctionKey, float]] = {}
+    for function, function_stats in raw.items():
+        for caller, caller_stats in function_stats[4].items():
+            callees.setdefault(caller, {})[function] = caller_stats[3]
+
+    frames: List[Dict[str, Any]] = []
+    frame_index: Dict[FunctionKey, int] = {}
+    samples: List[List[int]] = []
+    weights: List[float] = []
+
+    def frame(function: FunctionKey) -> int:
+        if function not in frame_index:
+            filename, line, function_name = function
+            frame_index[function] = len(frames)
+            frames.append({'name': function_name, 'file': filename, 'line': line})
+        return frame_index[function]
+
+    roots = [function for function, function_stats in raw.items() if not function_stats[4]]
+    total = sum(raw[root][3] for root in roots) or 1.0
+    min_weight = total * settings.PROFILE_SPEEDSCOPE_MIN_WEIGHT
+
+    def walk(function: FunctionKey, time_on_path: float, stack: List[FunctionKey]) -> None:
+        stack = [*stack, function]
+        children_time = 0.0
+        function_cumulative = raw[function][3] or 1.0
+        for callee, callee_time in callees.get(function, {}).items():
+            share = callee_time * time_on_path / function_cumulative
+            children_time += share
+            if callee not in stack and share >= min_weight:
+                walk(callee, share, stack)
+        self_time = time_on_path - children_time
+        if self_time > 0:
+            samples.append([frame(item) for item in stack])
+            weights.append(self_time)
+
+    for root in roots:
+        walk(root, raw[root][3], [])
+
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'shared': {'frames': frames},
+        'profiles': [
+            {
+                'type': 'sampled',
+                'name': name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': sum(weights),
+                'samples': samples,
+                'weights': weights,
+            }
+        ],
+        'name': name,
+        'exporter': 'emenuapi',
+    }
+
+
+def get_profile_dir() -> Path:
+    path = Path(settings.PROFILE_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def save_profile(profiler: Profiler, duration: float, allocations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    directory = get_profile_dir()
+    slug = re.sub(r'[^\w]+', '-', profiler.label).strip('-')[:80]
+    profile_id = f"{profiler.started.strftime('%Y%m%dT%H%M%S%f')}-{slug}"
+
+    stats = pstats.Stats(profiler.profile)
+    stats.dump_stats(directory.joinpath(f'{profile_id}.pstats'))
+    directory.joinpath(f'{profile_id}.speedscope.json').write_text(json.dumps(to_speedscope(stats, profiler.label)))
+
+    metadata = {
+        'id': profile_id,
+        'label': profiler.label,
+        'kind': profiler.kind,
+        'trigger': profiler.trigger,
+        'time': profiler.started.isoformat(),
+        'duration_ms': round(duration, 2),
+        'allocations': allocations,
+    }
+    directory.joinpath(f'{profile_id}.meta.json').write_text(json.dumps(metadata))
+    rotate(directory)
+    return metadata
+
+
+def rotate(directory: Path) -> None:
+    """
+    Keeps the `PROFILE_MAX_ARTIFACTS` newest profiles.
+    """
+    profiles = sorted(directory.glob('*.meta.json'), reverse=True)
+    del profiles[: settings.PROFILE_MAX_ARTIFACTS]
+    for metadata in profiles:
+        profile_id = metadata.name[: -len('.meta.json')]
+        for suffix in ('.meta.json', *FORMATS.values()):
+            directory.joinpath(f'{profile_id}{suffix}').unlink(missing_ok=True)
+
+
+def list_profiles(label: Optional[str] = None) -> List[Dict[str, Any]]:
+    profiles = []
+    for path in sorted(get_profile_dir().glob('*.meta.json'), reverse=True):
+        metadata = json.loads(path.read_text())
+        if label is None or label in metadata['label']:
+            profiles.append(metadata)
+    return profiles
+
+
+def profile_requested(request: HttpRequest) -> bool:
+    """
+    Staff trigger profiling with the `X-Profile: 1` header, superusers also with `?profile=1`.
+    """
+    header = request.META.get(PROFILE_HEADER) == '1'
+    param = request.GET.get(PROFILE_PARAM) == '1'
+    if not header and not param:
+        return False
+
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        # DRF authenticates in the view, tokens are checked here only for requests asking for a profile
+        try:
+            result = TokenAuthentication().authenticate(Request(request))
+        except AuthenticationFailed:
+            return False
+        if result is None:
+            return False
+        user = result[0]
+
+    return bool((header and user.is_staff) or (param and user.is_superuser))
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests asked for by staff and a `PROFILE_SAMPLE_RATE` sample of the others.
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if profile_requested(request):
+            trigger = 'on_demand'
+        elif settings.PROFILE_SAMPLE_RATE and random.random() < settings.PROFILE_SAMPLE_RATE:  # nosec
+            trigger = 'sampled'
+        else:
+            return self.get_response(request)
+
+        profiler = Profiler(f'{request.method} {request.path}', 'request', trigger)
+        profiler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            if request.resolver_match is not None:
+                profiler.label = f'{request.method} {request.resolver_match.view_name}'
+            metadata = profiler.stop()
+
+        if trigger == 'on_demand':
+            response['X-Profile-Id'] = metadata['id']
+        return response
+
+
+_task_profilers: Dict[str, Profiler] = {}
+
+
+def task_prerun(task_id: str = '', task: Any = None, **kwargs: Any) -> None:
+    if settings.PROFILE_TASK_SAMPLE_RATE and random.random() < settings.PROFILE_TASK_SAMPLE_RATE:  # nosec
+        profiler = Profiler(f'task {getattr(task, "name", "")}', 'task', 'sampled')
+        _task_profilers[task_id] = profiler
+        profiler.start()
+
+
+def task_postrun(task_id: str = '', **kwargs: Any) -> None:
+    profiler = _task_profilers.pop(task_id, None)
+    if profiler is not None:
+        profiler.stop()
+
+
+class ProfileListAPIView(APIView):
+    permission_classes = (IsAdminUser,)
+    schema = None
+
+    def get(self, request: Request) -> Response:
+        return Response(list_profiles(request.query_params.get('label')))
+
+
+class ProfileDownloadAPIView(APIView):
+    permission_classes = (IsAdminUser,)
+    schema = None
+
+    def get(self, request: Request, profile_id: str, artifact: str) -> FileResponse:
+        # `format` would be taken by DRF for content negotiation
+        if not PROFILE_ID.match(profile_id) or artifact not in FORMATS:
+            raise Http404
+        path = get_profile_dir().joinpath(f'{profile_id}{FORMATS[artifact]}')
+        if not path.exists():
+            raise Http404
+        return FileResponse(path.open('rb'), as_attachment=True, filename=path.name)
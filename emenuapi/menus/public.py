@@ -0,0 +1,123 @@
+from typing import Any, Callable, Iterable, List, Optional, Tuple, cast
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.base import BaseHandler
+from django.core.handlers.exception import convert_exception_to_response
+from django.http import HttpRequest, HttpResponse
+from django.urls import Resolver404, get_resolver
+from django.utils.module_loading import import_string
+from menus.views import MenuModelViewSet
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.request import Request
+
+# media types of `Accept` DRF answers with JSON, requests with parameters or quality values aren't routed
+JSON_MEDIA_TYPES = ('application/json', 'application/*', '*/*')
+
+
+class JSONNegotiation(BaseContentNegotiation):
+    """
+    Picks the JSON renderer without parsing `Accept`, only requests accepting it are routed here.
+    """
+
+    def select_parser(self, request: Request, parsers: Iterable[BaseParser]) -> Optional[BaseParser]:
+        return None
+
+    def select_renderer(
+        self, request: Request, renderers: Iterable[BaseRenderer], format_suffix: Optional[str] = None
+    ) -> Tuple[BaseRenderer, str]:
+        renderer = next(renderer for renderer in renderers if isinstance(renderer, JSONRenderer))
+        return renderer, renderer.media_type
+
+
+class PublicMenuViewSet(MenuModelViewSet):
+    """
+    The menu views of anonymous reads: requests are neither authenticated nor negotiated.
+    """
+
+    authentication_classes: List[Any] = []
+    content_negotiation_class = JSONNegotiation  # type: ignore
+
+
+class PublicReadHandler(BaseHandler):
+    """
+    Handles requests with the middleware of `PUBLIC_READ_MIDDLEWARE` and the views of `PUBLIC_READ_URLCONF`.
+    """
+
+    def load_middleware(self, is_async: bool = False) -> None:
+        self._view_middleware: List[Callable] = []
+        self._template_response_middleware: List[Callable] = []
+        self._exception_middleware: List[Callable] = []
+
+        handler = convert_exception_to_response(self._get_response)  # type: ignore
+        for middleware_path in reversed(settings.PUBLIC_READ_MIDDLEWARE):
+            try:
+                instance = import_string(middleware_path)(handler)
+            except MiddlewareNotUsed:
+                continue
+            if hasattr(instance, 'process_view'):
+                self._view_middleware.insert(0, instance.process_view)
+            if hasattr(instance, 'process_template_response'):
+                self._template_response_middleware.append(instance.process_template_response)
+            if hasattr(instance, 'process_exception'):
+                self._exception_middleware.append(instance.process_exception)
+            handler = convert_exception_to_response(instance)
+        self._middleware_chain = handler
+
+    def handle(self, request: HttpRequest) -> HttpResponse:
+        setattr(request, 'urlconf', settings.PUBLIC_READ_URLCONF)
+        response = cast(HttpResponse, self._middleware_chain(request))
+        # set by `CommonMiddleware` of the full stack
+        if not response.streaming and not response.has_header('Content-Length'):
+            response['Content-Length'] = str(len(response.content))
+        return response
+
+
+def accepts_json(request: HttpRequest) -> bool:
+    accept = request.META.get('HTTP_ACCEPT', '')
+    if not accept:
+        return True
+    if ';' in accept or 'html' in accept:
+        return False
+    return any(media_type.strip() in JSON_MEDIA_TYPES for media_type in accept.split(','))
+
+
+def is_public_read(request: HttpRequest) -> bool:
+    """
+    Tells whether the request is an anonymous JSON read of the public menu views.
+    """
+    if request.method != 'GET' or 'HTTP_AUTHORIZATION' in request.META or 'format' in request.GET:
+        return False
+    if not accepts_json(request):
+        return False
+    try:
+        get_resolver(settings.PUBLIC_READ_URLCONF).resolve(request.path_info)
+    except Resolver404:
+        # e.g. missing trailing slashes, redirected by `CommonMiddleware`
+        return False
+    return True
+
+
+class PublicReadMiddleware:
+    """
+    With `PUBLIC_READ` on, anonymous JSON reads of the menus skip the rest of `MIDDLEWARE`
+    and are answered by `PublicReadHandler` instead. Their responses are the same, the layers
+    left out (sessions, CSRF, auth, messages, common, DRF authentication and content
+    negotiation) don't do anything for them.
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        if not settings.PUBLIC_READ:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.handler = PublicReadHandler()
+        self.handler.load_middleware()
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        # validates the host like the full stack does
+        request.get_host()
+        if is_public_read(request):
+            return self.handler.handle(request)
+        return self.get_response(request)
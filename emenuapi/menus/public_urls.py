@@ -0,0 +1,13 @@
+"""
+URLs of `PublicReadHandler`, the menu routes of `menus.urls` with views for anonymous reads.
+"""
+from django.urls import include, path
+from menus.public import PublicMenuViewSet
+from rest_framework.routers import SimpleRouter
+
+router = SimpleRouter()
+router.register(r'menus', PublicMenuViewSet, basename='menu')
+
+urlpatterns = [
+    path('api/', include((router.urls, 'menus'), namespace='menus')),
+]
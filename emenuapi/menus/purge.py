@@ -0,0 +1,100 @@
+import datetime
+import logging
+import os
+import time
+from typing import Iterable, List, Set, Type, cast
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import models, transaction
+from django.utils import timezone
+from menus.models import Dish, Menu
+
+logger = logging.getLogger(__name__)
+
+
+def purge_deleted(model: Type[models.Model], batch_size: int) -> int:
+    """
+    Deletes a batch of soft deleted rows of `model`, their M2M links and dish images.
+    Rows locked by a concurrent purge are skipped.
+    """
+    manager = model.all_objects  # type: ignore
+    with transaction.atomic():
+        pks = list(
+            manager.filter(deleted__isnull=False)
+            .select_for_update(skip_locked=True)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            return 0
+        images = (
+            list(manager.filter(pk__in=pks).exclude(image='').values_list('image', flat=True)) if model is Dish else []
+        )
+        # M2M links are deleted by the collector with one query per through table
+        manager.filter(pk__in=pks).delete()
+        if images:
+            # copies of dishes made by `menus.cloning` share the images of the originals
+            shared = set(manager.filter(image__in=images).values_list('image', flat=True))
+            images = [name for name in images if name not in shared]
+
+    delete_files(images)
+    logger.info('Purged %d deleted %s', len(pks), model._meta.verbose_name_plural)
+    return len(pks)
+
+
+def purge_deleted_menus_and_dishes(batch_size: int) -> bool:
+    """
+    Purges a batch of deleted menus and dishes and returns whether there's more to purge.
+    """
+    menus = purge_deleted(Menu, batch_size)
+    dishes = purge_deleted(Dish, batch_size)
+    return menus == batch_size or dishes == batch_size
+
+
+def delete_files(names: Iterable[str]) -> int:
+    """
+    Deletes files from the default storage in batches of `MEDIA_PURGE_BATCH_SIZE`,
+    pausing for `MEDIA_PURGE_DELAY` seconds between the batches to spread the I/O.
+    """
+    deleted = 0
+    for name in names:
+        if deleted and deleted % settings.MEDIA_PURGE_BATCH_SIZE == 0:
+            time.sleep(settings.MEDIA_PURGE_DELAY)
+        default_storage.delete(name)
+        deleted += 1
+    return deleted
+
+
+def find_orphaned_images(grace_period: datetime.timedelta, max_files: int) -> List[str]:
+    """
+    Lists dish images on disk that aren't referenced by any dish, including soft deleted
+    ones, which are left to the purge. Files younger than `grace_period` are skipped as
+    they may belong to uploads whose transactions haven't committed yet.
+    """
+    directory = cast(str, cast(models.FileField, Dish._meta.get_field('image')).upload_to)
+    try:
+        _, files = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return []
+
+    referenced: Set[str] = set(Dish.all_objects.exclude(image='').values_list('image', flat=True))
+    cutoff = timezone.now() - grace_period
+    orphans = []
+    for file in sorted(files):
+        name = os.path.join(directory, file)
+        if name in referenced or default_storage.get_modified_time(name) > cutoff:
+            continue
+        orphans.append(name)
+        if len(orphans) >= max_files:
+            break
+    return orphans
+
+
+def sweep_orphaned_images() -> int:
+    orphans = find_orphaned_images(
+        datetime.timedelta(seconds=settings.MEDIA_SWEEP_GRACE_PERIOD), settings.MEDIA_SWEEP_MAX_FILES
+    )
+    deleted = delete_files(orphans)
+    logger.info('Deleted %d orphaned dish images', deleted)
+    return deleted
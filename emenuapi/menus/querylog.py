@@ -0,0 +1,220 @@
+import contextvars
+import json
+import logging
+import random
+import re
+import time
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, cast
+
+from django.conf import settings
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.http import HttpRequest, HttpResponse
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PUBLIC = 'public'
+AUTHENTICATED = 'authenticated'
+TASK = 'task'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+budget_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('statement_budget', default=None)
+label_var: contextvars.ContextVar[str] = contextvars.ContextVar('query_label', default='')
+
+
+def fingerprint(sql: str) -> str:
+    """
+    Normalizes `sql` so that queries differing only in literals and lengths of `IN` lists match.
+    """
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'\b\d+(?:\.\d+)?\b', '?', sql)
+    sql = sql.replace('%s', '?')
+    sql = re.sub(r'\(\s*\?(?:\s*,\s*\?)*\s*\)', '(...)', sql)
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+def get_request_budget(request: HttpRequest) -> str:
+    # DRF authenticates in the view, after the first queries may have run, so credentials are
+    # recognized by the header alone
+    if request.method in SAFE_METHODS and 'HTTP_AUTHORIZATION' not in request.META:
+        return PUBLIC
+    return AUTHENTICATED
+
+
+def set_statement_timeout(connection: BaseDatabaseWrapper, cursor: Any, timeout: int) -> None:
+    """
+    Sets `statement_timeout` of the session unless it's already set to `timeout`.
+
+    In autocommit the value sticks to the session and is remembered on `connection`. Inside a
+    transaction `SET LOCAL` is used as a rollback would revert a plain `SET` behind our back,
+    so it's repeated on every query until the transaction ends.
+    """
+    if getattr(connection, 'statement_timeout', None) == timeout:
+        return
+    if connection.in_atomic_block:
+        cursor.execute('SET LOCAL statement_timeout = %s', [timeout])
+    else:
+        cursor.execute('SET statement_timeout = %s', [timeout])
+        setattr(connection, 'statement_timeout', timeout)
+
+
+def instrument(execute: Callable, sql: str, params: Any, many: bool, context: Dict[str, Any]) -> Any:
+    """
+    Database execute wrapper applying the statement timeout of the current budget and
+    recording queries slower than `SLOW_QUERY_THRESHOLD` milliseconds.
+    """
+    connection = context['connection']
+    budget = budget_var.get()
+    if budget is not None and connection.vendor == 'postgresql':
+        # the database cursor is used directly, bypassing the wrappers and query logging
+        set_statement_timeout(connection, context['cursor'].cursor, settings.STATEMENT_TIMEOUTS[budget])
+
+    start = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration = (time.perf_counter() - start) * 1000
+
+    if duration >= settings.SLOW_QUERY_THRESHOLD:
+        record_slow_query(connection, sql, None if many else params, duration)
+    return result
+
+
+def record_slow_query(connection: BaseDatabaseWrapper, sql: str, params: Any, duration: float) -> None:
+    label = label_var.get()
+    logger.warning('Slow query (%.0fms) in %s: %s', duration, label or '-', sql)
+
+    entry: Dict[str, Any] = {
+        'time': timezone.now().isoformat(),
+        'label': label,
+        'duration_ms': round(duration, 2),
+        'fingerprint': fingerprint(sql),
+        'sql': sql,
+    }
+    if should_explain(connection, sql, params):
+        entry['plan'] = explain(connection, sql, params)
+    get_store().info(json.dumps(entry))
+
+
+def should_explain(connection: BaseDatabaseWrapper, sql: str, params: Any) -> bool:
+    # ANALYZE runs the statement again, so only reads are explained, and only outside of
+    # transactions where a failing EXPLAIN would abort the transaction of the caller
+    if connection.vendor != 'postgresql' or params is None or connection.in_atomic_block:
+        return False
+    return sql.lstrip()[:6].upper() == 'SELECT' and random.random() < settings.SLOW_QUERY_EXPLAIN_RATE  # nosec
+
+
+def explain(connection: BaseDatabaseWrapper, sql: str, params: Any) -> Any:
+    try:
+        # a new cursor keeps the results of the explained query intact
+        with connection.connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}', params)
+            return cursor.fetchone()[0]
+    except Exception as error:  # noqa: B902
+        logger.warning('Could not explain slow query: %s', error)
+        return None
+
+
+def get_store() -> logging.Logger:
+    """
+    Returns the logger writing slow queries as JSON lines to `SLOW_QUERY_LOG_FILE`,
+    rotated after `SLOW_QUERY_LOG_MAX_BYTES` with `SLOW_QUERY_LOG_BACKUP_COUNT` old files kept.
+    """
+    store = logging.getLogger('menus.querylog.store')
+    path = Path(settings.SLOW_QUERY_LOG_FILE)
+    if not any(getattr(handler, 'baseFilename', None) == str(path.absolute()) for handler in store.handlers):
+        for handler in store.handlers[:]:
+            store.removeHandler(handler)
+            handler.close()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        store.addHandler(
+            RotatingFileHandler(
+                path, maxBytes=settings.SLOW_QUERY_LOG_MAX_BYTES, backupCount=settings.SLOW_QUERY_LOG_BACKUP_COUNT
+            )
+        )
+        store.setLevel(logging.INFO)
+        store.propagate = False
+    return store
+
+
+def read_store() -> Iterator[Dict[str, Any]]:
+    path = Path(settings.SLOW_QUERY_LOG_FILE)
+    files = [path.with_name(f'{path.name}.{index}') for index in range(settings.SLOW_QUERY_LOG_BACKUP_COUNT, 0, -1)]
+    for file in [*files, path]:
+        if not file.exists():
+            continue
+        with file.open() as lines:
+            for line in lines:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def summarize(entries: Iterator[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Groups slow queries by fingerprint, most expensive in total first.
+    """
+    groups: Dict[str, Dict[str, Any]] = {}
+    for entry in entries:
+        group = groups.setdefault(
+            entry['fingerprint'],
+            {
+                'fingerprint': entry['fingerprint'],
+                'count': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'labels': {},
+                'plan': None,
+            },
+        )
+        group['count'] += 1
+        group['total_ms'] += entry['duration_ms']
+        group['max_ms'] = max(group['max_ms'], entry['duration_ms'])
+        group['labels'][entry['label']] = group['labels'].get(entry['label'], 0) + 1
+        if entry.get('plan') is not None:
+            group['plan'] = entry['plan']
+
+    for group in groups.values():
+        group['mean_ms'] = group['total_ms'] / group['count']
+    return sorted(groups.values(), key=lambda group: cast(float, group['total_ms']), reverse=True)
+
+
+class QueryBudgetMiddleware:
+    """
+    Applies the statement timeout budget of the request and labels its slow queries with the view.
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        budget_token = budget_var.set(get_request_budget(request))
+        label_token = label_var.set(f'{request.method} {request.path}')
+        try:
+            return self.get_response(request)
+        finally:
+            budget_var.reset(budget_token)
+            label_var.reset(label_token)
+
+    def process_view(self, request: HttpRequest, view_func: Callable, view_args: Any, view_kwargs: Any) -> None:
+        if request.resolver_match is not None:
+            label_var.set(f'{request.method} {request.resolver_match.view_name}')
+
+
+def task_prerun(task: Any = None, **kwargs: Any) -> None:
+    budget_var.set(TASK)
+    label_var.set(f'task {getattr(task, "name", "")}')
+
+
+def task_postrun(**kwargs: Any) -> None:
+    budget_var.set(None)
+    label_var.set('')
+
+
+def install(connection: BaseDatabaseWrapper, **kwargs: Any) -> None:
+    # a new database session starts with the server default timeout
+    setattr(connection, 'statement_timeout', None)
+    if instrument not in connection.execute_wrappers:
+        connection.execute_wrappers.append(instrument)
@@ -0,0 +1,136 @@
+import gzip
+import hashlib
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, NamedTuple, Optional, cast
+
+from django.apps import apps
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.views import View
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# drf_spectacular is only installed by the dev settings, elsewhere the schema decorators of the views do nothing
+if TYPE_CHECKING or apps.is_installed('drf_spectacular'):
+    from drf_spectacular.types import OpenApiTypes
+    from drf_spectacular.utils import OpenApiParameter, extend_schema
+else:
+
+    class OpenApiParameter:
+        QUERY, PATH, HEADER, COOKIE = 'query', 'path', 'header', 'cookie'
+
+        def __init__(self, *args: Any, **kwargs: Any) -> None:
+            pass
+
+    class TypeNames:
+        def __getattr__(self, name: str) -> str:
+            return name
+
+    OpenApiTypes = TypeNames()
+
+    def extend_schema(*args: Any, **kwargs: Any) -> Callable[[Any], Any]:
+        return lambda view: view
+
+
+CONTENT_TYPE = 'application/vnd.oai.openapi; charset=utf-8'
+
+
+class SchemaVariant(NamedTuple):
+    content: bytes
+    etag: str
+
+
+def generate_schema() -> bytes:
+    # drf_spectacular is only installed by the dev settings, so it is imported on demand
+    from drf_spectacular.renderers import OpenApiYamlRenderer
+    from drf_spectacular.settings import spectacular_settings
+
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=True)
+    return cast(bytes, OpenApiYamlRenderer().render(schema, renderer_context={}))  # type: ignore
+
+
+def compress(content: bytes) -> Dict[str, SchemaVariant]:
+    digest = hashlib.sha256(content).hexdigest()[:32]
+    variants = {
+        'identity': SchemaVariant(content, f'"{digest}"'),
+        'gzip': SchemaVariant(gzip.compress(content, compresslevel=9, mtime=0), f'"{digest}-gzip"'),
+    }
+    if brotli is not None:
+        variants['br'] = SchemaVariant(brotli.compress(content), f'"{digest}-br"')
+    return variants
+
+
+def accepted_encodings(header: str) -> List[str]:
+    encodings = []
+    for part in header.split(','):
+        encoding, *params = [item.strip() for item in part.split(';')]
+        quality = 1.0
+        for param in params:
+            if param.startswith('q='):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if encoding and quality > 0:
+            encodings.append(encoding.lower())
+    return encodings
+
+
+class SchemaView(View):
+    """
+    Serves the OpenAPI schema from memory.
+
+    The schema is read from `SCHEMA_FILE`, built with `manage.py build_schema`, or generated
+    on the first request when the file doesn't exist and `drf_spectacular` is installed.
+    Gzip and brotli variants are compressed once, next to the ETag of each variant.
+    """
+
+    _variants: Optional[Dict[str, SchemaVariant]] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_variants(cls) -> Dict[str, SchemaVariant]:
+        if cls._variants is None:
+            with cls._lock:
+                if cls._variants is None:
+                    cls._variants = compress(cls.load_schema())
+        return cls._variants
+
+    @classmethod
+    def load_schema(cls) -> bytes:
+        try:
+            return settings.SCHEMA_FILE.read_bytes()
+        except FileNotFoundError:
+            if not apps.is_installed('drf_spectacular'):
+                raise
+            return generate_schema()
+
+    @classmethod
+    def reset(cls) -> None:
+        cls._variants = None
+
+    def get(self, request: HttpRequest) -> HttpResponse:
+        variants = self.get_variants()
+        encodings = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        encoding = next(
+            (encoding for encoding in ('br', 'gzip') if encoding in encodings and encoding in variants), None
+        )
+        variant = variants[encoding or 'identity']
+
+        if_none_match = [etag.strip() for etag in request.META.get('HTTP_IF_NONE_MATCH', '').split(',')]
+        if variant.etag in if_none_match or f'W/{variant.etag}' in if_none_match:
+            response: HttpResponse = HttpResponseNotModified()
+        else:
+            response = HttpResponse(variant.content, content_type=CONTENT_TYPE)
+            if encoding:
+                response['Content-Encoding'] = encoding
+
+        response['ETag'] = variant.etag
+        response['Cache-Control'] = f'public, max-age={settings.SCHEMA_MAX_AGE}'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
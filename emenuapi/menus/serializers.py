@@ -1,10 +1,16 @@
 import decimal
 from typing import cast
 
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
+from menus.events import publish
+from menus.fields import BulkPrimaryKeyRelatedField
+from menus.fragments import FragmentCacheListSerializer
 from menus.models import Dish, Menu
+from menus.uploads import check_photo_type
 from rest_framework import serializers
-from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.validators import UniqueValidator
 
 
 class DishSerializer(serializers.ModelSerializer):
@@ -22,29 +28,90 @@ class DishSerializer(serializers.ModelSerializer):
             'updated',
         )
         read_only_fields = ('created', 'updated', 'image')
+        list_serializer_class = FragmentCacheListSerializer
 
     def validate_price(self, value: decimal.Decimal) -> decimal.Decimal:
         if value <= 0:
             raise serializers.ValidationError('Price must be positive.')
         return value
 
+    def create(self, validated_data: dict) -> Dish:
+        dish = cast(Dish, super().create(validated_data))
+        publish(dish)
+        return dish
+
     def update(self, instance: Dish, validated_data: dict) -> Dish:
         data = {**validated_data, 'updated': timezone.now()}
-        dish = super().update(instance, data)
-        return cast(Dish, dish)
+        dish = cast(Dish, super().update(instance, data))
+        publish(dish)
+        return dish
 
 
 class MenuSerializer(serializers.ModelSerializer):
-    dishes = PrimaryKeyRelatedField(queryset=Dish.objects.all(), many=True)
+    # names are unique among menus that aren't deleted, see `Menu.Meta.constraints`
+    name = serializers.CharField(
+        max_length=255,
+        validators=[UniqueValidator(queryset=Menu.objects.all(), message='menu with this name already exists.')],
+    )
+    dishes = BulkPrimaryKeyRelatedField(queryset=Dish.objects.all(), many=True)
 
     class Meta:
         model = Menu
         fields = ('id', 'name', 'description', 'dishes', 'created', 'updated')
         read_only_fields = ('created', 'updated')
 
+    # the menu and its dishes are saved together, so their change events go out as one
+    @transaction.atomic(savepoint=False)
+    def create(self, validated_data: dict) -> Menu:
+        dishes = validated_data.pop('dishes', None)
+        menu = cast(Menu, super().create(validated_data))
+        if dishes is not None:
+            menu.set_dishes(dishes, is_new=True)
+        publish(menu)
+        return menu
+
+    @transaction.atomic(savepoint=False)
     def update(self, instance: Menu, validated_data: dict) -> Menu:
+        dishes = validated_data.pop('dishes', None)
         data = {**validated_data, 'updated': timezone.now()}
-        return cast(Menu, super().update(instance, data))
+        menu = cast(Menu, super().update(instance, data))
+        if dishes is not None:
+            menu.set_dishes(dishes)
+        publish(menu)
+        return menu
+
+
+class MenuCloneSerializer(serializers.Serializer):
+    name = serializers.CharField(
+        max_length=255,
+        required=False,
+        validators=[UniqueValidator(queryset=Menu.objects.all(), message='menu with this name already exists.')],
+    )
+    copy_dishes = serializers.BooleanField(default=False)
+
+
+class PhotoUploadInitSerializer(serializers.Serializer):
+    filename = serializers.CharField(max_length=255)
+    content_type = serializers.CharField()
+    size = serializers.IntegerField(min_value=1)
+
+    def validate_size(self, value: int) -> int:
+        if value > settings.PHOTO_MAX_SIZE:
+            raise serializers.ValidationError(f'Ensure the photo is not larger than {settings.PHOTO_MAX_SIZE} bytes.')
+        return value
+
+    def validate(self, attrs: dict) -> dict:
+        check_photo_type(attrs['filename'], attrs['content_type'])
+        return attrs
+
+
+class PhotoUploadSerializer(serializers.Serializer):
+    id = serializers.CharField()
+    filename = serializers.CharField()
+    content_type = serializers.CharField()
+    size = serializers.IntegerField()
+    offset = serializers.IntegerField()
+    created = serializers.DateTimeField()
 
 
 class MenuDetailsSerializer(serializers.ModelSerializer):
@@ -53,3 +120,81 @@ class MenuDetailsSerializer(serializers.ModelSerializer):
     class Meta:
         model = Menu
         fields = ('id', 'name', 'description', 'dishes', 'created', 'updated')
+
+
+class MenuDishesPreviewSerializer(MenuDetailsSerializer):
+    # the first page of `/api/menus/{menu_id}/dishes/` and the link to the next one, set by the view
+    dishes = DishSerializer(many=True, source='dishes_page')
+    dishes_next = serializers.URLField(allow_null=True)
+
+    class Meta:
+        model = Menu
+        fields = ('id', 'name', 'description', 'dishes', 'dishes_next', 'created', 'updated')
+
+
+class PriceBucketSerializer(serializers.Serializer):
+    min = serializers.DecimalField(max_digits=6, decimal_places=2, allow_null=True)
+    max = serializers.DecimalField(max_digits=6, decimal_places=2, allow_null=True)
+    count = serializers.IntegerField()
+
+
+class TimeToPrepareBucketSerializer(serializers.Serializer):
+    min = serializers.IntegerField(allow_null=True)
+    max = serializers.IntegerField(allow_null=True)
+    count = serializers.IntegerField()
+
+
+class DishFacetsSerializer(serializers.Serializer):
+    is_vegetarian = serializers.DictField(child=serializers.IntegerField())
+    price = PriceBucketSerializer(many=True)
+    time_to_prepare = TimeToPrepareBucketSerializer(many=True)
+
+
+class PriceAdjustmentSerializer(serializers.Serializer):
+    percentage = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
+    amount = serializers.DecimalField(max_digits=6, decimal_places=2, required=False)
+    round_to = serializers.DecimalField(
+        max_digits=6, decimal_places=2, min_value=decimal.Decimal('0.01'), default=decimal.Decimal('0.01')
+    )
+    rounding = serializers.ChoiceField(choices=['nearest', 'up', 'down'], default='nearest')
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate(self, attrs: dict) -> dict:
+        if ('percentage' in attrs) == ('amount' in attrs):
+            raise serializers.ValidationError('Either percentage or amount is required.')
+        return attrs
+
+
+class PriceAdjustmentResultSerializer(serializers.Serializer):
+    count = serializers.IntegerField()
+    changed = serializers.IntegerField()
+    dry_run = serializers.BooleanField()
+    min = serializers.DecimalField(max_digits=6, decimal_places=2, allow_null=True)
+    max = serializers.DecimalField(max_digits=6, decimal_places=2, allow_null=True)
+    price = PriceBucketSerializer(many=True)
+
+
+class DishSearchSerializer(serializers.Serializer):
+    count = serializers.IntegerField()
+    next = serializers.URLField(allow_null=True)
+    previous = serializers.URLField(allow_null=True)
+    results = DishSerializer(many=True)
+    facets = DishFacetsSerializer()
+
+
+class DishMenuSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Menu
+        fields = ('id', 'name', 'description', 'created', 'updated')
+
+
+class DishMenusPageSerializer(serializers.Serializer):
+    next = serializers.URLField(allow_null=True)
+    previous = serializers.URLField(allow_null=True)
+    results = DishMenuSerializer(many=True)
+
+
+class MenuDishesPageSerializer(serializers.Serializer):
+    next = serializers.URLField(allow_null=True)
+    previous = serializers.URLField(allow_null=True)
+    results = DishSerializer(many=True)
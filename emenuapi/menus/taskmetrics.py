@@ -0,0 +1,161 @@
+import datetime
+import resource
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.http import HttpResponse
+from menus.counters import incr_many
+from rest_framework.permissions import IsAdminUser
+from rest_framework.request import Request
+from rest_framework.views import APIView
+
+ENQUEUED_HEADER = 'enqueued_at'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+OUTCOMES = ('SUCCESS', 'FAILURE', 'RETRY', 'REJECTED', 'IGNORED')
+
+# name: help, setting with the bucket bounds
+HISTOGRAMS = {
+    'celery_task_queue_wait_seconds': (
+        'Time from publishing or eta to the start of a task.',
+        'TASK_METRICS_TIME_BUCKETS',
+    ),
+    'celery_task_runtime_seconds': ('Time a task ran for.', 'TASK_METRICS_TIME_BUCKETS'),
+    'celery_task_memory_delta_bytes': (
+        'Growth of the peak resident memory of the worker during a task.',
+        'TASK_METRICS_MEMORY_BUCKETS',
+    ),
+}
+OUTCOMES_COUNTER = 'celery_task_outcomes_total'
+
+# sums are kept as integers for atomic increments
+SUM_SCALE = 10**6
+
+_started: Dict[str, Tuple[float, int]] = {}
+
+
+def get_cache() -> BaseCache:
+    return caches[settings.TASK_METRICS_CACHE]
+
+
+def increment(values: Dict[str, int]) -> None:
+    incr_many(get_cache(), values)
+
+
+def get_buckets(metric: str) -> Sequence[float]:
+    return sorted(getattr(settings, HISTOGRAMS[metric][1]))
+
+
+def observe(metric: str, task: str, value: float) -> None:
+    """
+    Adds `value` to the histogram `metric` of `task`, only the bucket it falls into is incremented.
+    """
+    bucket = next((str(bound) for bound in get_buckets(metric) if value <= bound), '+Inf')
+    increment(
+        {
+            f'taskmetrics:{metric}:{task}:bucket:{bucket}': 1,
+            f'taskmetrics:{metric}:{task}:count': 1,
+            f'taskmetrics:{metric}:{task}:sum': round(max(value, 0) * SUM_SCALE),
+        }
+    )
+
+
+def get_max_rss() -> int:
+    # kilobytes on Linux, bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def get_queue_wait(request: Any, started: float) -> Optional[float]:
+    headers = getattr(request, 'headers', None) or {}
+    enqueued_at = getattr(request, ENQUEUED_HEADER, None) or headers.get(ENQUEUED_HEADER)
+    if enqueued_at is None:
+        return None
+
+    ready = float(enqueued_at)
+    eta = getattr(request, 'eta', None)
+    if eta:
+        # delayed tasks wait for their eta on purpose
+        eta_time = eta if isinstance(eta, datetime.datetime) else datetime.datetime.fromisoformat(eta)
+        ready = max(ready, eta_time.timestamp())
+    return started - ready
+
+
+def before_task_publish(headers: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+    if settings.TASK_METRICS and headers is not None:
+        headers.setdefault(ENQUEUED_HEADER, time.time())
+
+
+def task_prerun(task_id: str = '', task: Any = None, **kwargs: Any) -> None:
+    if not settings.TASK_METRICS:
+        return
+    wait = get_queue_wait(getattr(task, 'request', None), time.time())
+    if wait is not None:
+        observe('celery_task_queue_wait_seconds', task.name, wait)
+    _started[task_id] = (time.perf_counter(), get_max_rss())
+
+
+def task_postrun(task_id: str = '', task: Any = None, state: Optional[str] = None, **kwargs: Any) -> None:
+    started = _started.pop(task_id, None)
+    if started is None or task is None:
+        return
+
+    start, max_rss = started
+    observe('celery_task_runtime_seconds', task.name, time.perf_counter() - start)
+    observe('celery_task_memory_delta_bytes', task.name, get_max_rss() - max_rss)
+    increment({f'taskmetrics:{OUTCOMES_COUNTER}:{task.name}:{state or "UNKNOWN"}': 1})
+
+
+def get_task_names() -> List[str]:
+    from emenuapi.celery import app
+
+    return sorted(name for name in app.tasks if not name.startswith('celery.'))
+
+
+def format_bound(bound: Any) -> str:
+    return str(float(bound)) if not isinstance(bound, str) else bound
+
+
+def render(task_names: Iterable[str]) -> str:
+    """
+    Renders the metrics of `task_names` in the Prometheus text exposition format.
+    """
+    task_names = list(task_names)
+    keys = []
+    for metric in HISTOGRAMS:
+        for task in task_names:
+            keys += [f'taskmetrics:{metric}:{task}:bucket:{bound}' for bound in [*get_buckets(metric), '+Inf']]
+            keys += [f'taskmetrics:{metric}:{task}:count', f'taskmetrics:{metric}:{task}:sum']
+    keys += [f'taskmetrics:{OUTCOMES_COUNTER}:{task}:{outcome}' for task in task_names for outcome in OUTCOMES]
+    values = get_cache().get_many(keys)
+
+    lines = []
+    for metric, (help_text, _) in HISTOGRAMS.items():
+        lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} histogram']
+        for task in task_names:
+            cumulative = 0
+            for bound in [*get_buckets(metric), '+Inf']:
+                cumulative += values.get(f'taskmetrics:{metric}:{task}:bucket:{bound}', 0)
+                lines.append(f'{metric}_bucket{{task="{task}",le="{format_bound(bound)}"}} {cumulative}')
+            total = values.get(f'taskmetrics:{metric}:{task}:sum', 0) / SUM_SCALE
+            lines.append(f'{metric}_sum{{task="{task}"}} {total}')
+            lines.append(f'{metric}_count{{task="{task}"}} {values.get(f"taskmetrics:{metric}:{task}:count", 0)}')
+
+    lines += [f'# HELP {OUTCOMES_COUNTER} Finished tasks by state.', f'# TYPE {OUTCOMES_COUNTER} counter']
+    for task in task_names:
+        for outcome in OUTCOMES:
+            count = values.get(f'taskmetrics:{OUTCOMES_COUNTER}:{task}:{outcome}', 0)
+            lines.append(f'{OUTCOMES_COUNTER}{{task="{task}",outcome="{outcome.lower()}"}} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+class TaskMetricsAPIView(APIView):
+    permission_classes = (IsAdminUser,)
+    schema = None
+
+    def get(self, request: Request) -> HttpResponse:
+        return HttpResponse(render(get_task_names()), content_type=CONTENT_TYPE)
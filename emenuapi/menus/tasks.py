@@ -8,6 +8,9 @@ from django.core.mail import send_mass_mail
 from django.template.loader import render_to_string
 from django.utils import timezone
 from menus.models import Dish
+from menus.popularity import flush_view_counts
+from menus.purge import purge_deleted_menus_and_dishes, sweep_orphaned_images
+from menus.uploads import delete_expired_uploads
 
 from emenuapi.celery import app
 
@@ -52,3 +55,24 @@ def send_dish_report() -> int:
 def report_dishes() -> None:
     send_dish_report()
     return
+
+
+@app.task
+def purge_deleted() -> None:
+    if purge_deleted_menus_and_dishes(settings.PURGE_BATCH_SIZE):
+        purge_deleted.apply_async(countdown=settings.PURGE_BATCH_DELAY)
+
+
+@app.task
+def sweep_media() -> None:
+    sweep_orphaned_images()
+    delete_expired_uploads()
+
+
+@app.task
+def flush_views() -> None:
+    flushed = flush_view_counts(settings.VIEW_COUNTS_FLUSH_BATCH_SIZE)
+    if flushed is None:
+        logger.info('Skipped flushing views, the previous flush is still running')
+    else:
+        logger.info('Flushed %d views', flushed)
@@ -0,0 +1,197 @@
+import datetime
+import time
+from unittest import mock
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from menus.catalog import CatalogSnapshot, apply_changes, load_state
+from menus.factories import DishFactory, MenuFactory, UserFactory
+from menus.models import Menu
+from rest_framework.test import APITestCase
+
+
+class StaticSnapshot(CatalogSnapshot):
+    def start(self):
+        pass
+
+
+class CatalogStateTest(TestCase):
+    def setUp(self):
+        self.dishes = DishFactory.create_batch(2)
+        self.menu = MenuFactory(dishes=self.dishes)
+        self.empty_menu = MenuFactory(dishes=[])
+
+    def test_load_state(self):
+        state = load_state()
+
+        self.assertEqual(list(state.menus), [self.menu.pk])
+        self.assertEqual(state.menus[self.menu.pk].name, self.menu.name)
+        self.assertEqual(set(state.menus[self.menu.pk].dishes), {dish.pk for dish in self.dishes})
+        self.assertEqual(set(state.dishes), {dish.pk for dish in self.dishes})
+
+    def test_apply_changes(self):
+        state = load_state()
+        self.dishes[0].name = 'Updated dish'
+        self.dishes[0].save()
+        self.empty_menu.dishes.set([self.dishes[1]])
+        dish = DishFactory()
+        self.menu.dishes.add(dish)
+
+        new_state = apply_changes(state, {self.empty_menu.pk, self.menu.pk}, {self.dishes[0].pk})
+
+        self.assertEqual(new_state.dishes[self.dishes[0].pk].name, 'Updated dish')
+        self.assertEqual(set(new_state.menus), {self.menu.pk, self.empty_menu.pk})
+        self.assertIn(dish.pk, new_state.dishes)
+        # the published state is left intact
+        self.assertEqual(set(state.menus), {self.menu.pk})
+
+    def test_deleted_dish_hides_menu(self):
+        menu = MenuFactory(dishes=[self.dishes[0]])
+        state = load_state()
+        self.dishes[0].soft_delete()
+
+        new_state = apply_changes(state, set(), {self.dishes[0].pk})
+
+        self.assertNotIn(menu.pk, new_state.menus)
+        self.assertNotIn(self.dishes[0].pk, new_state.dishes)
+        self.assertEqual(new_state.menus[self.menu.pk].dishes, (self.dishes[1].pk,))
+
+    @override_settings(CATALOG_SNAPSHOT_MAX_STALENESS=5)
+    def test_stale_state_is_not_used(self):
+        snapshot = StaticSnapshot()
+        snapshot.reload()
+
+        self.assertIsNotNone(snapshot.get_state())
+
+        snapshot.synced_at -= 10
+
+        self.assertIsNone(snapshot.get_state())
+
+    @override_settings(CATALOG_SNAPSHOT_MAX_CHANGES=1)
+    def test_many_changes_reload(self):
+        snapshot = StaticSnapshot()
+        snapshot.reload()
+        state = snapshot.state
+
+        with mock.patch.object(snapshot, 'reload') as reload:
+            snapshot.update(['menu:1', 'dish:2'], time.monotonic())
+
+        reload.assert_called_once()
+        self.assertIs(snapshot.state, state)
+
+
+@override_settings(CATALOG_SNAPSHOT=True)
+class CatalogSnapshotViewTest(APITestCase):
+    def setUp(self):
+        self.dishes = DishFactory.create_batch(3, image='menus/dish/photo.png')
+        with mock.patch(
+            'django.utils.timezone.now', return_value=datetime.datetime(2021, 10, 1, tzinfo=datetime.timezone.utc)
+        ):
+            self.first_menu = MenuFactory(name='Breakfast', dishes=self.dishes[:2])
+        self.second_menu = MenuFactory(name='dinner', dishes=self.dishes)
+        self.third_menu = MenuFactory(name='Brunch', dishes=self.dishes[2:])
+        self.empty_menu = MenuFactory(dishes=[])
+
+        self.snapshot = StaticSnapshot()
+        self.snapshot.reload()
+        patcher = mock.patch('menus.catalog.snapshot', self.snapshot)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assert_parity(self, url, params=None):
+        with self.assertNumQueries(0):
+            response = self.client.get(url, params)
+        if response.status_code == 200:
+            self.assertIn('X-Catalog-Staleness', response)
+
+        with override_settings(CATALOG_SNAPSHOT=False):
+            expected = self.client.get(url, params)
+
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.json(), expected.json())
+        return response
+
+    def test_list(self):
+        response = self.assert_parity(reverse('menus:menu-list'))
+
+        self.assertEqual(len(response.json()), 3)
+
+    def test_list_search_and_ordering(self):
+        self.assert_parity(reverse('menus:menu-list'), {'search': 'br'})
+        self.assert_parity(reverse('menus:menu-list'), {'search': 'BR,fast'})
+        self.assert_parity(reverse('menus:menu-list'), {'ordering': 'num_dishes'})
+        self.assert_parity(reverse('menus:menu-list'), {'ordering': '-num_dishes'})
+        self.assert_parity(reverse('menus:menu-list'), {'ordering': 'description'})
+
+    def test_list_ordering_by_name_uses_database_collation(self):
+        MenuFactory(name='apple', dishes=self.dishes[:1])
+
+        with override_settings(CATALOG_SNAPSHOT=False):
+            expected = self.client.get(reverse('menus:menu-list'), {'ordering': 'name'})
+
+        response = self.client.get(reverse('menus:menu-list'), {'ordering': 'name'})
+
+        self.assertEqual(response.json(), expected.json())
+        self.assertNotIn('X-Catalog-Staleness', response)
+
+    def test_list_date_ranges(self):
+        self.assert_parity(reverse('menus:menu-list'), {'created_after': '2021-10-02T00:00:00Z'})
+        self.assert_parity(reverse('menus:menu-list'), {'created_before': '2021-10-02T00:00:00Z'})
+        self.assert_parity(reverse('menus:menu-list'), {'updated_after': '2021-10-02T00:00:00Z'})
+
+    def test_invalid_date_range(self):
+        response = self.client.get(reverse('menus:menu-list'), {'created_after': 'yesterday'})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_retrieve(self):
+        self.assert_parity(reverse('menus:menu-detail', kwargs=dict(menu_id=self.first_menu.pk)))
+        self.assert_parity(reverse('menus:menu-detail', kwargs=dict(menu_id=self.second_menu.pk)), {'search': 'x'})
+
+    def test_retrieve_hidden_menu(self):
+        self.assert_parity(reverse('menus:menu-detail', kwargs=dict(menu_id=self.empty_menu.pk)))
+
+    def test_authenticated_user_reads_database(self):
+        self.client.force_authenticate(UserFactory())
+
+        response = self.client.get(reverse('menus:menu-list'))
+
+        self.assertNotIn('X-Catalog-Staleness', response)
+        self.assertEqual(len(response.json()), 4)
+
+    def test_stale_snapshot_reads_database(self):
+        self.snapshot.synced_at -= 3600
+
+        response = self.client.get(reverse('menus:menu-list'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Catalog-Staleness', response)
+
+
+@override_settings(CATALOG_SNAPSHOT_POLL_INTERVAL=0.05)
+class CatalogListenerTest(TransactionTestCase):
+    def wait_for(self, condition):
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            if condition():
+                return
+            time.sleep(0.05)
+        self.fail('Catalog snapshot was not refreshed')
+
+    def test_refresh_on_notify(self):
+        dish = DishFactory()
+        menu = MenuFactory(dishes=[dish])
+        snapshot = CatalogSnapshot()
+        snapshot.start()
+        self.addCleanup(snapshot.stop)
+
+        self.wait_for(lambda: snapshot.get_state() is not None)
+        self.assertIn(menu.pk, snapshot.get_state().menus)
+
+        Menu.objects.filter(pk=menu.pk).update(name='Renamed')
+
+        self.wait_for(lambda: snapshot.get_state().menus[menu.pk].name == 'Renamed')
+
+        menu.dishes.clear()
+
+        self.wait_for(lambda: menu.pk not in snapshot.get_state().menus)
@@ -0,0 +1,53 @@
+import os
+import subprocess  # nosec
+import sys
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase
+from menus.management.commands.check_startup import TARGETS, total_import_time
+
+
+class TotalImportTimeTest(SimpleTestCase):
+    def test_sum_top_level_imports(self):
+        lines = [
+            'import time: self [us] | cumulative | imported package',
+            'import time:       100 |        100 |   encodings.aliases',
+            'import time:       200 |        300 | encodings',
+            'import time:       500 |       1500 | emenuapi.wsgi',
+            'unrelated output',
+        ]
+
+        self.assertEqual(total_import_time(lines), 1800)
+
+
+class CheckStartupCommandTest(SimpleTestCase):
+    def test_within_budget(self):
+        stdout = StringIO()
+
+        call_command(
+            'check_startup', target=['worker'], repeat=1, import_budget=10**6, rss_budget=10**6, stdout=stdout
+        )
+
+        self.assertIn('worker', stdout.getvalue())
+
+    def test_over_budget(self):
+        with self.assertRaisesMessage(CommandError, 'wsgi RSS'):
+            call_command(
+                'check_startup', target=['wsgi'], repeat=1, import_budget=10**6, rss_budget=1, stdout=StringIO()
+            )
+
+
+class ProdImportsTest(SimpleTestCase):
+    def test_schema_generator_is_not_imported(self):
+        target = TARGETS['wsgi']
+        result = subprocess.run(  # nosec
+            [sys.executable, '-c', target.code + "; import sys; print('drf_spectacular' in sys.modules)"],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': target.settings_module},
+            capture_output=True,
+            text=True,
+        )
+
+        self.assertEqual(result.stdout.strip(), 'False', result.stderr)
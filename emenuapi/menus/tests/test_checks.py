@@ -0,0 +1,36 @@
+from django.test import SimpleTestCase, override_settings
+from menus.checks import check_shared_caches
+
+MEMCACHED = {'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache', 'LOCATION': 'memcached:11211'}
+LOCMEM = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+
+
+class SharedCachesCheckTest(SimpleTestCase):
+    @override_settings(VIEW_COUNTS=True, CACHES={'default': LOCMEM, 'shared': LOCMEM})
+    def test_process_local_cache(self):
+        errors = check_shared_caches()
+
+        self.assertEqual([error.id for error in errors], ['menus.E001'])
+        self.assertIn('VIEW_COUNTS', errors[0].msg)
+
+    @override_settings(TASK_METRICS=True, CACHES={'default': LOCMEM, 'shared': LOCMEM})
+    def test_task_metrics(self):
+        errors = check_shared_caches()
+
+        self.assertEqual([error.id for error in errors], ['menus.E001'])
+        self.assertIn('TASK_METRICS', errors[0].msg)
+
+    @override_settings(COALESCING=True, COALESCING_CACHE=None, CACHES={'default': LOCMEM, 'shared': LOCMEM})
+    def test_coalescing_stats(self):
+        errors = check_shared_caches()
+
+        self.assertEqual([error.id for error in errors], ['menus.E001'])
+        self.assertIn('COALESCING_STATS_CACHE', errors[0].msg)
+
+    @override_settings(VIEW_COUNTS=True, CACHES={'default': LOCMEM, 'shared': MEMCACHED})
+    def test_shared_cache(self):
+        self.assertEqual(check_shared_caches(), [])
+
+    @override_settings(VIEW_COUNTS=False, CACHES={'default': LOCMEM, 'shared': LOCMEM})
+    def test_feature_off(self):
+        self.assertEqual(check_shared_caches(), [])
@@ -0,0 +1,91 @@
+from django.urls import reverse
+from menus.cloning import clone_name
+from menus.factories import DishFactory, MenuFactory, UserFactory
+from menus.models import Dish, Menu
+from rest_framework.test import APITestCase
+
+
+class CloneMenuTest(APITestCase):
+    def setUp(self):
+        self.dishes = [DishFactory(image='menus/dish/photo.png'), DishFactory()]
+        self.deleted_dish = DishFactory()
+        self.menu = MenuFactory(name='Lunch', dishes=[*self.dishes, self.deleted_dish])
+        self.deleted_dish.soft_delete()
+        self.url = reverse('menus:menu-clone', kwargs=dict(menu_id=self.menu.pk))
+        self.client.force_authenticate(UserFactory())
+
+    def test_clone(self):
+        response = self.client.post(self.url)
+
+        self.assertEqual(response.status_code, 201)
+        clone = Menu.objects.get(pk=response.json()['id'])
+        self.assertEqual(response.json()['name'], 'Lunch (copy)')
+        self.assertEqual(response.json()['description'], self.menu.description)
+        self.assertIsNone(response.json()['updated'])
+        self.assertEqual(sorted(response.json()['dishes']), [dish.pk for dish in self.dishes])
+        self.assertEqual(sorted(clone.dishes.values_list('pk', flat=True)), [dish.pk for dish in self.dishes])
+        self.assertEqual(Dish.all_objects.count(), 3)
+
+    def test_copy_dishes(self):
+        response = self.client.post(self.url, {'copy_dishes': True})
+
+        self.assertEqual(response.status_code, 201)
+        copies = list(Dish.objects.filter(pk__in=response.json()['dishes']).order_by('pk'))
+        self.assertEqual(len(copies), 2)
+        for dish, copy in zip(self.dishes, copies):
+            self.assertNotEqual(copy.pk, dish.pk)
+            self.assertEqual(
+                [copy.name, copy.description, copy.price, copy.time_to_prepare, copy.is_vegetarian, copy.image.name],
+                [dish.name, dish.description, dish.price, dish.time_to_prepare, dish.is_vegetarian, dish.image.name],
+            )
+            self.assertIsNone(copy.updated)
+        self.assertEqual(list(self.menu.dishes.order_by('pk')), self.dishes)
+        self.assertEqual(Dish.all_objects.count(), 5)
+
+    def test_constant_queries(self):
+        # menu, names, clone, and the clone with its dishes
+        with self.assertNumQueries(5):
+            self.client.post(self.url, {'copy_dishes': True})
+
+        large_menu = MenuFactory(dishes=DishFactory.create_batch(20))
+
+        with self.assertNumQueries(5):
+            response = self.client.post(
+                reverse('menus:menu-clone', kwargs=dict(menu_id=large_menu.pk)), {'copy_dishes': True}
+            )
+
+        self.assertEqual(len(response.json()['dishes']), 20)
+
+    def test_names(self):
+        self.assertEqual(self.client.post(self.url).json()['name'], 'Lunch (copy)')
+        self.assertEqual(self.client.post(self.url).json()['name'], 'Lunch (copy 2)')
+        self.assertEqual(self.client.post(self.url, {'name': 'Dinner'}).json()['name'], 'Dinner')
+
+        response = self.client.post(self.url, {'name': 'Lunch (copy)'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'name': ['menu with this name already exists.']})
+
+    def test_long_name(self):
+        menu = MenuFactory(name='x' * 255, dishes=[])
+
+        self.assertEqual(clone_name(menu.name), 'x' * 248 + ' (copy)')
+
+        MenuFactory(name='x' * 248 + ' (copy)', dishes=[])
+
+        self.assertEqual(clone_name(menu.name), 'x' * 246 + ' (copy 2)')
+
+    def test_not_found(self):
+        self.menu.soft_delete()
+
+        response = self.client.post(self.url)
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_unauthenticated(self):
+        self.client.force_authenticate(None)
+
+        response = self.client.post(self.url)
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(Menu.objects.count(), 1)
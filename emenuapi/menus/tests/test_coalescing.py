@@ -0,0 +1,214 @@
+import threading
+import time
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from menus.coalescing import (
+    SharedResponse,
+    SingleFlight,
+    get_stats,
+    request_key,
+    reset_stats,
+    run_locked,
+    single_flight,
+)
+from menus.factories import DishFactory, MenuFactory, UserFactory
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, APITestCase
+
+cache = caches['shared']
+
+# requests of a threaded server
+MULTITHREAD = {'wsgi.multithread': True}
+
+
+class Handler:
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.fail = fail
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        if self.fail:
+            raise ValueError('failed')
+        return Response({'calls': self.calls}, headers={'X-Test': 'yes'})
+
+
+def run_in_threads(flight, handler, count):
+    results = [None] * count
+
+    def target(index):
+        try:
+            results[index] = flight.run('key', handler)
+        except ValueError as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=target, args=(index,)) for index in range(count)]
+    threads[0].start()
+    handler.started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    return threads, results
+
+
+@override_settings(COALESCING_WAIT=2, COALESCING_CACHE=None)
+class SingleFlightTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        reset_stats()
+        cache.clear()
+
+    def test_identical_requests_run_once(self):
+        handler = Handler()
+        threads, results = run_in_threads(SingleFlight(), handler, 4)
+        handler.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(handler.calls, 1)
+        self.assertEqual([response.data for response in results], [{'calls': 1}] * 4)
+        self.assertEqual([response['X-Test'] for response in results], ['yes'] * 4)
+        self.assertEqual(len({id(response) for response in results}), 4)
+        self.assertEqual(get_stats(), {'leaders': 1, 'coalesced': 3, 'coalesced_remote': 0, 'fallbacks': 0})
+
+    @override_settings(COALESCING_WAIT=0.05)
+    def test_wait_is_bounded(self):
+        handler = Handler()
+        threads, results = run_in_threads(SingleFlight(), handler, 2)
+        # the second request runs on its own once its wait times out
+        while handler.calls < 2:
+            time.sleep(0.01)
+        handler.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(handler.calls, 2)
+        self.assertEqual(get_stats(), {'leaders': 1, 'coalesced': 0, 'coalesced_remote': 0, 'fallbacks': 1})
+
+    def test_failed_request_isnt_shared(self):
+        handler = Handler(fail=True)
+        flight = SingleFlight()
+        threads, results = run_in_threads(flight, handler, 3)
+        handler.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(handler.calls, 3)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        self.assertEqual(flight.flights, {})
+
+
+@override_settings(COALESCING_WAIT=2, COALESCING_CACHE='shared', COALESCING_POLL_INTERVAL=0.01)
+class CrossProcessTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        cache.add('coalescing:lock:key', 'other')
+
+    def tearDown(self):
+        reset_stats()
+        cache.clear()
+
+    def test_shares_response_of_other_process(self):
+        def finish():
+            cache.set('coalescing:result:other', SharedResponse(None, b'{}', 200, {'Content-Type': 'application/json'}))
+            cache.delete('coalescing:lock:key')
+
+        timer = threading.Timer(0.05, finish)
+        timer.start()
+        response = run_locked('key', Handler())
+        timer.join()
+
+        self.assertEqual(response.content, b'{}')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(get_stats(), {'leaders': 0, 'coalesced': 0, 'coalesced_remote': 1, 'fallbacks': 0})
+
+    def test_runs_when_other_process_fails(self):
+        timer = threading.Timer(0.05, cache.delete, args=['coalescing:lock:key'])
+        timer.start()
+        handler = Handler()
+        handler.release.set()
+        response = run_locked('key', handler)
+        timer.join()
+
+        self.assertEqual(response.data, {'calls': 1})
+        self.assertEqual(get_stats(), {'leaders': 0, 'coalesced': 0, 'coalesced_remote': 0, 'fallbacks': 1})
+
+    def test_leader_releases_lock(self):
+        cache.delete('coalescing:lock:key')
+        handler = Handler()
+        handler.release.set()
+
+        run_locked('key', handler)
+
+        self.assertIsNone(cache.get('coalescing:lock:key'))
+
+        # a request arriving afterwards runs again
+        run_locked('key', handler)
+
+        self.assertEqual(handler.calls, 2)
+        self.assertEqual(get_stats()['leaders'], 2)
+
+
+@override_settings(COALESCING=True, COALESCING_WAIT=2, COALESCING_CACHE=None)
+class CoalescingViewTest(APITestCase):
+    def setUp(self):
+        self.menu = MenuFactory(dishes=[DishFactory()])
+        cache.clear()
+
+    def tearDown(self):
+        reset_stats()
+        cache.clear()
+
+    def test_responses_match(self):
+        url = reverse('menus:menu-detail', kwargs=dict(menu_id=self.menu.pk))
+        response = self.client.get(url, **MULTITHREAD)
+
+        with override_settings(COALESCING=False):
+            self.assertEqual(response.json(), self.client.get(url).json())
+        self.assertEqual(get_stats()['leaders'], 1)
+
+    def test_single_threaded_requests_arent_coalesced(self):
+        self.client.get(reverse('menus:menu-list'))
+
+        self.assertEqual(get_stats()['leaders'], 0)
+
+        with override_settings(COALESCING_CACHE='shared'):
+            self.client.get(reverse('menus:menu-list'))
+
+        self.assertEqual(get_stats()['leaders'], 1)
+
+    def test_authenticated_requests_arent_coalesced(self):
+        self.client.force_authenticate(UserFactory())
+
+        self.client.get(reverse('menus:menu-list'), **MULTITHREAD)
+
+        self.assertEqual(get_stats()['leaders'], 0)
+
+    def test_waits_for_request_in_flight(self):
+        url = reverse('menus:menu-list')
+        request = Request(APIRequestFactory().get(url, {'ordering': 'name'}))
+        flight, leader = single_flight.join(request_key(request))
+        self.assertTrue(leader)
+
+        def finish():
+            flight.result = SharedResponse(['shared'], None, 200, {})
+            with single_flight.lock:
+                del single_flight.flights[request_key(request)]
+            flight.done.set()
+
+        timer = threading.Timer(0.05, finish)
+        timer.start()
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'ordering': 'name'}, **MULTITHREAD)
+        timer.join()
+
+        self.assertEqual(response.json(), ['shared'])
+        self.assertEqual(get_stats()['coalesced'], 1)
@@ -0,0 +1,40 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from menus.counters import CounterBuffer, incr, incr_many
+
+
+class CountersTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_incr(self):
+        self.assertEqual(incr(cache, 'counter'), 1)
+        self.assertEqual(incr(cache, 'counter', 2), 3)
+
+        incr_many(cache, {'counter': 1, 'other': 5, 'unchanged': 0})
+
+        self.assertEqual(cache.get_many(['counter', 'other', 'unchanged']), {'counter': 4, 'other': 5})
+
+    @override_settings(STATS_PUSH_INTERVAL=60)
+    def test_buffer(self):
+        pushed = []
+        buffer = CounterBuffer(pushed.append, 'STATS_PUSH_INTERVAL')
+
+        buffer.add('a')
+        buffer.add('a', 2)
+        buffer.add('b')
+
+        self.assertEqual(pushed, [])
+
+        buffer.push()
+        buffer.push()
+
+        self.assertEqual(pushed, [{'a': 3, 'b': 1}])
+
+        with override_settings(STATS_PUSH_INTERVAL=0):
+            buffer.add('a')
+
+        self.assertEqual(pushed[-1], {'a': 1})
@@ -0,0 +1,276 @@
+import asyncio
+import json
+import select
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from menus.events import CHANNEL, EventBroker, EventStreamApplication, Subscription, publish
+from menus.factories import DishFactory, MenuFactory, UserFactory
+from menus.models import Dish
+from menus.notifications import listen
+from rest_framework.test import APITransactionTestCase
+
+
+def payload(kind, pk, menus=None, action='updated'):
+    data = {'event_id': f'{kind}-{pk}-{action}', 'type': kind, 'id': pk, 'action': action, 'updated': None}
+    if menus is not None:
+        data['menus'] = menus
+    return json.dumps(data)
+
+
+class StaticBroker(EventBroker):
+    def start(self):
+        pass
+
+
+@override_settings(EVENT_STREAM=True)
+class PublishTest(APITransactionTestCase):
+    def setUp(self):
+        self.dish = DishFactory()
+        self.menu = MenuFactory(dishes=[self.dish])
+        self.client.force_authenticate(UserFactory())
+        self.listener = listen(CHANNEL)
+        self.addCleanup(self.listener.close)
+
+    def get_events(self):
+        # notifications are sent once the change commits, they may still be on the way
+        select.select([self.listener], [], [], 0.5)
+        self.listener.poll()
+        events = [json.loads(notify.payload) for notify in self.listener.notifies]
+        del self.listener.notifies[:]
+        return events
+
+    def test_menu_changes_are_sent_once(self):
+        other_dish = DishFactory()
+
+        response = self.client.put(
+            reverse('menus:menu-detail', kwargs=dict(menu_id=self.menu.pk)),
+            data={'name': 'Menu', 'description': 'Menu', 'dishes': [other_dish.pk]},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        events = self.get_events()
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]['type'], 'menu')
+        self.assertEqual(events[0]['id'], self.menu.pk)
+        self.assertEqual(events[0]['action'], 'updated')
+        self.assertEqual(events[0]['updated'], response.json()['updated'])
+
+    def test_dish_changes(self):
+        response = self.client.post(
+            reverse('menus:dish-list'),
+            data={'name': 'Dish', 'description': 'Dish', 'price': '10.00', 'time_to_prepare': 10},
+        )
+
+        self.assertEqual(
+            self.get_events(),
+            [
+                {
+                    'event_id': mock.ANY,
+                    'type': 'dish',
+                    'id': response.json()['id'],
+                    'action': 'created',
+                    'updated': None,
+                    'menus': [],
+                }
+            ],
+        )
+
+        self.client.delete(reverse('menus:dish-detail', kwargs=dict(dish_id=self.dish.pk)))
+
+        events = self.get_events()
+        self.assertEqual(events[0]['action'], 'deleted')
+        self.assertEqual(events[0]['menus'], [self.menu.pk])
+
+    @override_settings(EVENT_STREAM_MAX_MENUS=1)
+    def test_dish_on_many_menus(self):
+        self.dish.menu_set.add(MenuFactory(dishes=[]))
+        self.get_events()
+
+        self.client.delete(reverse('menus:dish-detail', kwargs=dict(dish_id=self.dish.pk)))
+
+        events = self.get_events()
+        self.assertEqual(len(events), 1)
+        self.assertIsNone(events[0]['menus'])
+
+    def test_links_changed_from_dish(self):
+        menu = MenuFactory(dishes=[])
+        self.get_events()
+
+        with transaction.atomic():
+            self.dish.menu_set.add(menu)
+
+        events = {(event['type'], event['id']) for event in self.get_events()}
+        self.assertEqual(events, {('dish', self.dish.pk), ('menu', menu.pk)})
+
+    @override_settings(EVENT_STREAM=False)
+    def test_disabled(self):
+        self.client.patch(reverse('menus:dish-detail', kwargs=dict(dish_id=self.dish.pk)), data={'name': 'Dish'})
+
+        self.assertEqual(self.get_events(), [])
+
+
+@override_settings(EVENT_STREAM=True, EVENT_STREAM_HEARTBEAT=10)
+class EventStreamTest(TestCase):
+    def setUp(self):
+        self.broker = StaticBroker()
+        patcher = mock.patch('menus.events.broker', self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.application = mock.AsyncMock()
+
+    @async_to_sync
+    async def stream(self, query=b'', headers=(), payloads=(), method='GET', disconnect=True):
+        messages = []
+        disconnected = asyncio.Event()
+
+        async def receive():
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {'type': 'http', 'method': method, 'path': '/api/events/', 'query_string': query, 'headers': headers}
+        task = asyncio.ensure_future(EventStreamApplication(self.application)(scope, receive, send))
+        await asyncio.sleep(0.01)
+        for data in payloads:
+            self.broker.dispatch(data)
+        await asyncio.sleep(0.01)
+        if disconnect:
+            disconnected.set()
+        await asyncio.wait_for(task, 1)
+        self.assertEqual(self.broker.subscriptions, set())
+        return messages[0], b''.join(message.get('body', b'') for message in messages[1:]).decode()
+
+    def test_stream(self):
+        start, body = self.stream(payloads=[payload('menu', 1), payload('dish', 2, menus=[1])])
+
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-type', b'text/event-stream; charset=utf-8'), start['headers'])
+        self.assertEqual(
+            body,
+            'retry: 3000\n\n'
+            'id: menu-1-updated\nevent: menu\n'
+            'data: {"type": "menu", "id": 1, "action": "updated", "updated": null}\n\n'
+            'id: dish-2-updated\nevent: dish\n'
+            'data: {"type": "dish", "id": 2, "action": "updated", "updated": null, "menus": [1]}\n\n',
+        )
+
+    def test_filters(self):
+        payloads = [payload('menu', 1), payload('menu', 2), payload('dish', 3, menus=[1]), payload('dish', 4, menus=[])]
+
+        _, body = self.stream(query=b'menus=1', payloads=payloads)
+
+        self.assertEqual(body.count('id: '), 2)
+        self.assertIn('id: menu-1-updated', body)
+        self.assertIn('id: dish-3-updated', body)
+
+        _, body = self.stream(query=b'dishes=4,x', payloads=payloads)
+
+        self.assertEqual(body.count('id: '), 1)
+        self.assertIn('id: dish-4-updated', body)
+
+    def test_dish_with_unlisted_menus(self):
+        payloads = [json.dumps({**json.loads(payload('dish', 5)), 'menus': None})]
+
+        _, body = self.stream(query=b'menus=1', payloads=payloads)
+
+        self.assertIn('id: dish-5-updated', body)
+        self.assertIn('"menus": null', body)
+
+        _, body = self.stream(query=b'dishes=4', payloads=payloads)
+
+        self.assertNotIn('id: dish-5-updated', body)
+
+    def test_resume(self):
+        for pk in range(1, 4):
+            self.broker.dispatch(payload('menu', pk))
+
+        _, body = self.stream(headers=[(b'last-event-id', b'menu-1-updated')])
+
+        self.assertNotIn('menu-1-updated', body)
+        self.assertIn('id: menu-2-updated', body)
+        self.assertIn('id: menu-3-updated', body)
+
+        _, body = self.stream(query=b'lastEventId=menu-3-updated')
+
+        self.assertEqual(body, 'retry: 3000\n\n')
+
+    def test_unknown_last_event_id(self):
+        _, body = self.stream(headers=[(b'last-event-id', b'menu-1-updated')])
+
+        self.assertEqual(body, 'retry: 3000\n\nevent: reset\ndata: {}\n\n')
+
+    @override_settings(EVENT_STREAM_HEARTBEAT=0.001)
+    def test_heartbeat(self):
+        _, body = self.stream()
+
+        self.assertIn(': heartbeat\n\n', body)
+
+    @override_settings(EVENT_STREAM_CLIENT_BUFFER=1)
+    def test_slow_client_is_disconnected(self):
+        _, body = self.stream(payloads=[payload('menu', pk) for pk in range(3)], disconnect=False)
+
+        self.assertIn('id: menu-0-updated', body)
+        self.assertNotIn('id: menu-2-updated', body)
+
+    def test_reset(self):
+        self.broker.dispatch(payload('menu', 1))
+        subscription = Subscription(frozenset(), frozenset())
+        self.broker.subscriptions.add(subscription)
+
+        self.broker.reset()
+
+        self.assertEqual(len(self.broker.history), 0)
+        self.assertEqual(subscription.queue.get_nowait(), b'event: reset\ndata: {}\n\n')
+
+    def test_method_not_allowed(self):
+        start, _ = self.stream(method='POST')
+
+        self.assertEqual(start['status'], 405)
+
+    def test_other_paths(self):
+        scope = {'type': 'http', 'method': 'GET', 'path': '/api/menus/'}
+
+        async_to_sync(EventStreamApplication(self.application))(scope, None, None)
+
+        self.application.assert_awaited_once_with(scope, None, None)
+
+
+@override_settings(EVENT_STREAM=True)
+class EventBrokerListenerTest(TransactionTestCase):
+    def test_notifications_are_dispatched(self):
+        dish = DishFactory()
+        menu = MenuFactory(dishes=[dish])
+        broker = EventBroker()
+        subscription = Subscription(frozenset(), frozenset())
+
+        def update():
+            Dish.objects.filter(pk=dish.pk).update(name='Renamed')
+            publish(dish)
+
+        @async_to_sync
+        async def listen():
+            broker.subscribe(subscription, None)
+            try:
+                # the listener connects in the background
+                for _ in range(50):
+                    await sync_to_async(update)()
+                    try:
+                        return await asyncio.wait_for(subscription.queue.get(), 0.1)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                broker.task.cancel()
+                await asyncio.wait([broker.task])
+
+        message = listen()
+
+        self.assertIsNotNone(message)
+        self.assertEqual(broker.history[0].object_id, dish.pk)
+        self.assertEqual(broker.history[0].menus, frozenset([menu.pk]))
+        self.assertIn(b'event: dish', message)
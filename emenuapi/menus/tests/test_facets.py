@@ -0,0 +1,34 @@
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from menus.facets import count_facets, get_buckets
+from menus.factories import DishFactory
+from menus.models import Dish
+
+
+class GetBucketsTest(TestCase):
+    def test_get_buckets(self):
+        self.assertEqual(get_buckets([30, 10]), [(None, 10), (10, 30), (30, None)])
+
+    def test_get_buckets_without_boundaries(self):
+        self.assertEqual(get_buckets([]), [(None, None)])
+
+
+class CountFacetsTest(TestCase):
+    @override_settings(DISH_FACET_BUCKETS={'price': [Decimal('20')]})
+    def test_count_facets(self):
+        DishFactory(price='5.00', is_vegetarian=True)
+        DishFactory(price='20.00', is_vegetarian=True)
+        DishFactory(price='30.00', is_vegetarian=False)
+
+        with self.assertNumQueries(1):
+            total, facets = count_facets(Dish.objects.all())
+
+        self.assertEqual(total, 3)
+        self.assertEqual(
+            facets,
+            {
+                'is_vegetarian': {'true': 2, 'false': 1},
+                'price': [{'min': None, 'max': '20.00', 'count': 1}, {'min': '20.00', 'max': None, 'count': 2}],
+            },
+        )
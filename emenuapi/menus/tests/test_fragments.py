@@ -0,0 +1,74 @@
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from menus.factories import DishFactory
+from menus.fragments import HITS_KEY, MISSES_KEY, fragment_key, get_stats, reset_stats, stats
+from menus.models import Dish
+from menus.serializers import DishSerializer
+from rest_framework.test import APIRequestFactory
+
+
+class FragmentCacheTest(TestCase):
+    def setUp(self):
+        self.dishes = DishFactory.create_batch(3)
+        cache.clear()
+        reset_stats()
+
+    def tearDown(self):
+        cache.clear()
+        reset_stats()
+
+    def test_serializes_misses_only(self):
+        DishSerializer(self.dishes[:1], many=True).data
+
+        # keys of all the dishes and the dishes missing in the cache
+        with self.assertNumQueries(2):
+            data = DishSerializer(Dish.objects.only('pk', 'created', 'updated').order_by('pk'), many=True).data
+
+        self.assertEqual(data, [DishSerializer(dish).data for dish in self.dishes])
+        self.assertEqual(get_stats(), (1, 3, 0.25))
+
+    def test_changed_dish_gets_new_fragment(self):
+        dish = self.dishes[0]
+        DishSerializer([dish], many=True).data
+        key = fragment_key(dish)
+
+        dish.name = 'Updated name'
+        dish.updated = timezone.now()
+        dish.save()
+
+        self.assertNotEqual(fragment_key(dish), key)
+        self.assertEqual(DishSerializer([dish], many=True).data[0]['name'], 'Updated name')
+
+    def test_image_url_is_absolute_per_request(self):
+        dish = self.dishes[0]
+        dish.image = SimpleUploadedFile('photo.png', b'photo', content_type='image/png')
+        dish.save()
+        request = APIRequestFactory().get('/', HTTP_HOST='testserver')
+
+        DishSerializer([dish], many=True).data
+        data = DishSerializer([dish], many=True, context={'request': request}).data
+
+        self.assertEqual(data[0]['image'], f'http://testserver{dish.image.url}')
+        self.assertEqual(data, [DishSerializer(dish, context={'request': request}).data])
+
+    @override_settings(FRAGMENT_CACHE_STATS_PUSH_INTERVAL=60)
+    def test_stats_are_pushed_in_batches(self):
+        stats.push()
+        DishSerializer(self.dishes, many=True).data
+        DishSerializer(self.dishes, many=True).data
+
+        # no round trips to the stats cache per response
+        self.assertEqual(caches['shared'].get_many([HITS_KEY, MISSES_KEY]), {})
+
+        stats.push()
+
+        self.assertEqual(caches['shared'].get_many([HITS_KEY, MISSES_KEY]), {HITS_KEY: 3, MISSES_KEY: 3})
+
+    def test_reset_stats(self):
+        DishSerializer(self.dishes, many=True).data
+
+        reset_stats()
+
+        self.assertEqual(get_stats(), (0, 0, 0.0))
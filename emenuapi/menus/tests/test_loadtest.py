@@ -0,0 +1,67 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import LiveServerTestCase, SimpleTestCase
+from menus.loadtest.runner import LoadTestConfig, Recorder, build_report, percentile
+from menus.models import Menu
+
+
+class PercentileTest(SimpleTestCase):
+    def test_percentile(self):
+        values = [float(value) for value in range(1, 101)]
+
+        self.assertEqual(percentile(values, 50), 50.0)
+        self.assertEqual(percentile(values, 95), 95.0)
+        self.assertEqual(percentile(values, 99), 99.0)
+        self.assertEqual(percentile([], 99), 0.0)
+
+
+class BuildReportTest(SimpleTestCase):
+    def test_build_report(self):
+        recorder = Recorder()
+        for latency in (0.01, 0.02, 0.03, 0.04):
+            recorder.record('GET /api/menus/', latency, ok=True)
+        recorder.record('POST /api/auth/', 0.1, ok=False)
+
+        report = build_report(LoadTestConfig(base_url='http://testserver', concurrency=2), recorder, elapsed=2)
+
+        self.assertEqual(
+            report['endpoints']['GET /api/menus/'],
+            {
+                'requests': 4,
+                'errors': 0,
+                'error_rate': 0.0,
+                'throughput': 2.0,
+                'p50_ms': 20.0,
+                'p95_ms': 40.0,
+                'p99_ms': 40.0,
+            },
+        )
+        self.assertEqual(report['endpoints']['POST /api/auth/']['error_rate'], 1.0)
+        self.assertEqual(report['total']['requests'], 5)
+        self.assertEqual(report['total']['errors'], 1)
+
+
+class LoadTestCommandTest(LiveServerTestCase):
+    def test_run_load_test(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = Path(directory) / 'report.json'
+            call_command(
+                'loadtest',
+                url=self.live_server_url,
+                concurrency=2,
+                requests=40,
+                menus=5,
+                dishes_per_menu=3,
+                output=output,
+                stdout=StringIO(),
+            )
+            report = json.loads(output.read_text())
+
+        self.assertEqual(Menu.objects.count(), 5)
+        self.assertGreaterEqual(report['total']['requests'], 40)
+        self.assertEqual(report['total']['errors'], 0)
+        self.assertIn('GET /api/menus/', report['endpoints'])
@@ -0,0 +1,190 @@
+import datetime
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.urls import reverse
+from freezegun import freeze_time
+from menus.factories import DishFactory, MenuFactory, UserFactory
+from rest_framework.test import APITestCase
+from rest_framework.utils.urls import replace_query_param
+
+
+class MenuDishesTest(APITestCase):
+    def setUp(self):
+        self.dishes = []
+        for index in range(5):
+            with freeze_time(datetime.datetime(2021, 10, 1 + index)):
+                self.dishes.append(
+                    DishFactory(price=Decimal(10 - index), is_vegetarian=index % 2 == 0, image='menus/dish/photo.png')
+                )
+        self.menu = MenuFactory(dishes=self.dishes)
+        self.other_dish = DishFactory()
+        self.empty_menu = MenuFactory(dishes=[])
+
+    def get_pages(self, url, params=None):
+        ids = []
+        while url:
+            # menu and page
+            with self.assertNumQueries(2):
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(dish['id'] for dish in response.json()['results'])
+            url, params = response.json()['next'], None
+        return ids
+
+    def test_pages(self):
+        ids = self.get_pages(reverse('menus:menu-dishes', kwargs=dict(menu_id=self.menu.pk)), {'limit': 2})
+
+        self.assertEqual(ids, [dish.pk for dish in reversed(self.dishes)])
+
+    def test_filters_and_ordering(self):
+        url = reverse('menus:menu-dishes', kwargs=dict(menu_id=self.menu.pk))
+
+        ids = self.get_pages(url, {'limit': 1, 'ordering': 'price', 'is_vegetarian': 'true', 'price_max': '9.50'})
+
+        self.assertEqual(ids, [self.dishes[4].pk, self.dishes[2].pk])
+
+        ids = self.get_pages(url, {'ordering': 'unknown'})
+
+        self.assertEqual(ids, [dish.pk for dish in reversed(self.dishes)])
+
+    def test_dishes_match_menu_details(self):
+        response = self.client.get(reverse('menus:menu-dishes', kwargs=dict(menu_id=self.menu.pk)))
+        details = self.client.get(reverse('menus:menu-detail', kwargs=dict(menu_id=self.menu.pk)))
+
+        self.assertEqual(
+            sorted(response.json()['results'], key=lambda dish: dish['id']),
+            sorted(details.json()['dishes'], key=lambda dish: dish['id']),
+        )
+
+    def test_hidden_menu(self):
+        response = self.client.get(reverse('menus:menu-dishes', kwargs=dict(menu_id=self.empty_menu.pk)))
+
+        self.assertEqual(response.status_code, 404)
+
+        self.client.force_authenticate(UserFactory())
+        response = self.client.get(reverse('menus:menu-dishes', kwargs=dict(menu_id=self.empty_menu.pk)))
+
+        self.assertEqual(response.json(), {'next': None, 'previous': None, 'results': []})
+
+    def test_menu_details_with_first_dishes(self):
+        url = reverse('menus:menu-detail', kwargs=dict(menu_id=self.menu.pk))
+
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'dishes_limit': 3})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([dish['id'] for dish in response.json()['dishes']], [dish.pk for dish in self.dishes[:1:-1]])
+        self.assertEqual(response.json()['name'], self.menu.name)
+        next_url = response.json()['dishes_next']
+        self.assertIn(reverse('menus:menu-dishes', kwargs=dict(menu_id=self.menu.pk)), next_url)
+
+        ids = self.get_pages(next_url)
+
+        self.assertEqual(ids, [self.dishes[1].pk, self.dishes[0].pk])
+
+        response = self.client.get(url, {'dishes_limit': 5})
+
+        self.assertEqual(len(response.json()['dishes']), 5)
+        self.assertIsNone(response.json()['dishes_next'])
+
+    def test_menu_details_with_first_dishes_ordering(self):
+        url = reverse('menus:menu-detail', kwargs=dict(menu_id=self.menu.pk))
+
+        response = self.client.get(url, {'dishes_limit': 2, 'ordering': 'price'})
+
+        self.assertEqual([dish['id'] for dish in response.json()['dishes']], [dish.pk for dish in self.dishes[:2:-1]])
+
+        ids = self.get_pages(response.json()['dishes_next'])
+
+        self.assertEqual(ids, [dish.pk for dish in self.dishes[2::-1]])
+
+    def test_cursor_of_another_ordering(self):
+        url = reverse('menus:menu-dishes', kwargs=dict(menu_id=self.menu.pk))
+        next_url = self.client.get(url, {'limit': 2, 'ordering': 'name'}).json()['next']
+
+        for ordering in ('created', '-name', 'price'):
+            response = self.client.get(replace_query_param(next_url, 'ordering', ordering))
+
+            self.assertEqual(response.status_code, 404)
+            self.assertEqual(response.json(), {'detail': 'Invalid cursor'})
+
+    def test_invalid_cursor_position(self):
+        url = reverse('menus:menu-dishes', kwargs=dict(menu_id=self.menu.pk))
+        # `o=0&p=price:cheap` encoded like `CursorPagination.encode_cursor` does
+        response = self.client.get(url, {'ordering': 'price', 'cursor': 'bz0wJnA9cHJpY2U6Y2hlYXA='})
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_invalid_dishes_limit(self):
+        response = self.client.get(reverse('menus:menu-detail', kwargs=dict(menu_id=self.menu.pk)), {'dishes_limit': 0})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'dishes_limit': ['Ensure this value is between 1 and 200.']})
+
+
+class DishMenusTest(APITestCase):
+    def setUp(self):
+        self.dish = DishFactory()
+        self.other_dish = DishFactory()
+        self.menus = [MenuFactory(dishes=[self.dish]) for _ in range(3)]
+        self.deleted_menu = MenuFactory(dishes=[self.dish, self.other_dish])
+        self.deleted_menu.soft_delete()
+        self.other_menu = MenuFactory(dishes=[self.other_dish])
+        self.client.force_authenticate(UserFactory())
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_pages(self):
+        url, params = reverse('menus:dish-menus', kwargs=dict(dish_id=self.dish.pk)), {'limit': 2}
+        menus = []
+        while url:
+            # dish and page
+            with self.assertNumQueries(2):
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            menus.extend(response.json()['results'])
+            url, params = response.json()['next'], None
+
+        self.assertEqual([menu['id'] for menu in menus], [menu.pk for menu in self.menus])
+        self.assertEqual(set(menus[0]), {'id', 'name', 'description', 'created', 'updated'})
+
+    def test_deleted_dish(self):
+        self.dish.soft_delete()
+
+        response = self.client.get(reverse('menus:dish-menus', kwargs=dict(dish_id=self.dish.pk)))
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_unauthenticated(self):
+        self.client.force_authenticate(None)
+
+        response = self.client.get(reverse('menus:dish-menus', kwargs=dict(dish_id=self.dish.pk)))
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_menu_ids(self):
+        DishFactory.create_batch(3)
+        # caches the fragments of the dishes
+        self.client.get(reverse('menus:dish-list'))
+
+        # dishes and links, whatever the number of dishes
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('menus:dish-list'), {'menu_ids': 'true'})
+
+        menu_ids = {dish['id']: dish['menu_ids'] for dish in response.json()}
+        self.assertEqual(len(menu_ids), 5)
+        self.assertEqual(menu_ids[self.dish.pk], [menu.pk for menu in self.menus])
+        self.assertEqual(menu_ids[self.other_dish.pk], [self.other_menu.pk])
+
+        response = self.client.get(
+            reverse('menus:dish-detail', kwargs=dict(dish_id=self.dish.pk)), {'menu_ids': 'true'}
+        )
+
+        self.assertEqual(response.json()['menu_ids'], [menu.pk for menu in self.menus])
+
+        response = self.client.get(reverse('menus:dish-detail', kwargs=dict(dish_id=self.dish.pk)))
+
+        self.assertNotIn('menu_ids', response.json())
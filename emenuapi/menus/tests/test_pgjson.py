@@ -0,0 +1,96 @@
+import datetime
+
+from django.test import override_settings
+from django.urls import reverse
+from freezegun import freeze_time
+from menus.factories import DishFactory, MenuFactory, UserFactory
+from rest_framework.test import APITestCase
+
+
+def sort_dishes(data):
+    for menu in data if isinstance(data, list) else [data]:
+        menu['dishes'] = sorted(menu['dishes'], key=lambda dish: dish['id'] if isinstance(dish, dict) else dish)
+    return data
+
+
+@override_settings(MENU_JSON_FROM_DATABASE=True)
+class DatabaseJSONTest(APITestCase):
+    def setUp(self):
+        with freeze_time(datetime.datetime(2021, 10, 1, 12, 30)):
+            self.dishes = [
+                DishFactory(image='menus/dish/photo.png', name='Pierogi "ruskie"', description='Zażółć\ngęślą'),
+                DishFactory(image=''),
+            ]
+            self.first_menu = MenuFactory(name='Breakfast', dishes=self.dishes)
+        self.dishes[1].name = 'Updated'
+        self.dishes[1].updated = datetime.datetime(2021, 10, 2, 8, 0, 0, 123, tzinfo=datetime.timezone.utc)
+        self.dishes[1].save()
+        deleted_dish = DishFactory()
+        self.second_menu = MenuFactory(name='Dinner', dishes=[self.dishes[0], deleted_dish])
+        deleted_dish.soft_delete()
+        self.empty_menu = MenuFactory(name='Empty', dishes=[])
+
+    def assert_parity(self, url, params=None, num_queries=None):
+        if num_queries is None:
+            response = self.client.get(url, params)
+        else:
+            with self.assertNumQueries(num_queries):
+                response = self.client.get(url, params)
+
+        with override_settings(MENU_JSON_FROM_DATABASE=False):
+            expected = self.client.get(url, params)
+
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response['Content-Type'], expected['Content-Type'])
+        if response.status_code == 200:
+            self.assertEqual(sort_dishes(response.json()), sort_dishes(expected.json()))
+        return response
+
+    def test_retrieve(self):
+        response = self.assert_parity(reverse('menus:menu-detail', kwargs=dict(menu_id=self.first_menu.pk)), None, 1)
+
+        self.assertEqual(response.json()['dishes'][0]['image'], 'http://testserver/media/menus/dish/photo.png')
+        self.assertEqual(response.json()['dishes'][1]['updated'], '2021-10-02T08:00:00.000123Z')
+        self.assertEqual(response.json()['created'], '2021-10-01T12:30:00Z')
+
+        self.assert_parity(reverse('menus:menu-detail', kwargs=dict(menu_id=self.second_menu.pk)))
+
+    def test_retrieve_not_found(self):
+        self.assert_parity(reverse('menus:menu-detail', kwargs=dict(menu_id=self.empty_menu.pk)))
+        self.assert_parity(reverse('menus:menu-detail', kwargs=dict(menu_id=0)))
+        self.assert_parity(reverse('menus:menu-detail', kwargs=dict(menu_id='x')))
+        self.assert_parity(reverse('menus:menu-detail', kwargs=dict(menu_id=self.first_menu.pk)), {'search': 'dinner'})
+
+    def test_retrieve_authenticated(self):
+        self.client.force_authenticate(UserFactory())
+
+        self.assert_parity(reverse('menus:menu-detail', kwargs=dict(menu_id=self.empty_menu.pk)), None, 1)
+
+    def test_quoted_media_name(self):
+        self.dishes[0].image = 'menus/dish/zdjęcie 1.png'
+        self.dishes[0].save()
+
+        response = self.assert_parity(reverse('menus:menu-detail', kwargs=dict(menu_id=self.first_menu.pk)))
+
+        self.assertEqual(
+            response.json()['dishes'][0]['image'], 'http://testserver/media/menus/dish/zdj%C4%99cie%201.png'
+        )
+
+    def test_list(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('menus:menu-list'))
+
+        self.assertEqual([menu['name'] for menu in response.json()], ['Dinner', 'Breakfast'])
+        self.assert_parity(reverse('menus:menu-list'))
+        self.assert_parity(reverse('menus:menu-list'), {'ordering': 'name'})
+        self.assert_parity(reverse('menus:menu-list'), {'ordering': '-num_dishes,name'})
+        self.assert_parity(reverse('menus:menu-list'), {'search': 'break'})
+        self.assert_parity(reverse('menus:menu-list'), {'search': 'none'})
+        self.assert_parity(reverse('menus:menu-list'), {'ids': f'{self.second_menu.pk},{self.first_menu.pk}'})
+
+    def test_list_authenticated(self):
+        self.client.force_authenticate(UserFactory())
+
+        response = self.assert_parity(reverse('menus:menu-list'), {'created_after': '2021-10-02T00:00:00Z'})
+
+        self.assertEqual(len(response.json()), 2)
@@ -0,0 +1,53 @@
+from django.core.cache import cache
+from django.test import TestCase
+from menus.factories import DishFactory, MenuFactory
+from menus.models import Menu
+from menus.planner import plan_queryset
+from menus.serializers import MenuDetailsSerializer, MenuSerializer
+
+
+class PlanQuerysetTest(TestCase):
+    def setUp(self):
+        self.dish = DishFactory()
+        self.menu = MenuFactory(dishes=(self.dish,))
+        cache.clear()
+
+    def test_read_action_prefetches_related_fields(self):
+        menu = plan_queryset(Menu.objects.all(), MenuSerializer, 'retrieve').get()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(MenuSerializer(menu).data['dishes'], [self.dish.pk])
+
+    def test_read_action_prefetches_load_fields_of_list_serializers(self):
+        menu = plan_queryset(Menu.objects.all(), MenuDetailsSerializer, 'retrieve').get()
+
+        self.assertEqual(
+            menu.dishes.all()[0].get_deferred_fields(),
+            {'name', 'description', 'price', 'time_to_prepare', 'is_vegetarian', 'image', 'deleted', 'views'},
+        )
+        # the first serialization loads the fragment cache misses
+        with self.assertNumQueries(1):
+            self.assertEqual(MenuDetailsSerializer(menu).data['dishes'][0]['name'], self.dish.name)
+        with self.assertNumQueries(0):
+            self.assertEqual(MenuDetailsSerializer(menu).data['dishes'][0]['name'], self.dish.name)
+
+    def test_read_action_prefetches_only_pks_of_related_fields(self):
+        menu = plan_queryset(Menu.objects.all(), MenuSerializer, 'list').get()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(MenuSerializer(menu).data['dishes'], [self.dish.pk])
+        self.assertEqual(
+            menu.dishes.all()[0].get_deferred_fields(), {f.attname for f in self.dish._meta.concrete_fields} - {'id'}
+        )
+
+    def test_write_action_skips_prefetch(self):
+        menu = plan_queryset(Menu.objects.all(), MenuSerializer, 'update').get()
+
+        self.assertFalse(getattr(menu, '_prefetched_objects_cache', {}))
+        # saving it leaves the view counts alone
+        self.assertEqual(menu.get_deferred_fields(), {'deleted', 'views'})
+
+    def test_destroy_loads_only_pk(self):
+        menu = plan_queryset(Menu.objects.all(), MenuSerializer, 'destroy').get()
+
+        self.assertEqual(menu.get_deferred_fields(), {'name', 'description', 'created', 'updated', 'deleted', 'views'})
@@ -0,0 +1,156 @@
+import datetime
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from freezegun import freeze_time
+from menus.factories import DishFactory, MenuFactory, UserFactory
+from menus.models import Dish, Menu
+from menus.popularity import FLUSH_LOCK_KEY, buffer, flush_view_counts, push_counts, view_key
+from menus.tasks import flush_views
+from rest_framework.test import APITestCase
+
+cache = caches['shared']
+
+
+@override_settings(VIEW_COUNTS=True, VIEW_COUNTS_PUSH_INTERVAL=0)
+class ViewCountsTest(APITestCase):
+    def setUp(self):
+        self.dish = DishFactory()
+        self.menu = MenuFactory(dishes=[self.dish])
+        self.empty_menu = MenuFactory(dishes=[])
+        cache.clear()
+
+    def tearDown(self):
+        buffer.counts.clear()
+        cache.clear()
+
+    def test_retrieve_counts_views(self):
+        url = reverse('menus:menu-detail', kwargs=dict(menu_id=self.menu.pk))
+        self.client.get(url)
+        self.client.get(url, {'dishes_limit': 1})
+        self.client.get(reverse('menus:menu-detail', kwargs=dict(menu_id=self.empty_menu.pk)))
+        self.client.get(reverse('menus:menu-list'))
+
+        self.client.force_authenticate(UserFactory())
+        self.client.get(reverse('menus:dish-detail', kwargs=dict(dish_id=self.dish.pk)))
+        self.client.get(reverse('menus:dish-detail', kwargs=dict(dish_id=0)))
+
+        self.assertEqual(
+            cache.get_many([view_key(Menu, self.menu.pk), view_key(Menu, self.empty_menu.pk), view_key(Dish, 0)]),
+            {view_key(Menu, self.menu.pk): 2},
+        )
+        self.assertEqual(cache.get(view_key(Dish, self.dish.pk)), 1)
+        # the columns are only written by the flush
+        self.menu.refresh_from_db()
+        self.assertEqual(self.menu.views, 0)
+
+    @override_settings(VIEW_COUNTS_PUSH_INTERVAL=60)
+    def test_views_are_buffered(self):
+        buffer.push()
+        self.client.get(reverse('menus:menu-detail', kwargs=dict(menu_id=self.menu.pk)))
+
+        self.assertIsNone(cache.get(view_key(Menu, self.menu.pk)))
+
+        buffer.push()
+
+        self.assertEqual(cache.get(view_key(Menu, self.menu.pk)), 1)
+
+    @override_settings(VIEW_COUNTS=False)
+    def test_disabled(self):
+        self.client.get(reverse('menus:menu-detail', kwargs=dict(menu_id=self.menu.pk)))
+
+        self.assertIsNone(cache.get(view_key(Menu, self.menu.pk)))
+
+
+@override_settings(VIEW_COUNTS_DIRTY_INTERVAL=60)
+class FlushViewCountsTest(TestCase):
+    def setUp(self):
+        self.menus = MenuFactory.create_batch(3, dishes=[])
+        self.dish = DishFactory()
+        self.now = datetime.datetime(2021, 10, 1, 12, 0, 30)
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_flush(self):
+        with freeze_time(self.now):
+            push_counts({view_key(Menu, self.menus[0].pk): 3, view_key(Menu, self.menus[2].pk): 1})
+            push_counts({view_key(Dish, self.dish.pk): 2})
+
+            # the keys of the current minute may still be being listed
+            with self.assertNumQueries(0):
+                self.assertEqual(flush_view_counts(2), 0)
+
+        with freeze_time(self.now + datetime.timedelta(minutes=2)):
+            # a batch of the 2 menus and one of the dish
+            with self.assertNumQueries(2):
+                self.assertEqual(flush_view_counts(2), 6)
+
+            self.assertEqual([menu.views for menu in Menu.objects.order_by('pk')], [3, 0, 1])
+            self.assertEqual(Dish.objects.get().views, 2)
+            self.assertEqual(cache.get(view_key(Menu, self.menus[0].pk)), 0)
+
+            with self.assertNumQueries(0):
+                self.assertEqual(flush_view_counts(2), 0)
+
+            push_counts({view_key(Menu, self.menus[0].pk): 1})
+
+        with freeze_time(self.now + datetime.timedelta(minutes=4)):
+            flush_views()
+
+        self.assertEqual(Menu.objects.get(pk=self.menus[0].pk).views, 4)
+
+    def test_counts_without_listed_keys(self):
+        # views of keys not listed in time, e.g. evicted lists, are flushed with the next views of the object
+        cache.set(view_key(Menu, self.menus[1].pk), 5)
+        with freeze_time(self.now):
+            push_counts({view_key(Menu, self.menus[1].pk): 1})
+
+        with freeze_time(self.now + datetime.timedelta(minutes=2)):
+            self.assertEqual(flush_view_counts(10), 6)
+
+    def test_overlapping_flush_is_skipped(self):
+        with freeze_time(self.now):
+            push_counts({view_key(Menu, self.menus[0].pk): 3})
+
+        with freeze_time(self.now + datetime.timedelta(minutes=2)):
+            # a flush of another worker is running
+            cache.add(FLUSH_LOCK_KEY, 'other')
+
+            with self.assertNumQueries(0):
+                self.assertIsNone(flush_view_counts(10))
+
+            self.assertEqual(Menu.objects.get(pk=self.menus[0].pk).views, 0)
+            cache.delete(FLUSH_LOCK_KEY)
+
+            self.assertEqual(flush_view_counts(10), 3)
+            self.assertEqual(Menu.objects.get(pk=self.menus[0].pk).views, 3)
+            self.assertIsNone(cache.get(FLUSH_LOCK_KEY))
+
+
+class PopularityOrderingTest(APITestCase):
+    def setUp(self):
+        self.dishes = DishFactory.create_batch(3)
+        self.menus = [MenuFactory(dishes=self.dishes) for _ in range(3)]
+        for menu, views in zip(self.menus, [5, 10, 5]):
+            Menu.objects.filter(pk=menu.pk).update(views=views)
+        for dish, views in zip(self.dishes, [1, 0, 7]):
+            Dish.objects.filter(pk=dish.pk).update(views=views)
+
+    def test_menus(self):
+        response = self.client.get(reverse('menus:menu-list'), {'ordering': 'popularity'})
+
+        self.assertEqual([menu['id'] for menu in response.json()], [self.menus[i].pk for i in (1, 2, 0)])
+
+        response = self.client.get(reverse('menus:menu-list'), {'ordering': '-popularity'})
+
+        self.assertEqual([menu['id'] for menu in response.json()], [self.menus[i].pk for i in (0, 2, 1)])
+
+    def test_dishes(self):
+        self.client.force_authenticate(UserFactory())
+
+        response = self.client.get(reverse('menus:dish-list'), {'ordering': 'popularity'})
+
+        self.assertEqual([dish['id'] for dish in response.json()], [self.dishes[i].pk for i in (2, 0, 1)])
@@ -0,0 +1,124 @@
+from decimal import Decimal
+
+from django.test import override_settings
+from django.urls import reverse
+from menus.factories import DishFactory, MenuFactory, UserFactory
+from menus.models import Dish
+from rest_framework.test import APITestCase
+
+
+@override_settings(DISH_FACET_BUCKETS={'price': [Decimal('10')], 'time_to_prepare': []})
+class PriceAdjustmentTest(APITestCase):
+    def setUp(self):
+        self.cheap = DishFactory(price=Decimal('4.99'), is_vegetarian=True)
+        self.expensive = DishFactory(price=Decimal('20.00'), is_vegetarian=False)
+        self.other = DishFactory(price=Decimal('8.00'))
+        self.menu = MenuFactory(dishes=[self.cheap, self.expensive])
+        self.client.force_authenticate(UserFactory())
+
+    def adjust(self, params=None, **data):
+        url = reverse('menus:dish-adjust-prices')
+        if params:
+            url = f'{url}?{params}'
+        return self.client.post(url, data=data)
+
+    def prices(self):
+        return dict(Dish.objects.values_list('pk', 'price'))
+
+    def test_percentage(self):
+        # check and update in a savepoint
+        with self.assertNumQueries(4):
+            response = self.adjust(percentage='10')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {
+                'count': 3,
+                'changed': 3,
+                'dry_run': False,
+                'min': '5.49',
+                'max': '22.00',
+                'price': [{'min': None, 'max': '10.00', 'count': 2}, {'min': '10.00', 'max': None, 'count': 1}],
+            },
+        )
+        self.assertEqual(
+            self.prices(),
+            {self.cheap.pk: Decimal('5.49'), self.expensive.pk: Decimal('22.00'), self.other.pk: Decimal('8.80')},
+        )
+        self.assertEqual(Dish.objects.filter(updated__isnull=False).count(), 3)
+
+    def test_amount_with_rounding(self):
+        response = self.adjust(amount='-1.30', round_to='0.50', rounding='up')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.prices(),
+            {self.cheap.pk: Decimal('4.00'), self.expensive.pk: Decimal('19.00'), self.other.pk: Decimal('7.00')},
+        )
+
+        response = self.adjust(amount='0.20', round_to='1', rounding='down')
+
+        self.assertEqual(response.json()['changed'], 0)
+
+    def test_dry_run(self):
+        with self.assertNumQueries(3):
+            response = self.adjust(percentage='-50', round_to='0.10', dry_run=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['dry_run'])
+        self.assertEqual(response.json()['min'], '2.50')
+        self.assertEqual(response.json()['changed'], 3)
+        self.assertEqual(self.prices()[self.cheap.pk], Decimal('4.99'))
+        self.assertFalse(Dish.objects.filter(updated__isnull=False).exists())
+
+    def test_filters(self):
+        response = self.adjust('is_vegetarian=false&price_min=10', amount='5')
+
+        self.assertEqual(response.json()['count'], 1)
+        self.assertEqual(self.prices()[self.expensive.pk], Decimal('25.00'))
+        self.assertEqual(self.prices()[self.cheap.pk], Decimal('4.99'))
+
+    def test_menu_dishes(self):
+        response = self.client.post(
+            reverse('menus:menu-adjust-prices', kwargs=dict(menu_id=self.menu.pk)) + '?search=' + self.cheap.name,
+            data={'percentage': '100'},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['changed'], 1)
+        self.assertEqual(self.prices()[self.cheap.pk], Decimal('9.98'))
+        self.assertEqual(self.prices()[self.other.pk], Decimal('8.00'))
+
+    def test_price_constraint_is_checked_up_front(self):
+        response = self.adjust(amount='-5')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'price': ['Adjustment makes the price of 1 dishes not positive.']})
+        self.assertEqual(self.prices()[self.expensive.pk], Decimal('20.00'))
+
+        response = self.adjust(amount='9990')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'price': ['Adjustment makes the price of 1 dishes exceed 9999.99.']})
+
+        response = self.adjust(percentage='-100', dry_run=True)
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid(self):
+        response = self.adjust(percentage='10', amount='1')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'non_field_errors': ['Either percentage or amount is required.']})
+
+        response = self.adjust(amount='1', round_to='0')
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_anonymous(self):
+        self.client.force_authenticate(None)
+
+        response = self.adjust(percentage='10')
+
+        self.assertEqual(response.status_code, 401)
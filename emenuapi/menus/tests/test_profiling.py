@@ -0,0 +1,189 @@
+import cProfile
+import json
+import pstats
+import tempfile
+from pathlib import Path
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from menus.factories import MenuFactory, UserFactory
+from menus.profiling import list_profiles, task_postrun, task_prerun, to_speedscope
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+
+class ProfileDirMixin:
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.profile_dir = Path(directory.name)
+        settings_override = override_settings(PROFILE_DIR=self.profile_dir, PROFILE_SAMPLE_RATE=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def authenticate(self, **kwargs):
+        token = Token.objects.create(user=UserFactory(is_active=True, **kwargs))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+
+class ProfilingMiddlewareTest(ProfileDirMixin, APITestCase):
+    def test_not_profiled(self):
+        response = self.client.get(reverse('menus:menu-list'), {'profile': '1'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(list_profiles(), [])
+
+    def test_profile_param_requires_superuser(self):
+        self.authenticate(is_staff=True)
+
+        response = self.client.get(reverse('menus:menu-list'), {'profile': '1'})
+
+        self.assertNotIn('X-Profile-Id', response)
+
+    def test_profile_param(self):
+        self.authenticate(is_staff=True, is_superuser=True)
+        MenuFactory()
+
+        response = self.client.get(reverse('menus:menu-list'), {'profile': '1'})
+
+        self.assertEqual(response.status_code, 200)
+        profile_id = response['X-Profile-Id']
+        profiles = list_profiles()
+        self.assertEqual(len(profiles), 1)
+        self.assertEqual(profiles[0]['id'], profile_id)
+        self.assertEqual(profiles[0]['label'], 'GET menus:menu-list')
+        self.assertEqual(profiles[0]['kind'], 'request')
+        self.assertEqual(profiles[0]['trigger'], 'on_demand')
+        self.assertLessEqual(len(profiles[0]['allocations']), 20)
+        self.assertTrue(self.profile_dir.joinpath(f'{profile_id}.pstats').exists())
+        self.assertTrue(self.profile_dir.joinpath(f'{profile_id}.speedscope.json').exists())
+
+    def test_profile_header(self):
+        self.authenticate(is_staff=True)
+
+        response = self.client.get(reverse('menus:menu-list'), HTTP_X_PROFILE='1')
+
+        self.assertIn('X-Profile-Id', response)
+
+    @override_settings(PROFILE_SAMPLE_RATE=1)
+    def test_sampled(self):
+        response = self.client.get(reverse('menus:menu-list'))
+
+        self.assertNotIn('X-Profile-Id', response)
+        profiles = list_profiles()
+        self.assertEqual(len(profiles), 1)
+        self.assertEqual(profiles[0]['trigger'], 'sampled')
+
+    @override_settings(PROFILE_SAMPLE_RATE=1, PROFILE_MAX_ARTIFACTS=2)
+    def test_rotate(self):
+        for _ in range(3):
+            self.client.get(reverse('menus:menu-list'))
+
+        self.assertEqual(len(list_profiles()), 2)
+        self.assertEqual(len(list(self.profile_dir.iterdir())), 6)
+
+
+class ProfileAPITest(ProfileDirMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        with override_settings(PROFILE_SAMPLE_RATE=1):
+            self.client.get(reverse('menus:menu-list'))
+            self.client.get(reverse('menus:dish-list'))
+        self.profile_id = list_profiles()[0]['id']
+
+    def test_list_requires_staff(self):
+        response = self.client.get(reverse('menus:profile-list'))
+
+        self.assertEqual(response.status_code, 401)
+
+        self.authenticate()
+
+        response = self.client.get(reverse('menus:profile-list'))
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_list(self):
+        self.authenticate(is_staff=True)
+
+        response = self.client.get(reverse('menus:profile-list'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [profile['label'] for profile in response.data], ['GET menus:dish-list', 'GET menus:menu-list']
+        )
+
+        response = self.client.get(reverse('menus:profile-list'), {'label': 'menu-list'})
+
+        self.assertEqual([profile['label'] for profile in response.data], ['GET menus:menu-list'])
+
+    def test_download(self):
+        self.authenticate(is_staff=True)
+
+        response = self.client.get(reverse('menus:profile-download', args=[self.profile_id, 'speedscope']))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment', response['Content-Disposition'])
+        profile = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(profile['profiles'][0]['type'], 'sampled')
+
+        response = self.client.get(reverse('menus:profile-download', args=[self.profile_id, 'pstats']))
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_download_not_found(self):
+        self.authenticate(is_staff=True)
+
+        response = self.client.get(reverse('menus:profile-download', args=[self.profile_id, 'meta']))
+
+        self.assertEqual(response.status_code, 404)
+
+        response = self.client.get(reverse('menus:profile-download', args=['missing', 'pstats']))
+
+        self.assertEqual(response.status_code, 404)
+
+
+class TaskProfilingTest(ProfileDirMixin, TestCase):
+    @override_settings(PROFILE_TASK_SAMPLE_RATE=1)
+    def test_sampled_task(self):
+        class Task:
+            name = 'menus.tasks.report_dishes'
+
+        task_prerun(task_id='1', task=Task())
+        sum(range(1000))
+        task_postrun(task_id='1')
+
+        profiles = list_profiles()
+        self.assertEqual(len(profiles), 1)
+        self.assertEqual(profiles[0]['label'], 'task menus.tasks.report_dishes')
+        self.assertEqual(profiles[0]['kind'], 'task')
+
+    def test_not_sampled_task(self):
+        task_prerun(task_id='1')
+        task_postrun(task_id='1')
+
+        self.assertEqual(list_profiles(), [])
+
+
+class SpeedscopeTest(TestCase):
+    def test_to_speedscope(self):
+        def child():
+            return sum(range(10000))
+
+        def parent():
+            return [child() for _ in range(10)]
+
+        profile = cProfile.Profile()
+        profile.runcall(parent)
+
+        result = to_speedscope(pstats.Stats(profile), 'test')
+
+        frames = result['shared']['frames']
+        samples = result['profiles'][0]['samples']
+        self.assertEqual(len(samples), len(result['profiles'][0]['weights']))
+        stacks = [[frames[index]['name'] for index in sample] for sample in samples]
+        child_stacks = [stack for stack in stacks if 'child' in stack]
+        self.assertTrue(child_stacks)
+        for stack in child_stacks:
+            self.assertLess(stack.index('parent'), stack.index('child'))
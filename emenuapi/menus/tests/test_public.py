@@ -0,0 +1,75 @@
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from menus.factories import DishFactory, MenuFactory, UserFactory
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+
+@override_settings(PUBLIC_READ=True)
+class PublicReadTest(APITestCase):
+    def setUp(self):
+        self.dishes = [DishFactory(image='menus/dish/photo.png'), DishFactory()]
+        self.menu = MenuFactory(name='Breakfast', dishes=self.dishes)
+        self.empty_menu = MenuFactory(dishes=[])
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def assert_parity(self, url, params=None, **extra):
+        response = self.client.get(url, params, **extra)
+        with override_settings(PUBLIC_READ=False):
+            expected = APIClient().get(url, params, **extra)
+
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(dict(response.items()), dict(expected.items()))
+        return response
+
+    def assert_public(self, response, public=True):
+        self.assertEqual(hasattr(response.wsgi_request, 'urlconf'), public)
+
+    def test_responses_match(self):
+        detail = reverse('menus:menu-detail', kwargs=dict(menu_id=self.menu.pk))
+
+        self.assert_public(self.assert_parity(reverse('menus:menu-list')))
+        self.assert_public(self.assert_parity(reverse('menus:menu-list'), {'ordering': 'name', 'search': 'break'}))
+        self.assert_public(self.assert_parity(detail, HTTP_ORIGIN='http://example.com'))
+        self.assert_public(self.assert_parity(detail, {'dishes_limit': 1}))
+        self.assert_public(self.assert_parity(reverse('menus:menu-dishes', kwargs=dict(menu_id=self.menu.pk))))
+
+    def test_errors_match(self):
+        self.assert_public(self.assert_parity(reverse('menus:menu-detail', kwargs=dict(menu_id=self.empty_menu.pk))))
+        self.assert_public(self.assert_parity(reverse('menus:menu-list'), {'created_after': 'x'}))
+        self.assert_public(
+            self.assert_parity(reverse('menus:menu-detail', kwargs=dict(menu_id=self.menu.pk)), {'dishes_limit': 0})
+        )
+
+    def test_accept(self):
+        url = reverse('menus:menu-list')
+
+        self.assert_public(self.assert_parity(url, HTTP_ACCEPT='application/json, text/plain, */*'))
+        self.assert_public(self.assert_parity(url, HTTP_ACCEPT='application/json; indent=2'), False)
+        self.assert_public(self.client.get(url, HTTP_ACCEPT='text/html'), False)
+        self.assert_public(self.client.get(url, {'format': 'json'}), False)
+
+    def test_other_requests_use_full_stack(self):
+        token = Token.objects.create(user=UserFactory(is_active=True))
+
+        response = self.client.get(
+            reverse('menus:menu-detail', kwargs=dict(menu_id=self.empty_menu.pk)),
+            HTTP_AUTHORIZATION=f'Token {token.key}',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assert_public(response, False)
+
+        response = self.client.post(reverse('menus:menu-list'), {})
+
+        self.assertEqual(response.status_code, 401)
+        self.assert_public(response, False)
+
+        # redirected by `CommonMiddleware`
+        self.assert_public(self.assert_parity(reverse('menus:menu-list').rstrip('/')), False)
+        self.assert_public(self.client.get(reverse('menus:dish-list')), False)
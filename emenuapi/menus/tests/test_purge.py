@@ -0,0 +1,129 @@
+import datetime
+import os
+import tempfile
+
+from celery import states
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from menus.factories import DishFactory, MenuFactory
+from menus.models import Dish, Menu
+from menus.purge import find_orphaned_images, purge_deleted, purge_deleted_menus_and_dishes, sweep_orphaned_images
+from menus.tasks import purge_deleted as purge_deleted_task
+from menus.tasks import sweep_media
+
+
+class MediaRootMixin:
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=directory.name, MEDIA_PURGE_DELAY=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def create_image(self, name: str, age: datetime.timedelta = datetime.timedelta()) -> str:
+        name = default_storage.save(f'menus/dish/{name}', ContentFile(b'image'))
+        modified = (timezone.now() - age).timestamp()
+        os.utime(default_storage.path(name), (modified, modified))
+        return name
+
+
+class SoftDeleteTest(TestCase):
+    def test_soft_deleted_rows_are_hidden(self):
+        dish = DishFactory()
+        menu = MenuFactory(dishes=(dish,))
+
+        dish.soft_delete()
+
+        self.assertFalse(Dish.objects.filter(pk=dish.pk).exists())
+        self.assertEqual(list(menu.dishes.all()), [])
+        self.assertEqual(Menu.objects.annotate_num_dishes().get().num_dishes, 0)
+
+    def test_name_of_deleted_menu_can_be_reused(self):
+        MenuFactory(name='Test menu').soft_delete()
+
+        MenuFactory(name='Test menu')
+
+        self.assertEqual(Menu.all_objects.filter(name='Test menu').count(), 2)
+
+
+class PurgeDeletedTest(MediaRootMixin, TestCase):
+    def test_purge_deleted_dishes(self):
+        image = self.create_image('photo.png')
+        deleted_dish, dish = DishFactory(image=image), DishFactory()
+        menu = MenuFactory(dishes=(deleted_dish, dish))
+        deleted_dish.soft_delete()
+
+        self.assertEqual(purge_deleted(Dish, batch_size=10), 1)
+
+        self.assertEqual(list(Dish.all_objects.all()), [dish])
+        self.assertEqual(list(Menu.dishes.through.objects.filter(menu=menu).values_list('dish', flat=True)), [dish.pk])
+        self.assertFalse(default_storage.exists(image))
+
+    def test_purge_deleted_dishes_sharing_images(self):
+        image = self.create_image('photo.png')
+        deleted_dish, copy = DishFactory(image=image), DishFactory(image=image)
+        deleted_dish.soft_delete()
+
+        self.assertEqual(purge_deleted(Dish, batch_size=10), 1)
+
+        self.assertEqual(list(Dish.all_objects.all()), [copy])
+        self.assertTrue(default_storage.exists(image))
+
+    def test_purge_deleted_menus(self):
+        dish = DishFactory()
+        deleted_menu, menu = MenuFactory.create_batch(2, dishes=(dish,))
+        deleted_menu.soft_delete()
+
+        self.assertEqual(purge_deleted(Menu, batch_size=10), 1)
+
+        self.assertEqual(list(Menu.all_objects.all()), [menu])
+        self.assertEqual(list(Menu.dishes.through.objects.values_list('menu', flat=True)), [menu.pk])
+
+    def test_purge_in_batches(self):
+        for dish in DishFactory.create_batch(3):
+            dish.soft_delete()
+
+        self.assertTrue(purge_deleted_menus_and_dishes(batch_size=2))
+        self.assertFalse(purge_deleted_menus_and_dishes(batch_size=2))
+        self.assertFalse(Dish.all_objects.exists())
+
+    def test_run_task(self):
+        DishFactory().soft_delete()
+
+        result = purge_deleted_task.apply()
+
+        self.assertEqual(result.status, states.SUCCESS)
+        self.assertFalse(Dish.all_objects.exists())
+
+
+class SweepMediaTest(MediaRootMixin, TestCase):
+    def test_find_orphaned_images(self):
+        age = datetime.timedelta(hours=2)
+        referenced = self.create_image('referenced.png', age)
+        deleted = self.create_image('deleted.png', age)
+        orphan = self.create_image('orphan.png', age)
+        recent = self.create_image('recent.png')
+        DishFactory(image=referenced)
+        DishFactory(image=deleted).soft_delete()
+
+        self.assertEqual(find_orphaned_images(datetime.timedelta(hours=1), max_files=10), [orphan])
+        self.assertTrue(default_storage.exists(recent))
+
+    def test_find_orphaned_images_without_directory(self):
+        self.assertEqual(find_orphaned_images(datetime.timedelta(hours=1), max_files=10), [])
+
+    @override_settings(MEDIA_SWEEP_GRACE_PERIOD=0, MEDIA_SWEEP_MAX_FILES=2)
+    def test_sweep_is_limited(self):
+        for name in ('a.png', 'b.png', 'c.png'):
+            self.create_image(name)
+
+        self.assertEqual(sweep_orphaned_images(), 2)
+        self.assertEqual(os.listdir(default_storage.path('menus/dish')), ['c.png'])
+
+    def test_run_task(self):
+        result = sweep_media.apply()
+
+        self.assertEqual(result.status, states.SUCCESS)
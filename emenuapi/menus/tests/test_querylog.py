@@ -0,0 +1,109 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from menus.models import Menu
+from menus.querylog import budget_var, fingerprint, get_request_budget, label_var, read_store, summarize
+
+
+class SlowQueryLogMixin:
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(
+            SLOW_QUERY_LOG_FILE=Path(directory.name).joinpath('slow_queries.jsonl'),
+            SLOW_QUERY_THRESHOLD=0,
+            SLOW_QUERY_EXPLAIN_RATE=0,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class FingerprintTest(TestCase):
+    def test_fingerprint(self):
+        self.assertEqual(
+            fingerprint(
+                'SELECT "menus_menu"."id" FROM "menus_menu"\n'
+                'WHERE ("menus_menu"."name" = \'it\'\'s\' AND "menus_menu"."id" IN (%s, %s, %s)) LIMIT 21'
+            ),
+            'SELECT "menus_menu"."id" FROM "menus_menu" WHERE ("menus_menu"."name" = ? AND "menus_menu"."id" IN (...)) '
+            'LIMIT ?',
+        )
+
+
+class StatementTimeoutTest(TestCase):
+    def test_request_budget(self):
+        factory = RequestFactory()
+
+        self.assertEqual(get_request_budget(factory.get('/api/menus/')), 'public')
+        self.assertEqual(get_request_budget(factory.get('/api/menus/', HTTP_AUTHORIZATION='Token x')), 'authenticated')
+        self.assertEqual(get_request_budget(factory.post('/api/menus/')), 'authenticated')
+
+    @override_settings(STATEMENT_TIMEOUTS={'public': 1500, 'authenticated': 5000, 'task': 60000})
+    def test_statement_timeout_of_budget(self):
+        token = budget_var.set('public')
+        self.addCleanup(budget_var.reset, token)
+
+        with connection.cursor() as cursor:
+            cursor.execute('SHOW statement_timeout')
+            self.assertEqual(cursor.fetchone()[0], '1500ms')
+
+    def test_statement_timeout_is_not_counted_as_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('menus:menu-list'))
+
+        self.assertEqual(response.status_code, 200)
+
+
+class SlowQueryLogTest(SlowQueryLogMixin, TestCase):
+    def test_slow_queries_are_logged_with_view(self):
+        with self.assertLogs('menus.querylog', 'WARNING'):
+            self.client.get(reverse('menus:menu-list'))
+
+        entries = [entry for entry in read_store() if entry['label'] == 'GET menus:menu-list']
+        self.assertEqual(len(entries), 1)
+        self.assertIn('FROM "menus_menu"', entries[0]['sql'])
+        self.assertNotIn('plan', entries[0])
+
+    def test_summarize(self):
+        entries = [
+            {'fingerprint': 'a', 'duration_ms': 100.0, 'label': 'x'},
+            {'fingerprint': 'b', 'duration_ms': 300.0, 'label': 'y', 'plan': [{'Plan': {}}]},
+            {'fingerprint': 'a', 'duration_ms': 150.0, 'label': 'x'},
+        ]
+
+        groups = summarize(iter(entries))
+
+        self.assertEqual([group['fingerprint'] for group in groups], ['b', 'a'])
+        self.assertEqual(groups[1]['count'], 2)
+        self.assertEqual(groups[1]['mean_ms'], 125.0)
+        self.assertEqual(groups[0]['plan'], [{'Plan': {}}])
+
+    def test_command(self):
+        token = label_var.set('test')
+        self.addCleanup(label_var.reset, token)
+        with self.assertLogs('menus.querylog', 'WARNING'):
+            Menu.objects.count()
+        stdout = StringIO()
+
+        call_command('slow_queries', stdout=stdout)
+
+        self.assertIn('count=1', stdout.getvalue())
+        self.assertIn('top_label=test', stdout.getvalue())
+        self.assertIn('SELECT COUNT(*)', stdout.getvalue())
+
+
+class ExplainSlowQueryTest(SlowQueryLogMixin, TransactionTestCase):
+    @override_settings(SLOW_QUERY_EXPLAIN_RATE=1)
+    def test_explain_sampled_slow_reads(self):
+        with self.assertLogs('menus.querylog', 'WARNING'):
+            self.assertEqual(Menu.objects.filter(name='Test menu').count(), 0)
+
+        plan = list(read_store())[-1]['plan']
+        self.assertIn('Shared Hit Blocks', plan[0]['Plan'])
+        self.assertEqual(plan[0]['Plan']['Node Type'], 'Aggregate')
@@ -0,0 +1,65 @@
+import gzip
+from io import StringIO
+
+import brotli
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from django.urls import reverse
+from menus.schema import SchemaView, accepted_encodings
+
+
+class SchemaViewTest(SimpleTestCase):
+    def setUp(self):
+        SchemaView.reset()
+        self.schema = settings.SCHEMA_FILE.read_bytes()
+
+    def test_get_schema(self):
+        response = self.client.get(reverse('schema'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, self.schema)
+        self.assertEqual(response['Content-Type'], 'application/vnd.oai.openapi; charset=utf-8')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=300')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertNotIn('Content-Encoding', response)
+
+    def test_get_gzip_schema(self):
+        response = self.client.get(reverse('schema'), HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.schema)
+
+    def test_get_brotli_schema(self):
+        response = self.client.get(reverse('schema'), HTTP_ACCEPT_ENCODING='gzip, br')
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), self.schema)
+
+    def test_not_modified(self):
+        etag = self.client.get(reverse('schema'), HTTP_ACCEPT_ENCODING='gzip')['ETag']
+
+        response = self.client.get(reverse('schema'), HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_variants_have_different_etags(self):
+        identity = self.client.get(reverse('schema'))['ETag']
+        compressed = self.client.get(reverse('schema'), HTTP_ACCEPT_ENCODING='gzip')['ETag']
+
+        self.assertNotEqual(identity, compressed)
+        self.assertEqual(self.client.get(reverse('schema'), HTTP_IF_NONE_MATCH=compressed).status_code, 200)
+
+    def test_accepted_encodings(self):
+        self.assertEqual(accepted_encodings('gzip, br;q=0.5, deflate;q=0'), ['gzip', 'br'])
+        self.assertEqual(accepted_encodings(''), [])
+
+
+class BuildSchemaCommandTest(SimpleTestCase):
+    def test_committed_schema_is_up_to_date(self):
+        stdout = StringIO()
+
+        call_command('build_schema', check=True, stdout=stdout)
+
+        self.assertEqual(stdout.getvalue(), 'Schema is up to date\n')
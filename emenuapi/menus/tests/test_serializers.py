@@ -47,6 +47,47 @@ class MenuSerializerTest(TestCase):
         self.assertEqual(list(menu.dishes.all()), [new_dish])
         self.assertEqual(menu.updated, timezone.now())
 
+    def test_reject_missing_dishes(self):
+        dish = DishFactory()
+        data = {'name': 'Test menu', 'description': 'Test description', 'dishes': [dish.pk, 0, 'x', -1]}
+        serializer = MenuSerializer(data=data)
+
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(
+            serializer.errors,
+            {
+                'dishes': [
+                    ErrorDetail(string='Invalid pk "0" - object does not exist.', code='does_not_exist'),
+                    ErrorDetail(string='Incorrect type. Expected pk value, received str.', code='incorrect_type'),
+                    ErrorDetail(string='Invalid pk "-1" - object does not exist.', code='does_not_exist'),
+                ]
+            },
+        )
+
+    def test_validate_dishes_in_single_query(self):
+        dishes = DishFactory.create_batch(20)
+        data = {'name': 'Test menu', 'description': 'Test description', 'dishes': [dish.pk for dish in dishes]}
+        serializer = MenuSerializer(data=data)
+
+        # one query for the unique name validator and one for all the dishes
+        with self.assertNumQueries(2):
+            self.assertTrue(serializer.is_valid())
+
+        self.assertEqual(serializer.validated_data['dishes'], dishes)
+
+    def test_update_menu_dishes_diff(self):
+        kept_dish, old_dish, new_dish = DishFactory.create_batch(3)
+        menu = MenuFactory(name='Test menu', dishes=(kept_dish, old_dish))
+        data = {'dishes': [kept_dish.pk, new_dish.pk]}
+        serializer = MenuSerializer(menu, data=data, partial=True)
+        serializer.is_valid(raise_exception=True)
+
+        # update of the menu, read of the current dishes, delete of removed and insert of added dishes
+        with self.assertNumQueries(4):
+            menu = serializer.save()
+
+        self.assertEqual(set(menu.dishes.all()), {kept_dish, new_dish})
+
 
 class DishSerializerTest(TestCase):
     def setUp(self):
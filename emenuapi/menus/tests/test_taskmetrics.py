@@ -0,0 +1,145 @@
+import datetime
+import time
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from menus.factories import UserFactory
+from menus.taskmetrics import before_task_publish, get_queue_wait, observe, render, task_postrun, task_prerun
+from menus.tasks import report_dishes
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+cache = caches['shared']
+
+
+@override_settings(TASK_METRICS=True, TASK_METRICS_TIME_BUCKETS=[1, 10], TASK_METRICS_MEMORY_BUCKETS=[1024])
+class TaskMetricsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_render_histogram(self):
+        observe('celery_task_runtime_seconds', 'report', 0.5)
+        observe('celery_task_runtime_seconds', 'report', 5)
+        observe('celery_task_runtime_seconds', 'report', 50)
+
+        metrics = render(['report'])
+
+        self.assertIn('# TYPE celery_task_runtime_seconds histogram', metrics)
+        self.assertIn('celery_task_runtime_seconds_bucket{task="report",le="1.0"} 1\n', metrics)
+        self.assertIn('celery_task_runtime_seconds_bucket{task="report",le="10.0"} 2\n', metrics)
+        self.assertIn('celery_task_runtime_seconds_bucket{task="report",le="+Inf"} 3\n', metrics)
+        self.assertIn('celery_task_runtime_seconds_sum{task="report"} 55.5\n', metrics)
+        self.assertIn('celery_task_runtime_seconds_count{task="report"} 3\n', metrics)
+        self.assertIn('celery_task_queue_wait_seconds_count{task="report"} 0\n', metrics)
+
+    def test_task_signals(self):
+        task = SimpleNamespace(name='report', request=SimpleNamespace(enqueued_at=time.time() - 2, eta=None))
+
+        task_prerun(task_id='1', task=task)
+        task_postrun(task_id='1', task=task, state='SUCCESS')
+
+        metrics = render(['report'])
+        self.assertIn('celery_task_queue_wait_seconds_bucket{task="report",le="1.0"} 0\n', metrics)
+        self.assertIn('celery_task_queue_wait_seconds_bucket{task="report",le="10.0"} 1\n', metrics)
+        self.assertIn('celery_task_runtime_seconds_count{task="report"} 1\n', metrics)
+        self.assertIn('celery_task_memory_delta_bytes_count{task="report"} 1\n', metrics)
+        self.assertIn('celery_task_outcomes_total{task="report",outcome="success"} 1\n', metrics)
+        self.assertIn('celery_task_outcomes_total{task="report",outcome="failure"} 0\n', metrics)
+
+    def test_eager_task(self):
+        report_dishes.apply()
+
+        metrics = render(['menus.tasks.report_dishes'])
+        self.assertIn('celery_task_outcomes_total{task="menus.tasks.report_dishes",outcome="success"} 1\n', metrics)
+
+    def test_publish_sets_enqueued_at(self):
+        headers = {}
+
+        before_task_publish(headers=headers)
+
+        self.assertAlmostEqual(headers['enqueued_at'], time.time(), delta=1)
+
+    @override_settings(TASK_METRICS=False)
+    def test_disabled(self):
+        headers = {}
+        task = SimpleNamespace(name='report', request=SimpleNamespace(enqueued_at=time.time(), eta=None))
+
+        before_task_publish(headers=headers)
+        task_prerun(task_id='1', task=task)
+        task_postrun(task_id='1', task=task, state='SUCCESS')
+
+        self.assertEqual(headers, {})
+        self.assertIn('celery_task_runtime_seconds_count{task="report"} 0\n', render(['report']))
+
+    def test_queue_wait_counts_from_eta(self):
+        now = time.time()
+        eta = datetime.datetime.fromtimestamp(now - 5, tz=datetime.timezone.utc).isoformat()
+
+        self.assertAlmostEqual(get_queue_wait(SimpleNamespace(enqueued_at=now - 60, eta=eta), now), 5, places=3)
+        self.assertAlmostEqual(get_queue_wait(SimpleNamespace(headers={'enqueued_at': now - 60}), now), 60, places=3)
+        self.assertIsNone(get_queue_wait(SimpleNamespace(), now))
+
+
+class TaskMetricsAPITest(APITestCase):
+    def test_requires_staff(self):
+        response = self.client.get(reverse('menus:task-metrics'))
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_metrics(self):
+        token = Token.objects.create(user=UserFactory(is_active=True, is_staff=True))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        response = self.client.get(reverse('menus:task-metrics'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        self.assertIn(
+            b'celery_task_outcomes_total{task="menus.tasks.report_dishes",outcome="success"}', response.content
+        )
+
+
+@override_settings(
+    TASK_METRICS=True,
+    CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'shared': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'test_task_metrics'},
+    },
+)
+class SharedTaskMetricsTest(APITestCase):
+    def setUp(self):
+        call_command('createcachetable', 'test_task_metrics')
+
+    def test_worker_and_web_processes(self):
+        # the worker writes through its own cache instance, the metrics are read back from the database
+        worker_cache = caches.create_connection('shared')
+        task = SimpleNamespace(name='menus.tasks.report_dishes', request=SimpleNamespace())
+        with mock.patch('menus.taskmetrics.get_cache', return_value=worker_cache):
+            task_prerun(task_id='1', task=task)
+            task_postrun(task_id='1', task=task, state='SUCCESS')
+        self.client.force_authenticate(UserFactory(is_staff=True))
+
+        response = self.client.get(reverse('menus:task-metrics'))
+
+        self.assertIsNot(caches['shared'], worker_cache)
+        self.assertIn(
+            b'celery_task_outcomes_total{task="menus.tasks.report_dishes",outcome="success"} 1\n', response.content
+        )
+
+
+class BenchmarkReportDishesTest(TestCase):
+    def test_benchmark(self):
+        out = StringIO()
+
+        call_command('benchmark_report_dishes', '--recipients', '3', '--dishes', '2', '--runs', '1', stdout=out)
+
+        self.assertIn('recipients=3', out.getvalue())
+        self.assertIn('emails=3', out.getvalue())
@@ -0,0 +1,123 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from freezegun import freeze_time
+from menus.factories import DishFactory, MenuFactory, UserFactory
+from menus.throttling import GCRAThrottle, MenuReadThrottle, parse_rate
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+cache = caches['shared']
+
+
+def throttle_rates(**rates: str) -> override_settings:
+    return override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates})
+
+
+@freeze_time("2021-10-3")
+@throttle_rates(menus='2/min', menus_expensive='1/min')
+class MenuReadThrottleTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.menu = MenuFactory(dishes=(DishFactory(),))
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_throttle_anonymous_reads(self):
+        for _ in range(2):
+            response = self.client.get(reverse('menus:menu-list'))
+            self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(reverse('menus:menu-detail', kwargs=dict(menu_id=self.menu.pk)))
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+
+    def test_budget_is_replenished_over_time(self):
+        with freeze_time("2021-10-3") as frozen_time:
+            for _ in range(2):
+                self.client.get(reverse('menus:menu-list'))
+            self.assertEqual(self.client.get(reverse('menus:menu-list')).status_code, 429)
+
+            frozen_time.tick(30)
+
+            self.assertEqual(self.client.get(reverse('menus:menu-list')).status_code, 200)
+            self.assertEqual(self.client.get(reverse('menus:menu-list')).status_code, 429)
+
+    def test_throttle_expensive_reads_separately(self):
+        response = self.client.get(f"{reverse('menus:menu-list')}?ordering=num_dishes")
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(f"{reverse('menus:menu-list')}?search=menu")
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '60')
+
+        response = self.client.get(reverse('menus:menu-list'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_throttle_per_token(self):
+        for _ in range(2):
+            self.client.get(reverse('menus:menu-list'))
+
+        token = Token.objects.create(user=UserFactory(is_active=True))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        response = self.client.get(reverse('menus:menu-list'))
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_forwarded_for_is_ignored_without_proxies(self):
+        for index in range(2):
+            self.client.get(reverse('menus:menu-list'), HTTP_X_FORWARDED_FOR=f'10.0.0.{index}')
+
+        response = self.client.get(reverse('menus:menu-list'), HTTP_X_FORWARDED_FOR='10.0.0.2')
+
+        self.assertEqual(response.status_code, 429)
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1})
+    def test_client_address_behind_proxy(self):
+        with throttle_rates(menus='2/min', menus_expensive='1/min'):
+            for _ in range(2):
+                self.client.get(reverse('menus:menu-list'), HTTP_X_FORWARDED_FOR='10.0.0.1, 192.168.0.1')
+
+            # the address added by the proxy, the ones before it are set by the client
+            response = self.client.get(reverse('menus:menu-list'), HTTP_X_FORWARDED_FOR='10.0.0.2, 192.168.0.1')
+            self.assertEqual(response.status_code, 429)
+
+            response = self.client.get(reverse('menus:menu-list'), HTTP_X_FORWARDED_FOR='192.168.0.2')
+            self.assertEqual(response.status_code, 200)
+
+    def test_writes_are_not_throttled(self):
+        self.client.force_authenticate(UserFactory())
+        data = {'name': 'Test menu', 'description': 'Test description'}
+
+        for _ in range(3):
+            response = self.client.put(reverse('menus:menu-detail', kwargs=dict(menu_id=self.menu.pk)), data=data)
+            self.assertEqual(response.status_code, 200)
+
+
+class MenuReadThrottleExpensiveTest(SimpleTestCase):
+    def setUp(self):
+        self.throttle = MenuReadThrottle()
+
+    def test_large_date_range(self):
+        self.assertFalse(self.throttle.is_large_date_range(None, None))
+        self.assertTrue(self.throttle.is_large_date_range('2021-05-01T00:00:00', None))
+        self.assertTrue(self.throttle.is_large_date_range(None, '2021-05-01T00:00:00'))
+        self.assertFalse(self.throttle.is_large_date_range('2021-05-01T00:00:00', '2021-05-10T00:00:00'))
+        self.assertTrue(self.throttle.is_large_date_range('2021-05-01T00:00:00', '2021-07-01T00:00:00'))
+        self.assertFalse(self.throttle.is_large_date_range('invalid', '2021-07-01T00:00:00'))
+
+    def test_scopes(self):
+        request = Request(APIRequestFactory().get('/api/menus/', {'search': 'soup'}))
+
+        self.assertEqual(self.throttle.get_scopes(request, None), ['menus', 'menus_expensive'])
+        self.assertEqual(GCRAThrottle().get_scopes(request, None), [])
+        self.assertTrue(GCRAThrottle().allow_request(request, None))
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('120/min'), (0.5, 60))
+        self.assertEqual(parse_rate('10/s'), (0.1, 1))
@@ -0,0 +1,170 @@
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from menus.factories import DishFactory, UserFactory
+from menus.uploads import PhotoUpload, delete_expired_uploads
+from rest_framework.test import APITestCase
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'0123456789' * 3
+
+
+class UploadDirMixin:
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.upload_dir = Path(directory.name).joinpath('uploads')
+        settings_override = override_settings(
+            MEDIA_ROOT=Path(directory.name).joinpath('media'),
+            PHOTO_UPLOAD_DIR=self.upload_dir,
+            PHOTO_UPLOAD_PART_MAX_SIZE=16,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class ResumablePhotoUploadTest(UploadDirMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.dish = DishFactory(image='')
+        self.user = UserFactory()
+        self.client.force_authenticate(self.user)
+
+    def init(self, **data):
+        return self.client.post(
+            reverse('menus:dish-photo-uploads', kwargs=dict(dish_id=self.dish.pk)),
+            data={'filename': 'photo.png', 'content_type': 'image/png', 'size': len(PNG), **data},
+        )
+
+    def put_part(self, upload_id, start, data, total=len(PNG)):
+        return self.client.put(
+            reverse('menus:dish-photo-upload', kwargs=dict(dish_id=self.dish.pk, upload_id=upload_id)),
+            data=data,
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{start + len(data) - 1}/{total}',
+        )
+
+    def complete(self, upload_id):
+        return self.client.post(
+            reverse('menus:dish-complete-photo-upload', kwargs=dict(dish_id=self.dish.pk, upload_id=upload_id))
+        )
+
+    def test_upload(self):
+        response = self.init()
+
+        self.assertEqual(response.status_code, 201)
+        upload_id = response.json()['id']
+        self.assertEqual(response.json()['offset'], 0)
+
+        for start in range(0, len(PNG), 16):
+            end = start + 16
+            response = self.put_part(upload_id, start, PNG[start:end])
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['offset'], min(start + 16, len(PNG)))
+
+        with self.assertNumQueries(2):
+            response = self.complete(upload_id)
+
+        self.assertEqual(response.status_code, 200)
+        self.dish.refresh_from_db()
+        self.assertTrue(self.dish.image.name.startswith('menus/dish/photo'))
+        self.assertEqual(self.dish.image.read(), PNG)
+        self.assertIsNotNone(self.dish.updated)
+        self.assertEqual(list(self.upload_dir.iterdir()), [])
+
+    def test_resume(self):
+        upload_id = self.init().json()['id']
+        self.put_part(upload_id, 0, PNG[:16])
+
+        response = self.put_part(upload_id, 20, PNG[20:36])
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json(), {'detail': 'Upload continues at offset 16.'})
+
+        response = self.client.get(
+            reverse('menus:dish-photo-upload', kwargs=dict(dish_id=self.dish.pk, upload_id=upload_id))
+        )
+
+        self.assertEqual(response.json()['offset'], 16)
+
+        self.put_part(upload_id, 16, PNG[16:32])
+        response = self.put_part(upload_id, 32, PNG[32:])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.complete(upload_id).status_code, 200)
+
+    def test_init_limits(self):
+        with override_settings(PHOTO_MAX_SIZE=10):
+            response = self.init()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'size': ['Ensure the photo is not larger than 10 bytes.']})
+
+        response = self.init(content_type='image/gif', filename='photo.gif')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'content_type': ['Unsupported content type image/gif.']})
+
+        response = self.init(filename='photo.jpg')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'filename': ['Extension does not match content type image/png.']})
+
+    def test_part_limits(self):
+        upload_id = self.init().json()['id']
+
+        response = self.put_part(upload_id, 0, PNG[:20])
+
+        self.assertEqual(response.status_code, 413)
+
+        response = self.put_part(upload_id, 0, PNG[:16], total=100)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(PhotoUpload.get(upload_id, self.dish, self.user.pk).offset, 0)
+
+    def test_incomplete(self):
+        upload_id = self.init().json()['id']
+        self.put_part(upload_id, 0, PNG[:16])
+
+        response = self.complete(upload_id)
+
+        self.assertEqual(response.status_code, 409)
+        self.dish.refresh_from_db()
+        self.assertFalse(self.dish.image.name)
+
+    def test_content_does_not_match_type(self):
+        upload_id = self.init(size=16).json()['id']
+        self.put_part(upload_id, 0, b'not a png image!', total=16)
+
+        response = self.complete(upload_id)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'content_type': ['File is not a valid image/png image.']})
+
+    def test_upload_of_other_user(self):
+        upload_id = self.init().json()['id']
+        self.client.force_authenticate(UserFactory())
+
+        response = self.put_part(upload_id, 0, PNG[:16])
+
+        self.assertEqual(response.status_code, 404)
+
+
+class ExpiredUploadsTest(UploadDirMixin, TestCase):
+    @override_settings(PHOTO_UPLOAD_EXPIRY=60)
+    def test_delete_expired_uploads(self):
+        dish = DishFactory(image='')
+        expired = PhotoUpload.create(dish, 1, 'photo.png', 'image/png', 10)
+        active = PhotoUpload.create(dish, 1, 'photo.png', 'image/png', 10)
+        modified = time.time() - 120
+        for path in (expired.data_path, expired.state_path, active.state_path):
+            os.utime(path, (modified, modified))
+
+        self.assertEqual(delete_expired_uploads(), 1)
+        self.assertFalse(expired.state_path.exists())
+        self.assertTrue(active.state_path.exists())
@@ -1,7 +1,9 @@
 import datetime
 
 import pytz
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
 from django.urls import reverse
 from django.utils import timezone
 from freezegun import freeze_time
@@ -97,6 +99,18 @@ class DestroyMenuTest(APITestCase):
 
         response = self.client.delete(reverse('menus:menu-detail', kwargs=dict(menu_id=self.menu.pk)))
 
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Menu.objects.filter(pk=self.menu.pk).exists())
+        self.menu.refresh_from_db()
+        self.assertIsNotNone(self.menu.deleted)
+
+    @override_settings(DELETE_MODE='immediate')
+    def test_immediate_delete_mode(self):
+        user = UserFactory()
+        self.client.force_authenticate(user)
+
+        response = self.client.delete(reverse('menus:menu-detail', kwargs=dict(menu_id=self.menu.pk)))
+
         self.assertEqual(response.status_code, 204)
 
         with self.assertRaises(Menu.DoesNotExist):
@@ -289,9 +303,9 @@ class DestroyDishTest(APITestCase):
         )
 
         self.assertEqual(response.status_code, 204)
-
-        with self.assertRaises(Dish.DoesNotExist):
-            self.dish.refresh_from_db()
+        self.assertFalse(Dish.objects.filter(pk=self.dish.pk).exists())
+        self.dish.refresh_from_db()
+        self.assertEqual(self.dish.deleted, timezone.now())
 
 
 class ListDishTest(APITestCase):
@@ -322,7 +336,7 @@ class ListDishTest(APITestCase):
 class UploadDishPhotoTest(APITestCase):
     def setUp(self):
         self.dish = DishFactory(image='')
-        image = SimpleUploadedFile("image.png", b"image_content", content_type="image/png")
+        image = SimpleUploadedFile("image.png", b"\x89PNG\r\n\x1a\nimage_content", content_type="image/png")
         self.data = {'file': image}
 
     def test_unauthenticated_user_cannot_upload_photo(self):
@@ -349,3 +363,301 @@ class UploadDishPhotoTest(APITestCase):
 
         self.assertTrue(self.dish.image.name)
         self.assertEqual(self.dish.updated, timezone.now())
+
+    def test_unsupported_photo_type(self):
+        self.client.force_authenticate(UserFactory())
+
+        response = self.client.post(
+            reverse('menus:dish-photo', kwargs=dict(dish_id=self.dish.pk)),
+            data={'file': SimpleUploadedFile("image.gif", b"GIF89a", content_type="image/gif")},
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'content_type': ['Unsupported content type image/gif.']})
+
+    def test_photo_content_must_match_type(self):
+        self.client.force_authenticate(UserFactory())
+
+        response = self.client.post(
+            reverse('menus:dish-photo', kwargs=dict(dish_id=self.dish.pk)),
+            data={'file': SimpleUploadedFile("image.png", b"<svg></svg>", content_type="image/png")},
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'content_type': ['File is not a valid image/png image.']})
+        self.dish.refresh_from_db()
+        self.assertFalse(self.dish.image.name)
+
+    @override_settings(PHOTO_MAX_SIZE=4)
+    def test_photo_too_large(self):
+        self.client.force_authenticate(UserFactory())
+
+        response = self.client.post(
+            reverse('menus:dish-photo', kwargs=dict(dish_id=self.dish.pk)),
+            data=self.data,
+        )
+
+        self.assertEqual(response.status_code, 413)
+        self.dish.refresh_from_db()
+        self.assertFalse(self.dish.image.name)
+
+
+class MenuQueriesTest(APITestCase):
+    def setUp(self):
+        self.dishes = DishFactory.create_batch(5)
+        self.menus = MenuFactory.create_batch(3, dishes=self.dishes)
+        self.menu = self.menus[0]
+        cache.clear()
+
+    def test_list_queries(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('menus:menu-list'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 3)
+
+    def test_retrieve_queries(self):
+        # menu, keys of the dishes and the dishes missing in the fragment cache
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('menus:menu-detail', kwargs=dict(menu_id=self.menu.pk)))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['dishes']), 5)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('menus:menu-detail', kwargs=dict(menu_id=self.menus[1].pk)))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['dishes']), 5)
+
+    def test_update_queries(self):
+        self.client.force_authenticate(UserFactory())
+        data = {'name': 'Test menu', 'description': 'Test description', 'dishes': [self.dishes[0].pk]}
+
+        # get, unique name check, dishes validation, update, dishes diff read and delete, response dishes
+        with self.assertNumQueries(7):
+            response = self.client.put(
+                reverse('menus:menu-detail', kwargs=dict(menu_id=self.menu.pk)), data=data, format='json'
+            )
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_destroy_queries(self):
+        self.client.force_authenticate(UserFactory())
+
+        # get and soft delete, the purge happens in the background
+        with self.assertNumQueries(2):
+            response = self.client.delete(reverse('menus:menu-detail', kwargs=dict(menu_id=self.menu.pk)))
+
+        self.assertEqual(response.status_code, 204)
+
+
+class DishQueriesTest(APITestCase):
+    def setUp(self):
+        self.dish = DishFactory()
+        MenuFactory(dishes=(self.dish,))
+        self.client.force_authenticate(UserFactory())
+        cache.clear()
+
+    def test_list_queries(self):
+        DishFactory.create_batch(5)
+
+        # keys of the dishes and the dishes missing in the fragment cache
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('menus:dish-list'))
+
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('menus:dish-list'))
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_retrieve_queries(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('menus:dish-detail', kwargs=dict(dish_id=self.dish.pk)))
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_update_queries(self):
+        data = {
+            'name': 'Test dish',
+            'description': 'Test dish description',
+            'price': '24.99',
+            'time_to_prepare': 30,
+            'is_vegetarian': False,
+        }
+
+        with self.assertNumQueries(2):
+            response = self.client.put(reverse('menus:dish-detail', kwargs=dict(dish_id=self.dish.pk)), data=data)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_destroy_queries(self):
+        # get and soft delete, the purge happens in the background
+        with self.assertNumQueries(2):
+            response = self.client.delete(reverse('menus:dish-detail', kwargs=dict(dish_id=self.dish.pk)))
+
+        self.assertEqual(response.status_code, 204)
+
+
+class SearchDishTest(APITestCase):
+    def setUp(self):
+        self.soup = DishFactory(name='Tomato soup', price='8.50', time_to_prepare=10, is_vegetarian=True)
+        self.pasta = DishFactory(name='Pasta', description='With tomato', price='24.00', time_to_prepare=20)
+        self.steak = DishFactory(name='Steak', price='55.00', time_to_prepare=45, is_vegetarian=False)
+        self.pasta.is_vegetarian = False
+        self.pasta.save()
+
+    def test_unauthenticated_user_cannot_search_dishes(self):
+        response = self.client.get(reverse('menus:dish-search'))
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_search_dishes(self):
+        self.client.force_authenticate(UserFactory())
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('menus:dish-search'), data={'search': 'tomato'})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['count'], 2)
+        self.assertEqual(data['results'], DishSerializer([self.pasta, self.soup], many=True).data)
+        self.assertEqual(
+            data['facets'],
+            {
+                'is_vegetarian': {'true': 1, 'false': 1},
+                'price': [
+                    {'min': None, 'max': '10.00', 'count': 1},
+                    {'min': '10.00', 'max': '25.00', 'count': 1},
+                    {'min': '25.00', 'max': '50.00', 'count': 0},
+                    {'min': '50.00', 'max': None, 'count': 0},
+                ],
+                'time_to_prepare': [
+                    {'min': None, 'max': 15, 'count': 1},
+                    {'min': 15, 'max': 30, 'count': 1},
+                    {'min': 30, 'max': 60, 'count': 0},
+                    {'min': 60, 'max': None, 'count': 0},
+                ],
+            },
+        )
+
+    def test_search_dishes_pagination(self):
+        self.client.force_authenticate(UserFactory())
+
+        response = self.client.get(reverse('menus:dish-search'), data={'is_vegetarian': False, 'limit': 1})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['count'], 2)
+        self.assertEqual(data['results'], DishSerializer([self.steak], many=True).data)
+        self.assertIsNotNone(data['next'])
+        self.assertEqual(data['facets']['is_vegetarian'], {'true': 0, 'false': 2})
+
+    def test_search_dishes_invalid_filter(self):
+        self.client.force_authenticate(UserFactory())
+
+        response = self.client.get(reverse('menus:dish-search'), data={'price_min': 'cheap'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'price': ['Enter a number.']})
+
+
+class SearchMenuDishesTest(APITestCase):
+    def setUp(self):
+        self.dish = DishFactory(name='Tomato soup')
+        self.menu = MenuFactory(dishes=(self.dish,))
+        self.empty_menu = MenuFactory()
+        DishFactory(name='Tomato salad')
+
+    def test_unauthenticated_user_can_search_dishes_of_non_empty_menu(self):
+        response = self.client.get(
+            reverse('menus:menu-search-dishes', kwargs=dict(menu_id=self.menu.pk)), data={'search': 'tomato'}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 1)
+        self.assertEqual(response.json()['results'], DishSerializer([self.dish], many=True).data)
+
+    def test_unauthenticated_user_cannot_search_dishes_of_empty_menu(self):
+        response = self.client.get(reverse('menus:menu-search-dishes', kwargs=dict(menu_id=self.empty_menu.pk)))
+
+        self.assertEqual(response.status_code, 404)
+
+
+class BatchRetrieveMenuTest(APITestCase):
+    def setUp(self):
+        self.dishes = DishFactory.create_batch(3)
+        self.menus = MenuFactory.create_batch(4, dishes=self.dishes)
+        self.empty_menu = MenuFactory()
+        cache.clear()
+
+    def test_unauthenticated_user_can_retrieve_non_empty_menus_in_request_order(self):
+        ids = [self.menus[2].pk, self.empty_menu.pk, self.menus[0].pk, 0, self.menus[2].pk]
+
+        response = self.client.get(reverse('menus:menu-list'), data={'ids': ','.join(map(str, ids))})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), MenuDetailsSerializer([self.menus[2], self.menus[0]], many=True).data)
+
+    def test_dishes_limit_is_ignored(self):
+        response = self.client.get(reverse('menus:menu-list'), data={'ids': f'{self.menus[0].pk}', 'dishes_limit': 1})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), MenuDetailsSerializer([self.menus[0]], many=True).data)
+
+    def test_authenticated_user_can_retrieve_empty_menus(self):
+        self.client.force_authenticate(UserFactory())
+
+        response = self.client.get(reverse('menus:menu-list'), data={'ids': f'{self.empty_menu.pk}'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), MenuDetailsSerializer([self.empty_menu], many=True).data)
+
+    def test_constant_number_of_queries(self):
+        for menus in (self.menus[:1], self.menus):
+            cache.clear()
+            # menus, keys of their dishes and the dishes missing in the fragment cache
+            with self.assertNumQueries(3):
+                response = self.client.get(
+                    reverse('menus:menu-list'), data={'ids': ','.join(str(menu.pk) for menu in menus)}
+                )
+
+            self.assertEqual(len(response.json()), len(menus))
+
+    @override_settings(BATCH_RETRIEVE_MAX_SIZE=2)
+    def test_max_batch_size(self):
+        response = self.client.get(
+            reverse('menus:menu-list'), data={'ids': ','.join(str(menu.pk) for menu in self.menus[:3])}
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'ids': ['Ensure there are no more than 2 ids.']})
+
+    def test_invalid_ids(self):
+        response = self.client.get(reverse('menus:menu-list'), data={'ids': '1,x'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'ids': ['Enter comma separated integers.']})
+
+
+class BatchRetrieveDishTest(APITestCase):
+    def setUp(self):
+        self.dishes = DishFactory.create_batch(3)
+
+    def test_unauthenticated_user_cannot_retrieve_dishes(self):
+        response = self.client.get(reverse('menus:dish-list'), data={'ids': f'{self.dishes[0].pk}'})
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_retrieve_dishes_in_request_order(self):
+        self.client.force_authenticate(UserFactory())
+
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                reverse('menus:dish-list'), data={'ids': f'{self.dishes[2].pk},{self.dishes[0].pk}'}
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), DishSerializer([self.dishes[2], self.dishes[0]], many=True).data)
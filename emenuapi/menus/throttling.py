@@ -0,0 +1,135 @@
+import datetime
+import math
+import time
+from typing import Dict, List, Optional, Tuple, cast
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.utils.dateparse import parse_datetime
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+from rest_framework.views import APIView
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+class GCRAThrottle(BaseThrottle):
+    """
+    Generic cell rate algorithm throttle.
+
+    Each budget keeps a single theoretical arrival time (TAT) in the cache. A request is
+    allowed when it doesn't push the TAT more than the rate period ahead of now, which
+    allows bursts of up to the full rate and then spaces requests evenly. All budgets of
+    a request are read with one `get_many` and, if allowed, written with one `set_many`.
+    Django's cache API has no atomic read-modify-write, so concurrent requests of the
+    same client may overshoot a budget by the number of requests in flight.
+
+    Rates are read per scope from `REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']`, budgets are kept
+    in the `MENU_THROTTLE_CACHE` cache. Requests consume the budget of `scope`, subclasses can add
+    scopes per request in `get_scopes`.
+    """
+
+    scope: Optional[str] = None
+    cache_format = 'throttle_gcra_%(scope)s_%(ident)s'
+
+    def __init__(self) -> None:
+        self.retry_after: Optional[float] = None
+
+    @property
+    def cache(self) -> BaseCache:
+        return caches[settings.MENU_THROTTLE_CACHE]
+
+    def get_scopes(self, request: Request, view: APIView) -> List[str]:
+        return [self.scope] if self.scope else []
+
+    def get_client_ident(self, request: Request) -> str:
+        if request.auth is not None and hasattr(request.auth, 'key'):
+            return f'token:{request.auth.key}'
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        # the address of the client as seen by the last of `NUM_PROXIES` proxies
+        return f'ip:{self.get_ident(request)}'
+
+    def allow_request(self, request: Request, view: APIView) -> bool:
+        ident = self.get_client_ident(request)
+        limits: Dict[str, Tuple[float, int]] = {}
+        for scope in self.get_scopes(request, view):
+            rate = cast(Optional[str], api_settings.DEFAULT_THROTTLE_RATES.get(scope))
+            if rate is not None:
+                limits[self.cache_format % {'scope': scope, 'ident': ident}] = parse_rate(rate)
+
+        if not limits:
+            return True
+
+        now = time.time()
+        tats = self.cache.get_many(list(limits))
+        new_tats = {}
+        retry_after = 0.0
+        for key, (interval, period) in limits.items():
+            new_tat = max(tats.get(key, now), now) + interval
+            retry_after = max(retry_after, new_tat - now - period)
+            new_tats[key] = new_tat
+
+        if retry_after > 0:
+            self.retry_after = retry_after
+            return False
+
+        self.cache.set_many(new_tats, timeout=math.ceil(max(period for _, period in limits.values())))
+        return True
+
+    def wait(self) -> Optional[float]:
+        return self.retry_after
+
+
+class MenuReadThrottle(GCRAThrottle):
+    """
+    Throttles public menu reads per token or IP. Expensive queries, i.e. searches,
+    ordering by `num_dishes` and open or wide date ranges, also consume a separate
+    and smaller budget.
+    """
+
+    scope = 'menus'
+    expensive_scope = 'menus_expensive'
+    date_range_filters = ('created', 'updated')
+
+    def get_scopes(self, request: Request, view: APIView) -> List[str]:
+        scopes = super().get_scopes(request, view)
+        if self.is_expensive(request, view):
+            scopes.append(self.expensive_scope)
+        return scopes
+
+    def is_expensive(self, request: Request, view: APIView) -> bool:
+        params = request.query_params
+        if params.get(api_settings.SEARCH_PARAM):
+            return True
+        if 'num_dishes' in params.get(api_settings.ORDERING_PARAM, ''):
+            return True
+        return any(
+            self.is_large_date_range(params.get(f'{name}_after'), params.get(f'{name}_before'))
+            for name in self.date_range_filters
+        )
+
+    def is_large_date_range(self, after: Optional[str], before: Optional[str]) -> bool:
+        if not after and not before:
+            return False
+        if not after or not before:
+            return True
+        try:
+            start, end = parse_datetime(after), parse_datetime(before)
+            if start is None or end is None:
+                return False
+            return end - start > datetime.timedelta(days=settings.MENU_THROTTLE_MAX_DATE_RANGE_DAYS)
+        except (TypeError, ValueError):
+            # ranges that can't be compared are left to the filter to validate
+            return False
+
+
+def parse_rate(rate: str) -> Tuple[float, int]:
+    """
+    Parses `<number of requests>/<period>` into the emission interval and the period in seconds.
+    """
+    num, period = rate.split('/')
+    duration = PERIODS[period[0]]
+    return duration / int(num), duration
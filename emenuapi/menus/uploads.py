@@ -0,0 +1,251 @@
+import fcntl
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from menus.events import publish
+from menus.models import Dish
+from rest_framework.exceptions import APIException, NotFound, ParseError, ValidationError
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_ID = '[0-9a-f]{32}'
+CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+READ_SIZE = 64 * 1024
+# room for the boundaries and headers of a multipart body around the photo
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class PayloadTooLarge(APIException):
+    status_code = 413
+    default_detail = 'Request body is too large.'
+    default_code = 'payload_too_large'
+
+
+class OffsetMismatch(APIException):
+    status_code = 409
+    default_detail = 'Part does not start at the current offset of the upload.'
+    default_code = 'offset_mismatch'
+
+
+def check_content_length(meta: Dict[str, Any], max_size: int) -> int:
+    """
+    Checks the declared length of a request body against `max_size` before it's read.
+    """
+    try:
+        length = int(meta.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        raise ParseError('Invalid Content-Length header.')
+    if length > max_size:
+        raise PayloadTooLarge(f'Request body exceeds {max_size} bytes.')
+    return length
+
+
+def check_photo_type(filename: str, content_type: str) -> None:
+    extensions = settings.PHOTO_CONTENT_TYPES.get(content_type)
+    if extensions is None:
+        raise ValidationError({'content_type': [f'Unsupported content type {content_type}.']})
+    if os.path.splitext(filename)[1].lower() not in extensions:
+        raise ValidationError({'filename': [f'Extension does not match content type {content_type}.']})
+
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    """
+    Recognizes the accepted image formats by their leading bytes.
+    """
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+def check_photo_content(file: File, content_type: str) -> None:
+    """
+    Checks that the leading bytes of `file` match `content_type`, and rewinds it.
+    """
+    head = file.read(16)
+    file.seek(0)
+    if sniff_content_type(head) != content_type:
+        raise ValidationError({'content_type': [f'File is not a valid {content_type} image.']})
+
+
+def attach_photo(dish: Dish, file: File, filename: str) -> Dish:
+    """
+    Stores `file` as the photo of `dish`.
+
+    The file is written to the storage outside of any transaction, then the dish is updated
+    with a single `UPDATE`, so no transaction or row lock is held while the file is copied.
+    The previous photo is left to the orphaned images sweep.
+    """
+    field = Dish._meta.get_field('image')
+    name = default_storage.save(field.generate_filename(dish, filename), file)
+    updated = timezone.now()
+    if not Dish.objects.filter(pk=dish.pk).update(image=name, updated=updated):
+        # the dish was deleted in the meantime
+        default_storage.delete(name)
+        raise NotFound()
+    dish.image.name, dish.updated = name, updated
+    publish(dish)
+    return dish
+
+
+def get_upload_dir() -> Path:
+    path = Path(settings.PHOTO_UPLOAD_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+class PhotoUpload:
+    """
+    Resumable upload of a dish photo, received in parts appended to a file in `PHOTO_UPLOAD_DIR`.
+
+    The state is kept next to the data in a JSON file, the received offset is the size of the
+    data file, so an upload can be resumed from any process sharing the directory.
+    """
+
+    def __init__(
+        self, id: str, dish_id: int, user_id: int, filename: str, content_type: str, size: int, created: str
+    ) -> None:
+        self.id = id
+        self.dish_id = dish_id
+        self.user_id = user_id
+        self.filename = filename
+        self.content_type = content_type
+        self.size = size
+        self.created = created
+
+    @property
+    def data_path(self) -> Path:
+        return get_upload_dir().joinpath(f'{self.id}.part')
+
+    @property
+    def state_path(self) -> Path:
+        return get_upload_dir().joinpath(f'{self.id}.json')
+
+    @property
+    def offset(self) -> int:
+        try:
+            return self.data_path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    @classmethod
+    def create(cls, dish: Dish, user_id: int, filename: str, content_type: str, size: int) -> 'PhotoUpload':
+        upload = cls(uuid.uuid4().hex, dish.pk, user_id, filename, content_type, size, timezone.now().isoformat())
+        upload.data_path.touch()
+        upload.state_path.write_text(json.dumps(upload.to_dict()))
+        return upload
+
+    @classmethod
+    def get(cls, upload_id: str, dish: Dish, user_id: int) -> 'PhotoUpload':
+        try:
+            state = json.loads(get_upload_dir().joinpath(f'{upload_id}.json').read_text())
+        except FileNotFoundError:
+            raise NotFound()
+        upload = cls(**state)
+        if upload.dish_id != dish.pk or upload.user_id != user_id:
+            raise NotFound()
+        return upload
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'dish_id': self.dish_id,
+            'user_id': self.user_id,
+            'filename': self.filename,
+            'content_type': self.content_type,
+            'size': self.size,
+            'created': self.created,
+        }
+
+    def parse_content_range(self, header: Optional[str]) -> Tuple[int, int]:
+        match = CONTENT_RANGE.match(header or '')
+        if match is None:
+            raise ParseError('Content-Range header of the form "bytes start-end/size" is required.')
+        start, end, size = (int(value) for value in match.groups())
+        if size != self.size or start > end or end >= size:
+            raise ParseError(f'Content-Range does not fit the upload of {self.size} bytes.')
+        return start, end
+
+    def write_part(self, meta: Dict[str, Any], stream: Any) -> None:
+        """
+        Appends the body of a part request to the upload. The range and length are checked
+        before the body is read, so oversized or misplaced parts are rejected right away.
+        """
+        start, end = self.parse_content_range(meta.get('HTTP_CONTENT_RANGE'))
+        length = end - start + 1
+        if length > settings.PHOTO_UPLOAD_PART_MAX_SIZE:
+            raise PayloadTooLarge(f'Part exceeds {settings.PHOTO_UPLOAD_PART_MAX_SIZE} bytes.')
+        if check_content_length(meta, settings.PHOTO_UPLOAD_PART_MAX_SIZE) != length:
+            raise ParseError('Content-Length does not match Content-Range.')
+
+        with self.data_path.open('ab') as data:
+            # parts of the same upload sent in parallel are written one at a time
+            fcntl.flock(data, fcntl.LOCK_EX)
+            offset = os.fstat(data.fileno()).st_size
+            if offset != start:
+                raise OffsetMismatch(f'Upload continues at offset {offset}.')
+            try:
+                remaining = length
+                while remaining:
+                    chunk = stream.read(min(READ_SIZE, remaining))
+                    if not chunk:
+                        raise ParseError('Request body is shorter than Content-Length.')
+                    data.write(chunk)
+                    remaining -= len(chunk)
+            except Exception:
+                # a part cut short is dropped as a whole, the client resends it
+                data.truncate(start)
+                raise
+
+    def complete(self, dish: Dish) -> Dish:
+        if self.offset != self.size:
+            raise OffsetMismatch(f'Upload is incomplete, {self.offset} of {self.size} bytes received.')
+        with self.data_path.open('rb') as data:
+            try:
+                check_photo_content(File(data), self.content_type)
+            except ValidationError:
+                self.delete()
+                raise
+            dish = attach_photo(dish, File(data), self.filename)
+        self.delete()
+        return dish
+
+    def delete(self) -> None:
+        for path in (self.data_path, self.state_path):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def delete_expired_uploads() -> int:
+    """
+    Deletes uploads that weren't completed within `PHOTO_UPLOAD_EXPIRY` seconds.
+    """
+    cutoff = time.time() - settings.PHOTO_UPLOAD_EXPIRY
+    deleted = 0
+    for state_path in get_upload_dir().glob('*.json'):
+        if state_path.stat().st_mtime > cutoff:
+            continue
+        upload = PhotoUpload(**json.loads(state_path.read_text()))
+        # an upload still receiving parts is kept alive
+        if upload.data_path.exists() and upload.data_path.stat().st_mtime > cutoff:
+            continue
+        upload.delete()
+        deleted += 1
+    if deleted:
+        logger.info('Deleted %d expired photo uploads', deleted)
+    return deleted
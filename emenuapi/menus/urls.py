@@ -1,3 +1,6 @@
+from django.urls import path
+from menus.profiling import ProfileDownloadAPIView, ProfileListAPIView
+from menus.taskmetrics import TaskMetricsAPIView
 from menus.views import DishModelViewSet, MenuModelViewSet
 from rest_framework.routers import DefaultRouter
 
@@ -7,4 +10,8 @@ router = DefaultRouter()
 router.register(r'menus', MenuModelViewSet, basename='menu')
 router.register(r'dishes', DishModelViewSet, basename='dish')
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    path('metrics/tasks/', TaskMetricsAPIView.as_view(), name='task-metrics'),
+    path('profiles/', ProfileListAPIView.as_view(), name='profile-list'),
+    path('profiles/<str:profile_id>/<str:artifact>/', ProfileDownloadAPIView.as_view(), name='profile-download'),
+]
@@ -1,43 +1,195 @@
-from typing import cast
+from typing import Any, Dict, List, Union, cast
 
+from django.conf import settings
 from django.db import models, transaction
-from django.utils import timezone
+from django.urls import reverse
 from django_filters.rest_framework import DjangoFilterBackend
-from drf_spectacular.types import OpenApiTypes
-from drf_spectacular.utils import OpenApiParameter, extend_schema
-from menus.filters import MenuFilter
-from menus.models import Dish, Menu
-from menus.serializers import DishSerializer, MenuDetailsSerializer, MenuSerializer
-from rest_framework import filters
+from django_filters.utils import translate_validation
+from menus.batch import BATCH_PARAM, BatchRetrieveMixin
+from menus.catalog import CatalogSnapshotMixin
+from menus.cloning import clone_menu
+from menus.coalescing import CoalescingMixin
+from menus.events import publish
+from menus.facets import FacetedPagination
+from menus.filters import POPULARITY, DishSearchFilter, MenuFilter, PopularityOrderingFilter
+from menus.models import Dish, Menu, MenuQuerySet
+from menus.pagination import (
+    DISH_ORDERING_FIELDS,
+    DISHES_LIMIT_PARAM,
+    DishMenusPagination,
+    MenuDishesPagination,
+    get_dishes_limit,
+)
+from menus.pgjson import DatabaseJSONMixin
+from menus.planner import QuerySetPlannerMixin
+from menus.popularity import record_view
+from menus.pricing import adjust_prices
+from menus.schema import OpenApiParameter, OpenApiTypes, extend_schema
+from menus.serializers import (
+    DishMenuSerializer,
+    DishMenusPageSerializer,
+    DishSearchSerializer,
+    DishSerializer,
+    MenuCloneSerializer,
+    MenuDetailsSerializer,
+    MenuDishesPageSerializer,
+    MenuDishesPreviewSerializer,
+    MenuSerializer,
+    PhotoUploadInitSerializer,
+    PhotoUploadSerializer,
+    PriceAdjustmentResultSerializer,
+    PriceAdjustmentSerializer,
+)
+from menus.throttling import MenuReadThrottle
+from menus.uploads import (
+    MULTIPART_OVERHEAD,
+    UPLOAD_ID,
+    PayloadTooLarge,
+    PhotoUpload,
+    attach_photo,
+    check_content_length,
+    check_photo_content,
+    check_photo_type,
+)
+from rest_framework import filters, status
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.decorators import action
 from rest_framework.exceptions import ParseError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
-from rest_framework.viewsets import ModelViewSet
+from rest_framework.viewsets import GenericViewSet, ModelViewSet
+
+MENU_IDS_PARAM = 'menu_ids'
+
+PUBLIC_ACTIONS = ['list', 'retrieve', 'search_dishes', 'dishes']
+
+DISH_FILTER_PARAMETERS = [
+    OpenApiParameter(
+        name='search',
+        type=OpenApiTypes.STR,
+        location=OpenApiParameter.QUERY,
+        description='Filter results by name or description',
+    ),
+    OpenApiParameter(name='is_vegetarian', type=OpenApiTypes.BOOL, location=OpenApiParameter.QUERY),
+    OpenApiParameter(name='price_min', type=OpenApiTypes.DECIMAL, location=OpenApiParameter.QUERY),
+    OpenApiParameter(name='price_max', type=OpenApiTypes.DECIMAL, location=OpenApiParameter.QUERY),
+    OpenApiParameter(name='time_to_prepare_min', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY),
+    OpenApiParameter(name='time_to_prepare_max', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY),
+]
+
+DISH_SEARCH_PARAMETERS = [
+    *DISH_FILTER_PARAMETERS,
+    OpenApiParameter(name='limit', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY),
+    OpenApiParameter(name='offset', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY),
+]
+
+MENU_IDS_PARAMETER = OpenApiParameter(
+    name=MENU_IDS_PARAM,
+    type=OpenApiTypes.BOOL,
+    location=OpenApiParameter.QUERY,
+    description='Adds menu_ids, the ids of the menus containing each dish',
+)
+
+BATCH_PARAMETER = OpenApiParameter(
+    name=BATCH_PARAM,
+    type=OpenApiTypes.STR,
+    location=OpenApiParameter.QUERY,
+    description='Comma separated ids, returns the details of these objects in the same order instead of the list',
+)
 
 
-class MenuModelViewSet(ModelViewSet):
+def delete_instance(instance: Union[Menu, Dish]) -> None:
+    if settings.DELETE_MODE == 'deferred':
+        instance.soft_delete()
+        publish(instance)
+    else:
+        # the event is taken while the instance still has its id and sent once it's gone
+        with transaction.atomic():
+            publish(instance, deleted=True)
+            instance.delete()
+
+
+def search_dishes(view: GenericViewSet, request: Request, queryset: models.QuerySet[Dish]) -> Response:
+    filterset = DishSearchFilter(request.query_params, queryset=queryset, request=request)
+    if not filterset.is_valid():
+        raise translate_validation(filterset.errors)
+
+    paginator = FacetedPagination()
+    page = paginator.paginate_queryset(filterset.qs.order_by('-created'), request, view=view)
+    return paginator.get_paginated_response(DishSerializer(page, many=True).data)
+
+
+def add_menu_ids(data: Union[List[Dict[str, Any]], Dict[str, Any]]) -> None:
+    """
+    Adds `menu_ids` to dish representations, loaded from the links with one query. Done after
+    serializing, as the representations of dishes are cached without them.
+    """
+    dishes = data if isinstance(data, list) else [data]
+    menu_ids: Dict[int, List[int]] = {dish['id']: [] for dish in dishes}
+    links = Menu.dishes.through.objects.filter(dish_id__in=list(menu_ids), menu__deleted__isnull=True)
+    for dish_id, menu_id in links.order_by('dish_id', 'menu_id').values_list('dish_id', 'menu_id'):
+        menu_ids[dish_id].append(menu_id)
+    for dish in dishes:
+        dish[MENU_IDS_PARAM] = menu_ids[dish['id']]
+
+
+def adjust_dish_prices(request: Request, queryset: models.QuerySet[Dish]) -> Response:
+    # the dishes are selected with the filters of the dish search
+    filterset = DishSearchFilter(request.query_params, queryset=queryset, request=request)
+    if not filterset.is_valid():
+        raise translate_validation(filterset.errors)
+    serializer = PriceAdjustmentSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    result = adjust_prices(filterset.qs, **serializer.validated_data)
+    return Response(PriceAdjustmentResultSerializer(result).data)
+
+
+class MenuModelViewSet(
+    CoalescingMixin,
+    CatalogSnapshotMixin,
+    BatchRetrieveMixin,
+    DatabaseJSONMixin,
+    QuerySetPlannerMixin,
+    ModelViewSet,
+):
     lookup_url_kwarg = 'menu_id'
-    filter_backends = [filters.OrderingFilter, filters.SearchFilter, DjangoFilterBackend]
-    ordering_fields = ['name', 'num_dishes']
+    filter_backends = [PopularityOrderingFilter, filters.SearchFilter, DjangoFilterBackend]
+    ordering_fields = ['name', 'num_dishes', POPULARITY]
     search_fields = ['name']
     filterset_class = MenuFilter
 
     def get_queryset(self) -> models.QuerySet["Menu"]:
-        qs = cast(models.QuerySet["Menu"], Menu.objects.with_num_dishes().order_by('-created'))  # type: ignore
-        if self.request.user and self.request.user.is_authenticated:
+        qs = self.plan_queryset(Menu.objects.order_by('-created'))
+        is_authenticated = self.request.user and self.request.user.is_authenticated
+        if self.action == 'list' or not is_authenticated:
+            # `num_dishes` backs both the `ordering` of the list and the public visibility rule
+            qs = cast(MenuQuerySet, qs).annotate_num_dishes()
+        if is_authenticated:
             return qs
         return qs.filter(num_dishes__gt=0)
 
+    def filter_queryset(self, queryset: models.QuerySet[Menu]) -> models.QuerySet[Menu]:
+        if self.action in ('search_dishes', 'adjust_prices', 'dishes'):
+            # query params of the dish search filter dishes, not menus
+            return queryset
+        return super().filter_queryset(queryset)
+
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in PUBLIC_ACTIONS:
             return []
         return [IsAuthenticated()]
 
+    def get_throttles(self):
+        if self.action in PUBLIC_ACTIONS:
+            return [MenuReadThrottle()]
+        return super().get_throttles()
+
     def get_serializer_class(self):
         if self.action == 'retrieve':
+            # batches of `?ids=` are retrieved on the list route, without a first page of dishes
+            if self.detail and DISHES_LIMIT_PARAM in self.request.query_params:
+                return MenuDishesPreviewSerializer
             return MenuDetailsSerializer
         return MenuSerializer
 
@@ -48,8 +200,8 @@ class MenuModelViewSet(ModelViewSet):
                 name='ordering',
                 type=OpenApiTypes.STR,
                 location=OpenApiParameter.QUERY,
-                description='Order results',
-                enum=["name", "-name", "num_dishes", "-num_dishes"],
+                description='Order results, popularity orders the most viewed menus first',
+                enum=["name", "-name", "num_dishes", "-num_dishes", POPULARITY, f'-{POPULARITY}'],
             ),
             OpenApiParameter(
                 name='search',
@@ -57,6 +209,7 @@ class MenuModelViewSet(ModelViewSet):
                 location=OpenApiParameter.QUERY,
                 description='Filter results by name',
             ),
+            BATCH_PARAMETER,
         ],
     )
     def list(self, request: Request, *args: tuple, **kwargs: dict) -> Response:
@@ -69,10 +222,32 @@ class MenuModelViewSet(ModelViewSet):
         return super().create(request, *args, *kwargs)
 
     @extend_schema(
-        description='Retrieves a menu',
+        description='Retrieves a menu. With dishes_limit only the first dishes of the menu are included, '
+        'dishes_next links the next page of its dishes',
+        parameters=[
+            OpenApiParameter(
+                name=DISHES_LIMIT_PARAM,
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description='Number of dishes to include',
+            ),
+        ],
     )
     def retrieve(self, request: Request, *args: tuple, **kwargs: dict) -> Response:
-        return super().retrieve(request, *args, *kwargs)
+        limit = get_dishes_limit(request)
+        if limit is None:
+            response = super().retrieve(request, *args, *kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                record_view(Menu, int(self.kwargs[self.lookup_url_kwarg]))
+            return response
+
+        menu = self.get_object()
+        paginator = MenuDishesPagination()
+        url = request.build_absolute_uri(reverse('menus:menu-dishes', kwargs=self.kwargs))
+        menu.dishes_page = paginator.paginate_first(Dish.objects.filter(menu=menu), request, limit, url)
+        menu.dishes_next = paginator.get_next_link()
+        record_view(Menu, menu.pk)
+        return Response(self.get_serializer(menu).data)
 
     @extend_schema(
         description='Updates a menu',
@@ -92,21 +267,109 @@ class MenuModelViewSet(ModelViewSet):
     def destroy(self, request: Request, *args: tuple, **kwargs: dict) -> Response:
         return super().destroy(request, *args, *kwargs)
 
+    def perform_destroy(self, instance: Union[Menu, Dish]) -> None:
+        delete_instance(instance)
 
-class DishModelViewSet(ModelViewSet):
+    @extend_schema(
+        description='Returns the dishes of a menu, a page at a time',
+        parameters=[
+            *DISH_FILTER_PARAMETERS,
+            OpenApiParameter(
+                name='ordering',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Order results, by -created by default',
+                enum=[f'{prefix}{field}' for field in DISH_ORDERING_FIELDS for prefix in ('', '-')],
+            ),
+            OpenApiParameter(name='cursor', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY),
+            OpenApiParameter(name='limit', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY),
+        ],
+        responses=MenuDishesPageSerializer,
+    )
+    @action(detail=True, methods=['get'])
+    def dishes(self, request: Request, *args: tuple, **kwargs: dict) -> Response:
+        menu = self.get_object()
+        filterset = DishSearchFilter(request.query_params, queryset=Dish.objects.filter(menu=menu), request=request)
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+
+        paginator = MenuDishesPagination()
+        page = paginator.paginate_queryset(filterset.qs, request, view=self)
+        return paginator.get_paginated_response(DishSerializer(page, many=True, context={'request': request}).data)
+
+    @extend_schema(
+        description='Searches dishes of a menu and counts them per vegetarian flag, price and time to prepare',
+        parameters=[*DISH_SEARCH_PARAMETERS],
+        responses=DishSearchSerializer,
+    )
+    @action(detail=True, methods=['get'], url_path='dishes/search')
+    def search_dishes(self, request: Request, *args: tuple, **kwargs: dict) -> Response:
+        menu = self.get_object()
+        return search_dishes(self, request, Dish.objects.filter(menu=menu))
+
+    @extend_schema(
+        description='Changes the prices of the dishes of a menu, or previews the change with dry_run',
+        parameters=[*DISH_FILTER_PARAMETERS],
+        request=PriceAdjustmentSerializer,
+        responses=PriceAdjustmentResultSerializer,
+    )
+    @action(detail=True, methods=['post'], url_path='dishes/prices')
+    def adjust_prices(self, request: Request, *args: tuple, **kwargs: dict) -> Response:
+        menu = self.get_object()
+        return adjust_dish_prices(request, Dish.objects.filter(menu=menu))
+
+    @extend_schema(
+        description='Copies a menu, linked to its dishes or with copy_dishes to copies of them. '
+        'Without a name the copy is named "<name> (copy)", "<name> (copy 2)" and so on',
+        request=MenuCloneSerializer,
+        responses={201: MenuSerializer},
+    )
+    @action(detail=True, methods=['post'])
+    def clone(self, request: Request, *args: tuple, **kwargs: dict) -> Response:
+        menu = self.get_object()
+        serializer = MenuCloneSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # the copy and its dishes are sent to the event stream as one
+        with transaction.atomic(savepoint=False):
+            pk = clone_menu(menu, **serializer.validated_data)
+            clone = Menu.objects.prefetch_related('dishes').get(pk=pk)
+            publish(clone)
+            if serializer.validated_data['copy_dishes']:
+                for dish in clone.dishes.all():
+                    publish(dish)
+        return Response(MenuSerializer(clone).data, status=status.HTTP_201_CREATED)
+
+
+class DishModelViewSet(BatchRetrieveMixin, QuerySetPlannerMixin, ModelViewSet):
     permission_classes = (IsAuthenticated,)
     serializer_class = DishSerializer
     lookup_url_kwarg = 'dish_id'
     queryset = Dish.objects.none()
+    filter_backends = [PopularityOrderingFilter, DjangoFilterBackend]
+    ordering_fields = [POPULARITY]
 
     def get_queryset(self) -> models.QuerySet[Dish]:
-        return Dish.objects.all().order_by('-created')
+        return self.plan_queryset(Dish.objects.all().order_by('-created'))
 
     @extend_schema(
         description='Returns list of dishes',
+        parameters=[
+            OpenApiParameter(
+                name='ordering',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Order results, popularity orders the most viewed dishes first',
+                enum=[POPULARITY, f'-{POPULARITY}'],
+            ),
+            BATCH_PARAMETER,
+            MENU_IDS_PARAMETER,
+        ],
     )
     def list(self, request: Request, *args: tuple, **kwargs: dict) -> Response:
-        return super().list(request, *args, *kwargs)
+        response = super().list(request, *args, *kwargs)
+        if request.query_params.get(MENU_IDS_PARAM) == 'true':
+            add_menu_ids(response.data)
+        return response
 
     @extend_schema(
         description='Creates a new dish',
@@ -116,9 +379,15 @@ class DishModelViewSet(ModelViewSet):
 
     @extend_schema(
         description='Retrieves a dish',
+        parameters=[MENU_IDS_PARAMETER],
     )
     def retrieve(self, request: Request, *args: tuple, **kwargs: dict) -> Response:
-        return super().retrieve(request, *args, *kwargs)
+        response = super().retrieve(request, *args, *kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            record_view(Dish, int(self.kwargs[self.lookup_url_kwarg]))
+            if request.query_params.get(MENU_IDS_PARAM) == 'true':
+                add_menu_ids(response.data)
+        return response
 
     @extend_schema(
         description='Updates a dish',
@@ -138,6 +407,46 @@ class DishModelViewSet(ModelViewSet):
     def destroy(self, request: Request, *args: tuple, **kwargs: dict) -> Response:
         return super().destroy(request, *args, *kwargs)
 
+    def perform_destroy(self, instance: Union[Menu, Dish]) -> None:
+        delete_instance(instance)
+
+    @extend_schema(
+        description='Returns the menus containing a dish, a page at a time',
+        parameters=[
+            OpenApiParameter(name='cursor', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY),
+            OpenApiParameter(name='limit', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY),
+        ],
+        responses=DishMenusPageSerializer,
+    )
+    @action(detail=True, methods=['get'])
+    def menus(self, request: Request, *args: tuple, **kwargs: dict) -> Response:
+        dish = self.get_object()
+        # served by the `(dish_id, menu_id)` index of the links, see `0006_dish_menus_index`
+        menus = Menu.objects.filter(dishes=dish).only(*DishMenuSerializer.Meta.fields)
+        paginator = DishMenusPagination()
+        # without the view, as the ordering of dishes doesn't apply to their menus
+        page = paginator.paginate_queryset(menus, request)
+        return paginator.get_paginated_response(DishMenuSerializer(page, many=True).data)
+
+    @extend_schema(
+        description='Searches dishes and counts them per vegetarian flag, price and time to prepare',
+        parameters=[*DISH_SEARCH_PARAMETERS],
+        responses=DishSearchSerializer,
+    )
+    @action(detail=False, methods=['get'])
+    def search(self, request: Request, *args: tuple, **kwargs: dict) -> Response:
+        return search_dishes(self, request, Dish.objects.all())
+
+    @extend_schema(
+        description='Changes the prices of the dishes, or previews the change with dry_run',
+        parameters=[*DISH_FILTER_PARAMETERS],
+        request=PriceAdjustmentSerializer,
+        responses=PriceAdjustmentResultSerializer,
+    )
+    @action(detail=False, methods=['post'], url_path='prices')
+    def adjust_prices(self, request: Request, *args: tuple, **kwargs: dict) -> Response:
+        return adjust_dish_prices(request, Dish.objects.all())
+
     @extend_schema(
         description='Uploads a dish photo',
         operation_id='upload_file',
@@ -145,18 +454,62 @@ class DishModelViewSet(ModelViewSet):
             'multipart/form-data': {'type': 'object', 'properties': {'file': {'type': 'string', 'format': 'binary'}}}
         },
     )
-    @transaction.atomic()
     @action(detail=True, methods=['post'])
     def photo(self, request, *args, **kwargs):
         dish = self.get_object()
+        check_content_length(request.META, settings.PHOTO_MAX_SIZE + MULTIPART_OVERHEAD)
         try:
             image = request.data['file']
-            dish.image = image
-            dish.updated = timezone.now()
-            dish.save()
         except KeyError:
             raise ParseError('Request has no resource file attached')
+        if image.size > settings.PHOTO_MAX_SIZE:
+            raise PayloadTooLarge(f'Photo exceeds {settings.PHOTO_MAX_SIZE} bytes.')
+        check_photo_type(image.name, image.content_type)
+        check_photo_content(image, image.content_type)
+
+        dish = attach_photo(dish, image, image.name)
+        return Response(DishSerializer(dish).data)
 
+    @extend_schema(
+        description='Starts a resumable dish photo upload',
+        request=PhotoUploadInitSerializer,
+        responses={201: PhotoUploadSerializer},
+    )
+    @action(detail=True, methods=['post'], url_path='photo/uploads')
+    def photo_uploads(self, request: Request, *args: tuple, **kwargs: dict) -> Response:
+        dish = self.get_object()
+        serializer = PhotoUploadInitSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = PhotoUpload.create(dish, request.user.pk, **serializer.validated_data)
+        return Response(PhotoUploadSerializer(upload).data, status=status.HTTP_201_CREATED)
+
+    @extend_schema(
+        methods=['GET'],
+        description='Returns the state of a resumable dish photo upload',
+        responses=PhotoUploadSerializer,
+    )
+    @extend_schema(
+        methods=['PUT'],
+        description='Uploads the part of a resumable dish photo upload given by the Content-Range header',
+        request={'application/octet-stream': {'type': 'string', 'format': 'binary'}},
+        responses=PhotoUploadSerializer,
+    )
+    @action(detail=True, methods=['get', 'put'], url_path=f'photo/uploads/(?P<upload_id>{UPLOAD_ID})')
+    def photo_upload(self, request: Request, upload_id: str, *args: tuple, **kwargs: dict) -> Response:
+        upload = PhotoUpload.get(upload_id, self.get_object(), request.user.pk)
+        if request.method == 'PUT':
+            upload.write_part(request.META, request.stream)
+        return Response(PhotoUploadSerializer(upload).data)
+
+    @extend_schema(
+        description='Completes a resumable dish photo upload and sets it as the dish photo',
+        request=None,
+        responses=DishSerializer,
+    )
+    @action(detail=True, methods=['post'], url_path=f'photo/uploads/(?P<upload_id>{UPLOAD_ID})/complete')
+    def complete_photo_upload(self, request: Request, upload_id: str, *args: tuple, **kwargs: dict) -> Response:
+        dish = self.get_object()
+        dish = PhotoUpload.get(upload_id, dish, request.user.pk).complete(dish)
         return Response(DishSerializer(dish).data)
 
 
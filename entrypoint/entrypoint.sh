@@ -13,6 +13,15 @@ case $1 in
     start-celery)
         exec /app/entrypoint/start-celery.sh "${@:2}"
         ;;
+    start-production)
+        exec /app/entrypoint/start-production.sh "${@:2}"
+        ;;
+    reload-production)
+        exec kill -HUP "$(cat "${GUNICORN_PIDFILE:-/tmp/gunicorn.pid}")"
+        ;;
+    migrate)
+        exec /app/entrypoint/migrate.sh "${@:2}"
+        ;;
     *)
         exec "$@"
         ;;
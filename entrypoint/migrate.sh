@@ -0,0 +1,8 @@
+#!/bin/bash
+
+set -o errexit
+set -o nounset
+
+. /app/entrypoint/wait-postgres.sh
+
+python manage.py migrate --noinput "$@"
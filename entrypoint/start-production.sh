@@ -0,0 +1,20 @@
+#!/bin/bash
+
+set -o errexit
+set -o nounset
+
+. /app/entrypoint/wait-postgres.sh
+
+# Migrations are not run here, use the `migrate` command of the entrypoint before (re)starting the server.
+case ${1:-wsgi} in
+    wsgi)
+        exec gunicorn emenuapi.wsgi:application "${@:2}"
+        ;;
+    asgi)
+        exec gunicorn emenuapi.asgi:application --worker-class uvicorn.workers.UvicornWorker "${@:2}"
+        ;;
+    *)
+        >&2 echo "Unknown application type: $1, expected wsgi or asgi"
+        exit 1
+        ;;
+esac